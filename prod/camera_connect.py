@@ -1,4 +1,5 @@
 #!/usr/bin/env python3
+# Kept identical in prod/ and sanbox/: apply every change to both copies.
 import cv2
 import numpy as np
 import time
@@ -6,6 +7,35 @@ import os
 import subprocess
 import platform
 import sys
+import threading
+import contextlib
+import concurrent.futures
+import json
+import random
+
+# Alternative RTSP paths that might work with VStar C24S and similar cameras
+ALT_RTSP_PATHS = [
+    "/live/ch00_0",
+    "/cam/realmonitor?channel=1&subtype=0",
+    "/h264Preview_01_main",
+    "/livestream/0",
+    "/videoMain",
+    "/live/ch01_0",
+    "/video1"
+]
+
+# Upper bound on RTSP sessions opened at once while probing a camera
+MAX_PROBE_WORKERS = 4
+
+# VLC-compatible options for OpenCV - these mimic what VLC might use
+FFMPEG_CAPTURE_OPTIONS = "rtsp_transport;tcp|analyzeduration;10000000|reorder_queue_size;10000|buffer_size;10485760|stimeout;1000000"
+
+# On-disk registry of the last working URL per camera and requested path, so restarts skip probing
+CAMERA_CACHE_FILE = os.environ.get(
+    "FALLSENSE_CAMERA_CACHE",
+    os.path.join(os.path.expanduser("~"), ".fallsense", "camera_cache.json")
+)
+camera_cache_lock = threading.Lock()
 
 def open_in_vlc(url):
     """
@@ -64,83 +94,1288 @@ def open_in_vlc(url):
         print(f"Error launching VLC: {e}")
         return False
 
-def connect_to_ip_camera(ip="192.168.1.40", port="10554", user="admin", password="12345678", path="/tcp/av0_0", timeout=30):
+class FrameClock:
     """
-    Connect to an IP camera with the given credentials using the working URL format.
-    Returns the VideoCapture object if successful, None otherwise.
+    Capture timestamps of live frames, in seconds on the wall clock.
     
-    VStar C24S camera may require specific stream handling.
+    A frame's presentation time (PTS, e.g. CAP_PROP_POS_MSEC) is anchored to the
+    wall clock with the earliest arrival seen, so frames are timed by the stream
+    rather than by when they happened to be decoded or read, and decoding or
+    queueing delays do not distort the velocities computed from them. Without a
+    usable PTS the arrival time is used. When the PTS jumps (a reconnect, a
+    timestamp reset) the anchor starts over. Timestamps are strictly increasing.
     """
-    # Create URL for the IP camera with the specified format
-    url = f"rtsp://{user}:{password}@{ip}:{port}{path}"
+    def __init__(self, max_drift=2.0):
+        self.max_drift = max_drift  # Seconds the PTS clock may fall behind arrival before it is re-anchored
+        self.anchor = None          # Wall-clock time of PTS 0
+        self.last_pts = None
+        self.last = None
     
-    print(f"Connecting to VStar C24S camera at {ip}:{port}")
-    print(f"Using URL: {url}")
+    def stamp(self, pts=None, arrival=None):
+        """Capture time of a frame with the given PTS (seconds; None or <= 0 if unknown) that arrived now"""
+        if arrival is None:
+            arrival = time.time()
+        
+        if pts is None or pts <= 0:
+            self.anchor = None
+            timestamp = arrival
+        else:
+            if self.anchor is None or (self.last_pts is not None and pts <= self.last_pts):
+                self.anchor = arrival - pts
+            # A frame cannot be captured after it arrived; lagging far behind means the PTS jumped
+            self.anchor = min(self.anchor, arrival - pts)
+            if arrival - (self.anchor + pts) > self.max_drift:
+                self.anchor = arrival - pts
+            timestamp = self.anchor + pts
+        self.last_pts = pts
+        
+        if self.last is not None and timestamp <= self.last:
+            timestamp = self.last + 1e-3
+        self.last = timestamp
+        return timestamp
+
+class LatestFrameCapture:
+    """
+    Wrap a cv2.VideoCapture and decode it on its own thread.
     
-    # VLC-compatible options for OpenCV - these mimic what VLC might use
-    os.environ["OPENCV_FFMPEG_CAPTURE_OPTIONS"] = "rtsp_transport;tcp|analyzeduration;10000000|reorder_queue_size;10000|buffer_size;10485760|stimeout;1000000"
+    Only the newest decoded frame is kept, so a slow consumer (MediaPipe inference)
+    always gets the live scene instead of draining a backlog from the stream buffer.
+    Every decoded frame gets a sequence number, and frames that were decoded but
+    replaced before anyone read them are counted as dropped.
     
-    # Create VideoCapture options to improve streaming reliability
-    # These options help with VStar camera models
-    cap = cv2.VideoCapture(url, cv2.CAP_FFMPEG)
+    read(), isOpened(), get(), set() and release() behave like cv2.VideoCapture so
+    this can be used anywhere the detectors call cap.read(). timestamp is the
+    capture time of the last frame handed out (see FrameClock).
     
-    # Configure specific parameters for RTSP streaming to improve reliability
-    cap.set(cv2.CAP_PROP_BUFFERSIZE, 10)  # Use a larger buffer like VLC would
+    In idle mode (set_idle) every packet is still grabbed, because OpenCV cannot
+    skip decoding of non-key frames, but frames are only retrieved (converted to
+    BGR and copied out) at idle_fps.
+    """
+    def __init__(self, cap, read_timeout=5.0):
+        self.cap = cap
+        self.read_timeout = read_timeout  # Seconds read() waits for a new frame
+        
+        self.condition = threading.Condition()
+        self.frame = None
+        self.frame_time = None    # Capture time of the newest decoded frame
+        self.timestamp = None     # Capture time of the last frame handed out
+        self.clock = FrameClock()
+        self.frame_seq = 0        # Sequence number of the newest decoded frame
+        self.last_read_seq = 0    # Sequence number of the last frame handed out
+        self.dropped_frames = 0   # Decoded frames that were never handed out
+        self.stream_ended = False
+        self.running = True
+        
+        self.idle = False
+        self.idle_fps = 1.0
+        self.idle_skipped_frames = 0  # Frames grabbed but not retrieved while idle
+        self.last_retrieve_time = 0.0
+        self.wake_requested_at = None
+        self.last_wake_latency = None  # Seconds from set_idle(False) to the next full-rate frame
+        
+        self.thread = threading.Thread(target=self._update, daemon=True)
+        self.thread.start()
     
-    # Set timeout parameters for better connection handling
-    # This can help with VStar C24S models that have streaming issues
-    try:
-        cv2.CAP_PROP_OPEN_TIMEOUT_MSEC = 300000  # 30 seconds timeout
-        cap.set(cv2.CAP_PROP_OPEN_TIMEOUT_MSEC, timeout * 1000)  # Convert to milliseconds
-    except:
-        print("Warning: CAP_PROP_OPEN_TIMEOUT_MSEC not supported in this OpenCV version")
-    
-    # Give it a moment to connect
-    print(f"Waiting for connection (up to {timeout} seconds)...")
-    time.sleep(3)
-    
-    # Check if camera opened successfully
-    if not cap.isOpened():
-        print(f"Error: Could not connect to IP camera at {ip}:{port}")
-        # Try alternative URL formats that might work with VStar C24S
-        alt_paths = [
-            "/live/ch00_0",
-            "/cam/realmonitor?channel=1&subtype=0",
-            "/h264Preview_01_main",
-            "/livestream/0",
-            "/videoMain",
-            "/live/ch01_0",
-            "/video1"
-        ]
+    def _update(self):
+        """Decode frames as fast as the stream delivers them, keeping only the newest"""
+        while self.running:
+            if self.idle:
+                ret = self.cap.grab()
+                frame = None
+                if ret:
+                    now = time.time()
+                    if now - self.last_retrieve_time < 1.0 / self.idle_fps:
+                        self.idle_skipped_frames += 1
+                        continue
+                    self.last_retrieve_time = now
+                    ret, frame = self.cap.retrieve()
+            else:
+                ret, frame = self.cap.read()
+            frame_time = self.clock.stamp(self.cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0) if ret else None
+            
+            with self.condition:
+                if not ret or frame is None:
+                    self.stream_ended = True
+                    self.condition.notify_all()
+                    break
+                
+                # The previous frame was never read, so it is dropped
+                if self.frame_seq > self.last_read_seq:
+                    self.dropped_frames += 1
+                
+                if self.wake_requested_at is not None and not self.idle:
+                    self.last_wake_latency = time.time() - self.wake_requested_at
+                    self.wake_requested_at = None
+                
+                self.frame = frame
+                self.frame_time = frame_time
+                self.frame_seq += 1
+                self.condition.notify_all()
+    
+    def set_idle(self, idle, idle_fps=1.0):
+        """Switch between full-rate decoding and idle mode (idle_fps frames per second)"""
+        with self.condition:
+            self.idle_fps = idle_fps
+            if idle == self.idle:
+                return
+            self.idle = idle
+            self.wake_requested_at = None if idle else time.time()
+            self.last_wake_latency = None
+    
+    def read_latest(self, timeout=None):
+        """
+        Wait for a frame newer than the last one handed out.
         
-        for alt_path in alt_paths:
-            alt_url = f"rtsp://{user}:{password}@{ip}:{port}{alt_path}"
-            print(f"Trying alternative URL: {alt_url}")
-            alt_cap = cv2.VideoCapture(alt_url, cv2.CAP_FFMPEG)
-            alt_cap.set(cv2.CAP_PROP_BUFFERSIZE, 10)
-            time.sleep(2)
+        Returns (ret, frame, frame_seq, dropped_frames). ret is False if the stream
+        ended or no new frame arrived within the timeout.
+        """
+        if timeout is None:
+            timeout = self.read_timeout
+        
+        with self.condition:
+            has_new_frame = self.condition.wait_for(
+                lambda: self.frame_seq > self.last_read_seq or self.stream_ended or not self.running,
+                timeout=timeout
+            )
+            
+            if not has_new_frame or self.frame_seq <= self.last_read_seq:
+                return False, None, self.frame_seq, self.dropped_frames
             
-            if alt_cap.isOpened():
-                print(f"Successfully connected using alternative URL: {alt_url}")
-                return alt_cap
+            self.last_read_seq = self.frame_seq
+            self.timestamp = self.frame_time
+            return True, self.frame, self.frame_seq, self.dropped_frames
+    
+    def read(self):
+        """Drop-in replacement for cv2.VideoCapture.read() returning the newest frame"""
+        ret, frame, _, _ = self.read_latest()
+        return ret, frame
+    
+    def latest_frame(self, timeout=0.0):
+        """
+        Return (ret, frame) for the newest decoded frame without consuming it.
+        
+        Several readers can share the stream this way (e.g. a recording and an
+        alert thread). Waits up to timeout seconds for the first frame.
+        """
+        with self.condition:
+            self.condition.wait_for(lambda: self.frame is not None or self.stream_ended, timeout=timeout)
+            if self.frame is None:
+                return False, None
+            return True, self.frame
+    
+    def isOpened(self):
+        return self.running and not self.stream_ended and self.cap.isOpened()
+    
+    def get(self, prop_id):
+        return self.cap.get(prop_id)
+    
+    def set(self, prop_id, value):
+        return self.cap.set(prop_id, value)
+    
+    def get_stats(self):
+        """Return frame counters for status displays and logs"""
+        with self.condition:
+            return {
+                "frame_seq": self.frame_seq,
+                "dropped_frames": self.dropped_frames,
+                "stream_ended": self.stream_ended,
+                "idle": self.idle,
+                "idle_skipped_frames": self.idle_skipped_frames,
+                "last_wake_latency": self.last_wake_latency
+            }
+    
+    def release(self):
+        """Stop the decode thread and release the underlying capture"""
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+        
+        # Wait for the decode thread to leave cap.read() before releasing the capture
+        self.thread.join(timeout=self.read_timeout)
+        self.cap.release()
+
+class FFmpegPipeCapture:
+    """
+    Capture backend that runs ffmpeg as a subprocess instead of cv2.VideoCapture.
+    
+    ffmpeg decodes, scales to the inference resolution with its own scaler and
+    converts to RGB24, then streams rawvideo through a pipe into preallocated NumPy
+    buffers. Frames therefore arrive ready for MediaPipe, with no cv2.resize or
+    cvtColor in Python.
+    
+    Decoding runs on a reader thread with triple buffering, so like
+    LatestFrameCapture read() always returns the newest frame. The returned array
+    is one of the preallocated buffers and is only valid until the next read().
+    
+    rawvideo carries no PTS, so timestamp (the capture time of the last frame
+    handed out) is the time the frame arrived from the pipe.
+    
+    In idle mode ffmpeg is restarted with -skip_frame nokey, so only keyframes are
+    decoded at all. Waking restarts it at full rate: the first full-rate frame
+    arrives after a new RTSP connection and the next keyframe, usually one to a
+    few seconds, with the idle process's keyframes bridging the gap.
+    """
+    pixel_format = "rgb24"
+    
+    def __init__(self, url, width=None, height=480, ffmpeg_path="ffmpeg", ffprobe_path="ffprobe",
+                 read_timeout=5.0, probe_timeout=10):
+        self.url = url
+        self.ffmpeg_path = ffmpeg_path
+        self.read_timeout = read_timeout
+        self.fps = 0.0
+        
+        # ffmpeg needs an exact output size to size the buffers, so probe the
+        # source for its aspect ratio when only the height is given
+        if width is None:
+            source_width, source_height, self.fps = self._probe_stream(ffprobe_path, probe_timeout)
+            if source_width and source_height:
+                width = int(round(source_width * height / source_height / 2)) * 2
             else:
-                alt_cap.release()
+                width = int(round(height * 16 / 9 / 2)) * 2
+                print(f"Warning: Could not probe stream size, assuming 16:9 ({width}x{height})")
+        self.width = width
+        self.height = height
+        self.frame_bytes = width * height * 3
+        
+        # Triple buffering: one buffer held by the consumer, one holding the newest
+        # frame and one being written by the reader thread
+        self.buffers = [np.empty((height, width, 3), dtype=np.uint8) for _ in range(3)]
+        self.buffer_views = [memoryview(buf).cast("B") for buf in self.buffers]
+        self.held_index = None
+        self.latest_index = None
+        self.buffer_times = [None] * 3  # Arrival time of the frame in each buffer
+        self.timestamp = None
+        self.clock = FrameClock()
+        
+        self.condition = threading.Condition()
+        self.frame_seq = 0
+        self.last_read_seq = 0
+        self.dropped_frames = 0
+        self.stream_ended = False
+        self.running = True
+        
+        self.idle = False
+        self.wake_requested_at = None
+        self.last_wake_latency = None  # Seconds from set_idle(False) to the first full-rate frame
+        
+        self.process = self._start_process()
+        
+        self.thread = threading.Thread(target=self._update, daemon=True)
+        self.thread.start()
+    
+    def _input_args(self):
+        """Input options matching the ones used for OpenCV (TCP transport for RTSP)"""
+        if self.url.startswith("rtsp://"):
+            return ["-rtsp_transport", "tcp"]
+        return []
+    
+    def _ffmpeg_command(self):
+        # -skip_frame is a decoder option, so it has to come before -i
+        decoder_args = ["-skip_frame", "nokey"] if self.idle else []
+        return [
+            self.ffmpeg_path, "-hide_banner", "-loglevel", "error", "-nostdin",
+            *self._input_args(),
+            *decoder_args,
+            "-fflags", "nobuffer", "-flags", "low_delay",
+            "-i", self.url,
+            "-an",
+            "-vf", f"scale={self.width}:{self.height}:flags=bilinear",
+            "-pix_fmt", "rgb24",
+            # Pass frames through as decoded; rawvideo otherwise duplicates frames to a constant rate
+            "-vsync", "passthrough",
+            "-f", "rawvideo",
+            "pipe:1"
+        ]
+    
+    def _start_process(self):
+        return subprocess.Popen(
+            self._ffmpeg_command(),
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            bufsize=0
+        )
+    
+    @staticmethod
+    def _stop_process(process, timeout):
+        if process.poll() is None:
+            process.terminate()
+            try:
+                process.wait(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+        process.stdout.close()
+    
+    def _probe_stream(self, ffprobe_path, timeout):
+        """Return (width, height, fps) of the first video stream, or (None, None, 0.0)"""
+        command = [
+            ffprobe_path, "-v", "error", *self._input_args(),
+            "-select_streams", "v:0",
+            "-show_entries", "stream=width,height,avg_frame_rate",
+            "-of", "json", self.url
+        ]
+        try:
+            result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, timeout=timeout)
+            stream = json.loads(result.stdout)["streams"][0]
+            numerator, denominator = stream.get("avg_frame_rate", "0/1").split("/")
+            fps = float(numerator) / float(denominator) if float(denominator) else 0.0
+            return int(stream["width"]), int(stream["height"]), fps
+        except (OSError, subprocess.TimeoutExpired, ValueError, KeyError, IndexError):
+            return None, None, 0.0
+    
+    def _read_into(self, process, view):
+        """Fill one buffer from the pipe; returns False at end of stream"""
+        total = 0
+        while total < self.frame_bytes:
+            try:
+                n = process.stdout.readinto(view[total:])
+            except ValueError:  # Pipe closed by set_idle() restarting ffmpeg
+                return False
+            if not n:
+                return False
+            total += n
+        return True
+    
+    def _update(self):
+        """Read frames from the ffmpeg pipe, keeping only the newest"""
+        while self.running:
+            with self.condition:
+                index = next(i for i in range(3) if i != self.held_index and i != self.latest_index)
+                process = self.process
+            
+            ok = self._read_into(process, self.buffer_views[index])
+            self.buffer_times[index] = self.clock.stamp() if ok else None
+            
+            with self.condition:
+                if not ok:
+                    # set_idle() swapped in a new ffmpeg process; drop the partial frame
+                    if process is not self.process and self.running:
+                        continue
+                    self.stream_ended = True
+                    self.condition.notify_all()
+                    break
+                
+                # The previous newest frame was never read, so it is dropped
+                if self.latest_index is not None:
+                    self.dropped_frames += 1
                 
-        print("All alternative paths failed. Trying one last method...")
-        # Try TCP transport explicitly - sometimes helps with VStar cameras
-        tcp_url = f"rtsp://{user}:{password}@{ip}:{port}{path}?tcp"
-        tcp_cap = cv2.VideoCapture(tcp_url, cv2.CAP_FFMPEG)
-        time.sleep(2)
+                if self.wake_requested_at is not None:
+                    self.last_wake_latency = time.time() - self.wake_requested_at
+                    self.wake_requested_at = None
+                
+                self.latest_index = index
+                self.frame_seq += 1
+                self.condition.notify_all()
+    
+    def set_idle(self, idle, idle_fps=None):
+        """
+        Restart ffmpeg decoding keyframes only (idle) or every frame (awake).
+        
+        idle_fps is accepted for interface compatibility with LatestFrameCapture;
+        in idle mode the frame rate is set by the camera's keyframe interval.
+        """
+        with self.condition:
+            if idle == self.idle or not self.running:
+                return
+            self.idle = idle
+            self.wake_requested_at = None if idle else time.time()
+            self.last_wake_latency = None
+            old_process = self.process
+            self.process = self._start_process()
         
-        if tcp_cap.isOpened():
-            print(f"Successfully connected using TCP transport: {tcp_url}")
-            return tcp_cap
+        self._stop_process(old_process, self.read_timeout)
+    
+    def wait_until_ready(self, timeout=30):
+        """Block until the first frame has been decoded; returns False on timeout or end of stream"""
+        with self.condition:
+            self.condition.wait_for(lambda: self.frame_seq > 0 or self.stream_ended, timeout=timeout)
+            return self.frame_seq > 0
+    
+    def read_latest(self, timeout=None):
+        """
+        Wait for a frame newer than the last one handed out.
+        
+        Returns (ret, frame, frame_seq, dropped_frames) like LatestFrameCapture.
+        """
+        if timeout is None:
+            timeout = self.read_timeout
+        
+        with self.condition:
+            self.condition.wait_for(
+                lambda: self.latest_index is not None or self.stream_ended or not self.running,
+                timeout=timeout
+            )
             
-        return None
+            if self.latest_index is None:
+                return False, None, self.frame_seq, self.dropped_frames
+            
+            # Hand out the newest buffer; the previously held one becomes free
+            self.held_index = self.latest_index
+            self.latest_index = None
+            self.last_read_seq = self.frame_seq
+            self.timestamp = self.buffer_times[self.held_index]
+            return True, self.buffers[self.held_index], self.frame_seq, self.dropped_frames
+    
+    def read(self):
+        ret, frame, _, _ = self.read_latest()
+        return ret, frame
+    
+    def isOpened(self):
+        return self.running and not self.stream_ended and self.process.poll() is None
+    
+    def get(self, prop_id):
+        if prop_id == cv2.CAP_PROP_FRAME_WIDTH:
+            return float(self.width)
+        if prop_id == cv2.CAP_PROP_FRAME_HEIGHT:
+            return float(self.height)
+        if prop_id == cv2.CAP_PROP_FPS:
+            return self.fps
+        return 0.0
+    
+    def set(self, prop_id, value):
+        return False
+    
+    def get_stats(self):
+        with self.condition:
+            return {
+                "frame_seq": self.frame_seq,
+                "dropped_frames": self.dropped_frames,
+                "stream_ended": self.stream_ended,
+                "idle": self.idle,
+                "last_wake_latency": self.last_wake_latency
+            }
+    
+    def release(self):
+        """Stop ffmpeg and the reader thread"""
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+            process = self.process
+        
+        self._stop_process(process, self.read_timeout)
+        self.thread.join(timeout=self.read_timeout)
+
+# Connect time and time-to-first-frame of the last successful connection, keyed by "ip:port"
+CONNECTION_METRICS = {}
+
+class CaptureOptions:
+    """
+    OPENCV_FFMPEG_CAPTURE_OPTIONS for the duration of a capture open.
+    
+    OpenCV reads the options from the process environment when a capture is
+    opened, so cameras connecting on different threads could open with each
+    other's transport and timeouts. Opens with the same options still run
+    concurrently (the concurrent URL probe); an open with other options waits
+    until they are done.
+    """
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.current = None
+        self.active = 0  # Opens in progress with the current options
+    
+    @contextlib.contextmanager
+    def use(self, options):
+        with self.condition:
+            while self.active and self.current != options:
+                self.condition.wait()
+            os.environ["OPENCV_FFMPEG_CAPTURE_OPTIONS"] = options
+            self.current = options
+            self.active += 1
+        try:
+            yield
+        finally:
+            with self.condition:
+                self.active -= 1
+                self.condition.notify_all()
+
+capture_options = CaptureOptions()
+
+def open_capture(url, timeout=30, ffmpeg_options=FFMPEG_CAPTURE_OPTIONS):
+    """
+    Open an RTSP URL with OpenCV's FFmpeg backend and the given capture options.
     
-    print(f"Successfully connected to VStar C24S camera at {ip}:{port}")
+    Opening and reading are bounded by timeout (seconds) where the OpenCV
+    version supports it, so a dead camera cannot block for longer than that.
+    """
+    timeout_msec = int(timeout * 1000)
+    with capture_options.use(ffmpeg_options):
+        try:
+            cap = cv2.VideoCapture(url, cv2.CAP_FFMPEG, [
+                cv2.CAP_PROP_OPEN_TIMEOUT_MSEC, timeout_msec,
+                cv2.CAP_PROP_READ_TIMEOUT_MSEC, timeout_msec
+            ])
+        except (AttributeError, TypeError, cv2.error):
+            print("Warning: open/read timeouts not supported in this OpenCV version")
+            cap = cv2.VideoCapture(url, cv2.CAP_FFMPEG)
+    
+    # Configure specific parameters for RTSP streaming to improve reliability
+    cap.set(cv2.CAP_PROP_BUFFERSIZE, 10)  # Use a larger buffer like VLC would
     return cap
 
+def wait_for_first_frame(cap, timeout=30):
+    """
+    Block until the capture delivers its first decodable frame.
+    
+    Returns as soon as a valid frame arrives instead of sleeping for a fixed time.
+    Returns (ready, frame, seconds_waited); ready is False if the capture did not
+    open or no valid frame arrived within timeout seconds.
+    """
+    start_time = time.time()
+    deadline = start_time + timeout
+    
+    while cap.isOpened() and time.time() < deadline:
+        ret, frame = cap.read()
+        if ret and frame is not None and frame.size > 0:
+            return True, frame, time.time() - start_time
+        
+        # VStar C24S specific - first reads may fail while the stream initializes
+        time.sleep(0.05)
+    
+    return False, None, time.time() - start_time
+
+def record_connection_metrics(ip, port, url, connect_seconds, first_frame_seconds, stream_name=None):
+    """Store and print connection timings for a camera"""
+    CONNECTION_METRICS[_camera_key(ip, port, stream_name)] = {
+        "url": url,
+        "connect_seconds": connect_seconds,
+        "first_frame_seconds": first_frame_seconds,
+        "connected_at": time.time()
+    }
+    print(f"Connect time: {connect_seconds:.2f}s, time to first frame: {first_frame_seconds:.2f}s")
+
+def get_connection_metrics(ip, port, stream_name=None):
+    """Return the timings of the last successful connection to a camera, or None"""
+    return CONNECTION_METRICS.get(_camera_key(ip, port, stream_name))
+
+class ReconnectSupervisor:
+    """
+    Keep a camera stream alive for a detector run loop.
+    
+    read() behaves like cv2.VideoCapture.read(). When reads keep failing, or no new
+    frame has arrived for stall_timeout seconds, the capture is released and
+    connect() is called again with exponential backoff and jitter, so a flapping
+    camera does not spin the CPU or flood the logs.
+    
+    connect is a callable that returns an opened capture or None.
+    
+    set_idle() is forwarded to the capture (and re-applied after a reconnect);
+    while idle, idle_stall_timeout replaces stall_timeout because keyframe-only
+    decoding delivers a frame only once per GOP.
+    """
+    def __init__(self, connect, cap=None, stall_timeout=5.0, max_read_failures=3,
+                 backoff_initial=1.0, backoff_max=30.0, backoff_factor=2.0, jitter=0.5,
+                 max_attempts=None, stable_after=60.0, idle_stall_timeout=20.0):
+        self.connect = connect
+        self.cap = cap
+        self.stall_timeout = stall_timeout          # Seconds without a new frame before the stream counts as frozen
+        self.idle_stall_timeout = idle_stall_timeout
+        self.max_read_failures = max_read_failures  # Consecutive failed reads before reconnecting
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self.backoff_factor = backoff_factor
+        self.jitter = jitter                        # Fraction of the delay added or removed at random
+        self.max_attempts = max_attempts            # None retries forever
+        self.stable_after = stable_after            # Seconds a stream must stay up before backoff resets
+        
+        self.backoff_level = 0  # Carried across outages so a flapping camera keeps backing off
+        self.idle = False
+        self.idle_fps = 1.0
+        self.stop_event = threading.Event()  # Set by stop() to abandon a reconnect in progress
+        self.consecutive_failures = 0
+        self.last_frame_time = time.time()
+        
+        # Reconnect counters, exposed through get_metrics()
+        self.metrics = {
+            "frames": 0,
+            "read_failures": 0,
+            "stalls": 0,
+            "reconnects": 0,
+            "reconnect_attempts": 0,
+            "failed_reconnect_attempts": 0,
+            "last_backoff_seconds": 0.0,
+            "last_reconnect_time": None,
+            "downtime_seconds": 0.0
+        }
+    
+    def _backoff_delay(self, attempt):
+        """Exponential backoff with jitter for the given attempt number (starting at 0)"""
+        delay = min(self.backoff_max, self.backoff_initial * (self.backoff_factor ** attempt))
+        return max(0.0, delay * (1 + random.uniform(-self.jitter, self.jitter)))
+    
+    def reconnect(self):
+        """
+        Release the current capture and reconnect with backoff.
+        
+        Returns True once connected, False if max_attempts was exhausted.
+        """
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+        
+        outage_start = time.time()
+        
+        # Only start from the initial delay if the last connection was stable
+        last_reconnect = self.metrics["last_reconnect_time"]
+        if last_reconnect is None or outage_start - last_reconnect > self.stable_after:
+            self.backoff_level = 0
+        
+        attempt = 0
+        while self.max_attempts is None or attempt < self.max_attempts:
+            delay = self._backoff_delay(self.backoff_level)
+            self.backoff_level += 1
+            self.metrics["last_backoff_seconds"] = delay
+            print(f"Reconnecting in {delay:.1f}s (attempt {attempt + 1})...")
+            if self.stop_event.wait(delay):
+                break
+            
+            self.metrics["reconnect_attempts"] += 1
+            cap = self.connect()
+            if cap is not None and cap.isOpened():
+                self.cap = cap
+                if self.idle and hasattr(cap, "set_idle"):
+                    cap.set_idle(True, self.idle_fps)
+                self.consecutive_failures = 0
+                self.last_frame_time = time.time()
+                self.metrics["reconnects"] += 1
+                self.metrics["last_reconnect_time"] = self.last_frame_time
+                self.metrics["downtime_seconds"] += self.last_frame_time - outage_start
+                print(f"Reconnected after {self.last_frame_time - outage_start:.1f}s")
+                return True
+            
+            if cap is not None:
+                cap.release()
+            self.metrics["failed_reconnect_attempts"] += 1
+            attempt += 1
+        
+        self.metrics["downtime_seconds"] += time.time() - outage_start
+        if self.stop_event.is_set():
+            print("Reconnection cancelled")
+        else:
+            print(f"Giving up after {attempt} reconnection attempts")
+        return False
+    
+    def read(self):
+        """
+        Read the next frame, reconnecting as needed.
+        
+        Returns (False, None) only when reconnection gave up.
+        """
+        while True:
+            if self.cap is None and not self.reconnect():
+                return False, None
+            
+            ret, frame = self.cap.read()
+            current_time = time.time()
+            
+            if ret and frame is not None and frame.size > 0:
+                self.consecutive_failures = 0
+                self.last_frame_time = current_time
+                self.metrics["frames"] += 1
+                return True, frame
+            
+            self.consecutive_failures += 1
+            self.metrics["read_failures"] += 1
+            
+            # Frame-timestamp watchdog: a stream that stops delivering is frozen
+            stall_timeout = self.idle_stall_timeout if self.idle else self.stall_timeout
+            stalled = current_time - self.last_frame_time > stall_timeout
+            if stalled:
+                self.metrics["stalls"] += 1
+                print(f"No new frame for {current_time - self.last_frame_time:.1f}s, stream frozen")
+            
+            if stalled or self.consecutive_failures >= self.max_read_failures or not self.cap.isOpened():
+                if not self.reconnect():
+                    return False, None
+    
+    def set_idle(self, idle, idle_fps=1.0):
+        """Switch the capture between idle and full-rate decoding, if it supports it"""
+        self.idle = idle
+        self.idle_fps = idle_fps
+        if self.cap is not None and hasattr(self.cap, "set_idle"):
+            self.cap.set_idle(idle, idle_fps)
+    
+    def stop(self):
+        """Make a pending or future reconnect give up, so read() returns (False, None)"""
+        self.stop_event.set()
+    
+    def get_capture_stats(self):
+        """Return the capture's own counters (frame_seq, dropped_frames, ...) or an empty dict"""
+        if self.cap is not None and hasattr(self.cap, "get_stats"):
+            return self.cap.get_stats()
+        return {}
+    
+    def isOpened(self):
+        return self.cap is not None and self.cap.isOpened()
+    
+    def get_metrics(self):
+        """Return a copy of the reconnect counters"""
+        metrics = dict(self.metrics)
+        metrics["seconds_since_last_frame"] = time.time() - self.last_frame_time
+        return metrics
+    
+    def release(self):
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+
+class IdleController:
+    """
+    Drop a stream to idle decoding when a room has been empty for a while.
+    
+    update() is called once per processed frame with whether the detector found
+    anything. After idle_after seconds without a detection or motion the stream is
+    switched to idle (keyframes only with the FFmpeg backend, idle_fps retrieved
+    frames with OpenCV). A detection, or a cheap frame difference on a thumbnail,
+    wakes it back up to full rate.
+    
+    Idle time, transitions and wake-up latency (from the wake request to the first
+    full-rate frame, measured by the capture) are kept in metrics.
+    """
+    def __init__(self, idle_after=120.0, idle_fps=1.0, motion_threshold=0.01,
+                 pixel_threshold=25, thumbnail_width=64):
+        self.idle_after = idle_after              # Seconds without activity before going idle
+        self.idle_fps = idle_fps
+        self.motion_threshold = motion_threshold  # Fraction of thumbnail pixels that must change
+        self.pixel_threshold = pixel_threshold    # Grey-level difference that counts as a change
+        self.thumbnail_width = thumbnail_width
+        
+        self.idle = False
+        self.idle_since = None
+        self.last_activity_time = time.time()
+        self.prev_thumbnail = None
+        self.wake_pending = False
+        
+        self.metrics = {
+            "idle_entries": 0,
+            "wakeups": 0,
+            "idle_seconds": 0.0,
+            "last_wake_latency": None,
+            "max_wake_latency": None,
+            "total_wake_latency": 0.0,
+            "measured_wakeups": 0
+        }
+    
+    def _has_motion(self, frame):
+        """Compare a small grey thumbnail with the previous one"""
+        h, w = frame.shape[:2]
+        thumbnail_height = max(1, int(h * self.thumbnail_width / w))
+        thumbnail = cv2.resize(frame, (self.thumbnail_width, thumbnail_height), interpolation=cv2.INTER_NEAREST)
+        if thumbnail.ndim == 3:
+            thumbnail = cv2.cvtColor(thumbnail, cv2.COLOR_BGR2GRAY)
+        
+        prev_thumbnail = self.prev_thumbnail
+        self.prev_thumbnail = thumbnail
+        if prev_thumbnail is None or prev_thumbnail.shape != thumbnail.shape:
+            return False
+        
+        changed = cv2.countNonZero(cv2.threshold(cv2.absdiff(thumbnail, prev_thumbnail),
+                                                 self.pixel_threshold, 255, cv2.THRESH_BINARY)[1])
+        return changed > self.motion_threshold * thumbnail.size
+    
+    def update(self, stream, frame, activity=False):
+        """
+        Record one processed frame and switch the stream if needed.
+        
+        stream is anything with set_idle() (ReconnectSupervisor or a capture).
+        Returns True while the stream is idle.
+        """
+        current_time = time.time()
+        motion = frame is not None and self._has_motion(frame)
+        
+        if self.wake_pending:
+            self._record_wake_latency(stream)
+        
+        if activity or motion:
+            self.last_activity_time = current_time
+            if self.idle:
+                self.idle = False
+                self.metrics["wakeups"] += 1
+                self.metrics["idle_seconds"] += current_time - self.idle_since
+                self.idle_since = None
+                self.wake_pending = True
+                stream.set_idle(False, self.idle_fps)
+                print(f"{'Activity' if activity else 'Motion'} detected, leaving idle decoding")
+        elif not self.idle and self.idle_after and current_time - self.last_activity_time > self.idle_after:
+            self.idle = True
+            self.idle_since = current_time
+            self.metrics["idle_entries"] += 1
+            self.wake_pending = False
+            stream.set_idle(True, self.idle_fps)
+            print(f"No activity for {self.idle_after:.0f}s, switching to idle decoding")
+        
+        return self.idle
+    
+    def _record_wake_latency(self, stream):
+        if hasattr(stream, "get_capture_stats"):
+            stats = stream.get_capture_stats()
+        elif hasattr(stream, "get_stats"):
+            stats = stream.get_stats()
+        else:
+            stats = {}
+        
+        latency = stats.get("last_wake_latency")
+        if latency is None:
+            return
+        
+        self.wake_pending = False
+        self.metrics["last_wake_latency"] = latency
+        self.metrics["max_wake_latency"] = max(latency, self.metrics["max_wake_latency"] or 0.0)
+        self.metrics["total_wake_latency"] += latency
+        self.metrics["measured_wakeups"] += 1
+    
+    def get_metrics(self):
+        """Return a copy of the idle counters, including the current idle period"""
+        metrics = dict(self.metrics)
+        metrics["idle"] = self.idle
+        if self.idle:
+            metrics["idle_seconds"] += time.time() - self.idle_since
+        if metrics["measured_wakeups"]:
+            metrics["avg_wake_latency"] = metrics["total_wake_latency"] / metrics["measured_wakeups"]
+        return metrics
+
+class OnDemandStream:
+    """
+    A stream that is only kept open while something needs it.
+    
+    Used for the full-resolution main stream when detectors run inference on a
+    low-resolution substream: request() starts opening it in the background,
+    latest_frame() returns its newest frame, and close_if_idle() releases it once
+    nobody has asked for a frame for idle_timeout seconds.
+    
+    connect is a callable that returns an opened LatestFrameCapture or None.
+    """
+    def __init__(self, connect, idle_timeout=30.0):
+        self.connect = connect
+        self.idle_timeout = idle_timeout
+        self.cap = None
+        self.opening = False
+        self.last_used = 0.0
+        self.lock = threading.Lock()
+        self.open_count = 0
+    
+    def request(self):
+        """Mark the stream as needed and start opening it if it is closed"""
+        self.last_used = time.time()
+        stale_cap = None
+        with self.lock:
+            # A stream that dropped is reopened on the next request
+            if self.cap is not None and not self.cap.isOpened():
+                stale_cap = self.cap
+                self.cap = None
+            start_opening = self.cap is None and not self.opening
+            if start_opening:
+                self.opening = True
+        
+        if stale_cap is not None:
+            stale_cap.release()
+        if start_opening:
+            threading.Thread(target=self._open, daemon=True).start()
+    
+    def _open(self):
+        cap = self.connect()
+        with self.lock:
+            self.opening = False
+            if cap is not None and cap.isOpened():
+                self.cap = cap
+                self.open_count += 1
+            elif cap is not None:
+                cap.release()
+    
+    def is_ready(self):
+        with self.lock:
+            return self.cap is not None and self.cap.isOpened()
+    
+    def latest_frame(self, timeout=0.0):
+        """
+        Return (ret, frame) for the newest frame, opening the stream if needed.
+        
+        Waits up to timeout seconds for the stream to open and deliver a frame.
+        """
+        self.request()
+        deadline = time.time() + timeout
+        while True:
+            with self.lock:
+                cap = self.cap
+            if cap is not None:
+                return cap.latest_frame(max(deadline - time.time(), 0))
+            if time.time() >= deadline:
+                return False, None
+            time.sleep(0.05)
+    
+    def close_if_idle(self):
+        """Release the stream if it has not been used for idle_timeout seconds"""
+        if time.time() - self.last_used < self.idle_timeout:
+            return
+        with self.lock:
+            cap = self.cap
+            self.cap = None
+        if cap is not None:
+            print("Closing idle main stream")
+            cap.release()
+    
+    def release(self):
+        with self.lock:
+            cap = self.cap
+            self.cap = None
+        if cap is not None:
+            cap.release()
+
+def _camera_key(ip, port, stream_name=None):
+    """Cache and metrics key: "ip:port" for the main stream, "ip:port/name" for other streams"""
+    if stream_name:
+        return f"{ip}:{port}/{stream_name}"
+    return f"{ip}:{port}"
+
+def _cache_key(ip, port, requested_path, stream_name=None):
+    """
+    Connection cache key: the camera key plus the path that was asked for, so a
+    different explicit path is never silently replaced by another one's winner
+    """
+    return f"{_camera_key(ip, port, stream_name)}|{requested_path}"
+
+def _capture_transport(ffmpeg_options, path):
+    """
+    RTSP transport a capture opened with these options used.
+    
+    "tcp" or "udp" when the options (or a "?tcp" path) force it; "auto" when
+    FFmpeg was left to negotiate (UDP first, TCP fallback), as OpenCV does not
+    report which one it ended up with.
+    """
+    for option in ffmpeg_options.split("|"):
+        name, _, value = option.partition(";")
+        if name == "rtsp_transport" and value:
+            return value
+    return "tcp" if path.endswith("?tcp") else "auto"
+
+def load_camera_cache(cache_file=None):
+    """Load the per-camera connection cache, returning an empty dict if it is missing or unreadable"""
+    cache_file = cache_file or CAMERA_CACHE_FILE
+    try:
+        with open(cache_file, "r") as f:
+            cache = json.load(f)
+        return cache if isinstance(cache, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+def save_camera_cache(cache, cache_file=None):
+    """Write the per-camera connection cache atomically"""
+    cache_file = cache_file or CAMERA_CACHE_FILE
+    try:
+        cache_dir = os.path.dirname(cache_file)
+        if cache_dir and not os.path.exists(cache_dir):
+            os.makedirs(cache_dir)
+        
+        # Write to a temporary file first so a crash never leaves a truncated cache
+        temp_file = f"{cache_file}.{os.getpid()}.tmp"
+        with open(temp_file, "w") as f:
+            json.dump(cache, f, indent=2, sort_keys=True)
+        os.replace(temp_file, cache_file)
+    except OSError as e:
+        print(f"Warning: Could not write camera cache {cache_file}: {e}")
+
+def get_cached_connection(ip, port, requested_path, cache_file=None, stream_name=None):
+    """Return the cached working connection for a camera and requested path, or None"""
+    with camera_cache_lock:
+        return load_camera_cache(cache_file).get(_cache_key(ip, port, requested_path, stream_name))
+
+def update_camera_cache(ip, port, requested_path, path, connect_seconds, first_frame_seconds,
+                        ffmpeg_options=FFMPEG_CAPTURE_OPTIONS, probe_timings=None, cache_file=None,
+                        stream_name=None):
+    """
+    Record the RTSP path, transport and FFmpeg options that worked for a camera
+    when requested_path was asked for.
+    
+    Only the path is stored, never the full URL, so credentials stay out of the cache.
+    ffmpeg_options are the capture options the path was opened with.
+    probe_timings optionally maps other working paths to how long they took.
+    """
+    transport = _capture_transport(ffmpeg_options, path)
+    entry = {
+        "path": path,
+        "transport": transport,
+        "ffmpeg_options": ffmpeg_options,
+        "connect_seconds": round(connect_seconds, 3),
+        "first_frame_seconds": round(first_frame_seconds, 3),
+        "updated_at": time.strftime("%Y-%m-%d %H:%M:%S")
+    }
+    
+    with camera_cache_lock:
+        cache = load_camera_cache(cache_file)
+        key = _cache_key(ip, port, requested_path, stream_name)
+        
+        # Keep timings of other paths that worked before
+        previous_timings = cache.get(key, {}).get("probe_timings", {})
+        entry["probe_timings"] = dict(previous_timings)
+        entry["probe_timings"][path] = round(first_frame_seconds, 3)
+        if probe_timings:
+            entry["probe_timings"].update({p: round(t, 3) for p, t in probe_timings.items()})
+        
+        cache[key] = entry
+        save_camera_cache(cache, cache_file)
+
+def _try_url(url, timeout, ffmpeg_options=FFMPEG_CAPTURE_OPTIONS):
+    """
+    Open a single URL and wait for its first frame.
+    
+    Returns (cap, connect_seconds, first_frame_seconds), with cap None on failure.
+    """
+    start_time = time.time()
+    cap = open_capture(url, timeout, ffmpeg_options)
+    connect_seconds = time.time() - start_time
+    ready, _, _ = wait_for_first_frame(cap, max(timeout - connect_seconds, 0))
+    
+    if not ready:
+        cap.release()
+        return None, connect_seconds, time.time() - start_time
+    return cap, connect_seconds, time.time() - start_time
+
+def _open_candidate(url, claim_winner, deadline):
+    """
+    Open one candidate URL and wait for its first frame, both before deadline.
+    
+    claim_winner(url) is called once a valid frame arrives and returns True if this
+    candidate is the first to succeed. Captures that lose the race (or finish
+    after the probe has given up) are released. Returns a timing record for the
+    candidate.
+    """
+    start_time = time.time()
+    timeout = deadline - start_time
+    if timeout <= 0:
+        return {"url": url, "seconds": 0.0, "connect_seconds": 0.0, "status": "timed out", "cap": None}
+    cap = open_capture(url, timeout)
+    connect_seconds = time.time() - start_time
+    
+    valid_frame, _, _ = wait_for_first_frame(cap, max(timeout - connect_seconds, 0))
+    
+    record = {
+        "url": url,
+        "seconds": time.time() - start_time,
+        "connect_seconds": connect_seconds,
+        "status": "failed",
+        "cap": None
+    }
+    
+    if valid_frame and claim_winner(url):
+        record["status"] = "connected"
+        record["cap"] = cap
+    else:
+        if valid_frame:
+            record["status"] = "released"  # Delivered a frame, but another URL was faster
+        cap.release()
+    
+    return record
+
+def probe_rtsp_urls(urls, timeout=30, max_workers=MAX_PROBE_WORKERS):
+    """
+    Open several candidate RTSP URLs concurrently with a bounded worker pool.
+    
+    The first URL to deliver a valid frame wins; every other capture is released
+    as soon as it finishes opening. Candidates share one deadline, timeout
+    seconds from the start, so one queued behind slower ones only gets the time
+    that is left. Returns (url, cap, timings) where url and cap
+    are None if no candidate worked, and timings lists how long each candidate took.
+    """
+    winner_lock = threading.Lock()
+    winner = []
+    
+    def claim_winner(url):
+        with winner_lock:
+            if winner:
+                return False
+            winner.append(url)
+            return True
+    
+    def close_race():
+        """End the race; returns the URL that claimed the win, or None"""
+        with winner_lock:
+            if not winner:
+                winner.append(None)  # Late finishers now lose and release their captures
+            return winner[0]
+    
+    print(f"Probing {len(urls)} candidate URLs ({max_workers} at a time)...")
+    start_time = time.time()
+    deadline = start_time + timeout
+    
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
+    futures = {executor.submit(_open_candidate, url, claim_winner, deadline): url for url in urls}
+    
+    records = {}
+    winning_record = None
+    try:
+        for future in concurrent.futures.as_completed(futures, timeout=timeout):
+            record = future.result()
+            records[record["url"]] = record
+            if record["status"] == "connected":
+                winning_record = record
+                break
+    except concurrent.futures.TimeoutError:
+        print(f"Probing timed out after {timeout} seconds")
+    
+    claimed_url = close_race()
+    if claimed_url is not None and winning_record is None:
+        # A candidate won just as the probe timed out; it is only building its
+        # record, so take its capture rather than leaking it
+        for future, url in futures.items():
+            if url == claimed_url:
+                winning_record = future.result()
+                records[url] = winning_record
+                break
+    
+    # Do not wait for slower candidates; they release their own captures when done
+    executor.shutdown(wait=False, cancel_futures=True)
+    
+    timings = []
+    for future, url in futures.items():
+        if url in records:
+            record = records[url]
+            timings.append({
+                "url": url,
+                "status": record["status"],
+                "seconds": record["seconds"],
+                "connect_seconds": record["connect_seconds"]
+            })
+        elif future.cancelled():
+            timings.append({"url": url, "status": "cancelled", "seconds": None})
+        else:
+            timings.append({"url": url, "status": "abandoned", "seconds": time.time() - start_time})
+    
+    if winning_record is None:
+        return None, None, timings
+    return winning_record["url"], winning_record["cap"], timings
+
+def _winning_timing(timings):
+    """Return the timing record of the candidate that won a probe"""
+    for timing in timings:
+        if timing["status"] == "connected":
+            return timing
+    return None
+
+def print_probe_timings(timings):
+    """Print how long each candidate URL took during probing"""
+    print("Candidate URL timings:")
+    for timing in timings:
+        seconds = "-" if timing["seconds"] is None else f"{timing['seconds']:.2f}s"
+        print(f"  {timing['status']:>10}  {seconds:>7}  {timing['url']}")
+
+def connect_to_ip_camera(ip="192.168.1.40", port="10554", user="admin", password="12345678", path="/tcp/av0_0", timeout=30, threaded=False, use_cache=True,
+                         backend="opencv", frame_height=480, stream_name=None):
+    """
+    Connect to an IP camera with the given credentials using the working URL format.
+    Returns the VideoCapture object if successful, None otherwise.
+    
+    backend selects how the stream is decoded: "opencv" uses cv2.VideoCapture and
+    returns BGR frames at the camera resolution; "ffmpeg" returns an
+    FFmpegPipeCapture that delivers RGB frames already scaled to frame_height
+    (falling back to OpenCV if ffmpeg cannot open the stream).
+    
+    If use_cache is True the path that worked last time for this camera (see
+    CAMERA_CACHE_FILE) is tried first, and the alternatives are only probed when
+    it fails. Whatever works is written back to the cache.
+    
+    If threaded is True the capture is wrapped in a LatestFrameCapture, which decodes
+    on its own thread and always hands out the newest frame.
+    
+    stream_name identifies secondary streams of the same camera (e.g. "sub" for a
+    low-resolution substream) so they get their own cache entry and metrics and
+    are not probed against the main-stream alternative paths.
+    
+    VStar C24S camera may require specific stream handling.
+    """
+    # Create URL for the IP camera with the specified format
+    base_url = f"rtsp://{user}:{password}@{ip}:{port}"
+    url = f"{base_url}{path}"
+    
+    print(f"Connecting to VStar C24S camera at {ip}:{port}")
+    
+    # Try the cached winner first
+    # (per requested path: an explicit --path is not replaced by another path's winner)
+    cached = get_cached_connection(ip, port, path, stream_name=stream_name) if use_cache else None
+    
+    if backend == "ffmpeg":
+        ffmpeg_path = cached["path"] if cached else path
+        ffmpeg_url = f"{base_url}{ffmpeg_path}"
+        print(f"Using FFmpeg pipe backend: {ffmpeg_url}")
+        
+        start_time = time.time()
+        try:
+            cap = FFmpegPipeCapture(ffmpeg_url, height=frame_height, probe_timeout=timeout)
+        except OSError as e:
+            print(f"Could not start ffmpeg: {e}")
+            cap = None
+        
+        if cap is not None:
+            connect_seconds = time.time() - start_time
+            if cap.wait_until_ready(max(timeout - connect_seconds, 0)):
+                print(f"Successfully connected to VStar C24S camera at {ip}:{port} ({cap.width}x{cap.height} RGB)")
+                record_connection_metrics(ip, port, ffmpeg_url, connect_seconds, time.time() - start_time, stream_name=stream_name)
+                return cap
+            cap.release()
+        
+        print("FFmpeg backend could not open the stream. Falling back to OpenCV...")
+    if cached:
+        cached_url = f"{base_url}{cached['path']}"
+        cached_options = cached.get("ffmpeg_options", FFMPEG_CAPTURE_OPTIONS)
+        
+        print(f"Using cached URL: {cached_url}")
+        cap, connect_seconds, first_frame_seconds = _try_url(cached_url, timeout, cached_options)
+        if cap is not None:
+            print(f"Successfully connected to VStar C24S camera at {ip}:{port}")
+            record_connection_metrics(ip, port, cached_url, connect_seconds, first_frame_seconds, stream_name=stream_name)
+            update_camera_cache(ip, port, path, cached["path"], connect_seconds, first_frame_seconds,
+                                ffmpeg_options=cached_options,
+                                stream_name=stream_name)
+            return LatestFrameCapture(cap) if threaded else cap
+        
+        print("Cached URL failed. Re-probing camera...")
+    
+    # Open the requested URL unless it is the cached one that just failed,
+    # and return as soon as the first decodable frame arrives
+    cap = None
+    if not cached or cached["path"] != path:
+        print(f"Using URL: {url}")
+        print(f"Waiting for first frame (up to {timeout} seconds)...")
+        cap, connect_seconds, first_frame_seconds = _try_url(url, timeout)
+    
+    if cap is not None:
+        print(f"Successfully connected to VStar C24S camera at {ip}:{port}")
+        record_connection_metrics(ip, port, url, connect_seconds, first_frame_seconds, stream_name=stream_name)
+        if use_cache:
+            update_camera_cache(ip, port, path, path, connect_seconds, first_frame_seconds, stream_name=stream_name)
+        return LatestFrameCapture(cap) if threaded else cap
+    
+    print(f"Error: Could not connect to IP camera at {ip}:{port}")
+    
+    # Try alternative URL formats and explicit TCP transport concurrently
+    # (the alternative paths are main-stream guesses, so secondary streams only retry over TCP)
+    candidate_paths = [alt_path for alt_path in ALT_RTSP_PATHS if alt_path != path and not stream_name]
+    candidate_paths.append(f"{path}?tcp")
+    if cached and cached["path"] != path and cached["path"] not in candidate_paths:
+        # The cached path already failed above; the requested path is worth another look
+        candidate_paths.insert(0, path)
+    
+    alt_url, alt_cap, timings = probe_rtsp_urls([f"{base_url}{p}" for p in candidate_paths], timeout=timeout)
+    print_probe_timings(timings)
+    
+    if alt_cap is None:
+        print("All alternative URLs failed.")
+        return None
+    
+    print(f"Successfully connected using alternative URL: {alt_url}")
+    winning_timing = _winning_timing(timings)
+    record_connection_metrics(ip, port, alt_url, winning_timing["connect_seconds"], winning_timing["seconds"], stream_name=stream_name)
+    
+    if use_cache:
+        # Remember the winner and every other path that delivered a frame
+        working_timings = {
+            t["url"][len(base_url):]: t["seconds"] for t in timings
+            if t["status"] in ("connected", "released")
+        }
+        update_camera_cache(ip, port, path, alt_url[len(base_url):], winning_timing["connect_seconds"],
+                            winning_timing["seconds"], probe_timings=working_timings, stream_name=stream_name)
+    
+    return LatestFrameCapture(alt_cap) if threaded else alt_cap
+
 def display_camera_feed(cap, window_name="Camera Feed", auto_reconnect=True, ip="192.168.1.40", port="10554", user="admin", password="12345678", path="/tcp/av0_0"):
     """
     Display the camera feed in a window.
@@ -388,22 +1623,34 @@ def test_alternative_paths():
     
     print("Testing multiple RTSP URL formats for VStar C24S camera...")
     
+    # The paths are alternatives to the default one, so the winner is cached for it
+    cached = get_cached_connection(ip, port, paths[0])
+    if cached:
+        print(f"Cached working path for {ip}:{port}: {cached['path']} "
+              f"(first frame after {cached['first_frame_seconds']:.2f}s)")
+    
+    # First-frame time of every path that worked, to update the cache afterwards
+    working_paths = {}
+    connect_times = {}
+    
     for path in paths:
         url = f"rtsp://{user}:{password}@{ip}:{port}{path}"
         print(f"\nTrying URL: {url}")
         
-        cap = cv2.VideoCapture(url, cv2.CAP_FFMPEG)
-        cap.set(cv2.CAP_PROP_BUFFERSIZE, 10)
-        
-        time.sleep(3)
+        start_time = time.time()
+        cap = open_capture(url, timeout=10)
+        connect_seconds = time.time() - start_time
         
         if cap.isOpened():
-            print(f"SUCCESS: Connected with path: {path}")
+            print(f"SUCCESS: Connected with path: {path} ({connect_seconds:.2f}s)")
             
-            # Try to read a frame
-            ret, frame = cap.read()
-            if ret and frame is not None and frame.size > 0:
-                print("SUCCESS: Captured a frame with this URL!")
+            # Wait for the first frame instead of a fixed delay
+            ret, frame, _ = wait_for_first_frame(cap, timeout=10)
+            if ret:
+                first_frame_seconds = time.time() - start_time
+                print(f"SUCCESS: Captured a frame with this URL! (first frame after {first_frame_seconds:.2f}s)")
+                working_paths[path] = first_frame_seconds
+                connect_times[path] = connect_seconds
                 
                 # Create output directory if it doesn't exist
                 output_dir = "test_captures"
@@ -429,6 +1676,13 @@ def test_alternative_paths():
         
         cap.release()
     
+    # Remember the fastest working path so the next connect uses it directly
+    if working_paths:
+        fastest_path = min(working_paths, key=working_paths.get)
+        update_camera_cache(ip, port, paths[0], fastest_path, connect_times[fastest_path],
+                            working_paths[fastest_path], probe_timings=working_paths)
+        print(f"\nCached fastest working path for {ip}:{port}: {fastest_path}")
+    
     print("\nPath testing completed. If any paths worked, they should open in VLC if requested.")
 
 def main():
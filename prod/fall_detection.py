@@ -1,4 +1,4 @@
-from camera_connect import connect_to_ip_camera
+from camera_connect import connect_to_ip_camera, ReconnectSupervisor, IdleController
 import cv2
 import numpy as np
 import time
@@ -117,17 +117,21 @@ def send_alert_to_server(sensitivity):
     except requests.exceptions.RequestException as e:
         print(f"Error sending alert to server: {e}")
 
-def run_fall_detection(display=True, sensitivity='medium'):
+def run_fall_detection(display=True, sensitivity='medium', idle_after=0):
     global display_camera
     display_camera = display
     
-    cap = connect_to_ip_camera(
-        ip=camera_ip,
-        port=camera_port,
-        user=camera_user,
-        password=camera_pass,
-        path=camera_path
-    )
+    def open_camera():
+        return connect_to_ip_camera(
+            ip=camera_ip,
+            port=camera_port,
+            user=camera_user,
+            password=camera_pass,
+            path=camera_path,
+            threaded=True
+        )
+    
+    cap = open_camera()
 
     if cap is None or not cap.isOpened():
         print("Failed to connect to camera.")
@@ -143,14 +147,20 @@ def run_fall_detection(display=True, sensitivity='medium'):
         detectShadows=False
     )
     
+    # Reconnect with backoff when the stream drops or freezes
+    stream = ReconnectSupervisor(open_camera, cap=cap)
+    
+    # Drop to low-rate decoding when nothing has moved for idle_after seconds
+    idle_controller = IdleController(idle_after) if idle_after else None
+    
     prev_frame = None
     last_fall_time = 0
     MIN_TIME_BETWEEN_ALERTS = 3  # Minimum seconds between fall alerts
     
     while True:
-        ret, frame = cap.read()
+        ret, frame = stream.read()
         if not ret:
-            print("Failed to grab frame.")
+            print("Camera stream lost and reconnection gave up.")
             break
             
         # Resize frame for faster processing
@@ -161,6 +171,8 @@ def run_fall_detection(display=True, sensitivity='medium'):
         
         # Detect falls with sensitivity
         is_fall, annotated_frame = detect_fall(frame, prev_frame, background_subtractor, sensitivity)
+        if idle_controller is not None:
+            idle_controller.update(stream, frame, is_fall)
         
         # Alert if fall detected (with cooldown)
         if is_fall:
@@ -185,7 +197,10 @@ def run_fall_detection(display=True, sensitivity='medium'):
             if cv2.waitKey(1) & 0xFF == ord('q'):
                 break
             
-    cap.release()
+    stream.release()
+    print(f"Stream metrics: {stream.get_metrics()}")
+    if idle_controller is not None:
+        print(f"Idle metrics: {idle_controller.get_metrics()}")
     if display_camera:
         cv2.destroyAllWindows()
 
@@ -196,7 +211,9 @@ if __name__ == "__main__":
                       help='Run without displaying the camera feed')
     parser.add_argument('--sensitivity', choices=['low', 'medium', 'high'],
                       default='medium', help='Detection sensitivity level')
+    parser.add_argument('--idle-after', type=float, default=0,
+                      help='Seconds without motion before decoding drops to a low rate (default 0: disabled)')
     args = parser.parse_args()
     
     # Run fall detection with display and sensitivity parameters
-    run_fall_detection(not args.no_display, args.sensitivity)
\ No newline at end of file
+    run_fall_detection(not args.no_display, args.sensitivity, args.idle_after)
\ No newline at end of file
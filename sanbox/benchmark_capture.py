@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Compare CPU cost per frame of the two capture backends on a local video file.
+
+The OpenCV path decodes with cv2.VideoCapture and then does what detect_pose does
+(cv2.resize to the processing height + BGR to RGB). The FFmpeg path lets an ffmpeg
+subprocess decode, scale and convert straight to RGB24 (FFmpegPipeCapture).
+
+Usage:
+    python benchmark_capture.py [video.mp4] [--height 480] [--max-frames 500]
+"""
+import cv2
+import time
+import os
+import glob
+import argparse
+from camera_connect import FFmpegPipeCapture
+
+try:
+    import resource
+except ImportError:  # Windows: ffmpeg's own CPU time cannot be measured
+    resource = None
+
+def children_cpu_time():
+    """CPU seconds used by terminated child processes (ffmpeg), or 0 if unavailable"""
+    if resource is None:
+        return 0.0
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+def benchmark_opencv(source, height, max_frames):
+    """Decode with cv2.VideoCapture, then resize and convert like detect_pose"""
+    cap = cv2.VideoCapture(source)
+    if not cap.isOpened():
+        print(f"OpenCV could not open {source}")
+        return None
+
+    frames = 0
+    wall_start = time.time()
+    cpu_start = time.process_time()
+
+    while frames < max_frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        h, w = frame.shape[:2]
+        small_frame = cv2.resize(frame, (int(w * height / h), height))
+        cv2.cvtColor(small_frame, cv2.COLOR_BGR2RGB)
+        frames += 1
+
+    cpu_seconds = time.process_time() - cpu_start
+    wall_seconds = time.time() - wall_start
+    cap.release()
+    return {"frames": frames, "cpu_seconds": cpu_seconds, "wall_seconds": wall_seconds}
+
+def benchmark_ffmpeg(source, height, max_frames):
+    """Decode, scale and convert in an ffmpeg subprocess"""
+    children_start = children_cpu_time()
+    cpu_start = time.process_time()
+    wall_start = time.time()
+
+    try:
+        cap = FFmpegPipeCapture(source, height=height)
+    except OSError as e:
+        print(f"Could not start ffmpeg: {e}")
+        return None
+
+    frames = 0
+    while frames < max_frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames += 1
+
+    wall_seconds = time.time() - wall_start
+    decoded_frames = cap.get_stats()["frame_seq"]
+
+    # ffmpeg's CPU time is only reported once the process has exited
+    cap.release()
+    cpu_seconds = time.process_time() - cpu_start
+    ffmpeg_cpu_seconds = children_cpu_time() - children_start
+
+    return {
+        "frames": decoded_frames,
+        "delivered_frames": frames,
+        "cpu_seconds": cpu_seconds + ffmpeg_cpu_seconds,
+        "python_cpu_seconds": cpu_seconds,
+        "wall_seconds": wall_seconds
+    }
+
+def print_result(name, result):
+    if result is None or result["frames"] == 0:
+        print(f"{name:>8}: no frames decoded")
+        return
+
+    cpu_ms = result["cpu_seconds"] * 1000 / result["frames"]
+    fps = result["frames"] / result["wall_seconds"] if result["wall_seconds"] > 0 else 0
+    print(f"{name:>8}: {result['frames']:5d} frames, {cpu_ms:6.2f} ms CPU/frame, {fps:7.1f} fps")
+
+    if "python_cpu_seconds" in result:
+        python_ms = result["python_cpu_seconds"] * 1000 / result["frames"]
+        print(f"{'':>8}  ({python_ms:.2f} ms/frame in Python, "
+              f"{result['frames'] - result['delivered_frames']} frames decoded but not read)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Capture backend CPU benchmark")
+    parser.add_argument("source", nargs="?", help="Local video file (default: first clip in fall_events/)")
+    parser.add_argument("--height", type=int, default=480, help="Processing height")
+    parser.add_argument("--max-frames", type=int, default=500, help="Maximum frames per backend")
+    args = parser.parse_args()
+
+    source = args.source
+    if source is None:
+        clips = sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), "fall_events", "*.mp4")))
+        if not clips:
+            print("No source given and no clips found in fall_events/")
+            return
+        source = clips[0]
+
+    print(f"Source: {source}")
+    print(f"Processing height: {args.height}")
+    if resource is None:
+        print("Warning: ffmpeg CPU time is not measurable on this platform, only Python time is counted")
+
+    print_result("opencv", benchmark_opencv(source, args.height, args.max_frames))
+    print_result("ffmpeg", benchmark_ffmpeg(source, args.height, args.max_frames))
+
+if __name__ == "__main__":
+    main()
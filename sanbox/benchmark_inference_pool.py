@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Measure how InferencePool throughput scales with the number of worker processes.
+
+Frames of a local clip are resized to the processing height, converted to RGB
+once, and then submitted by --cameras simulated cameras (one thread each, with
+--in-flight frames outstanding per camera) to pools of 1, 2, 4, ... workers.
+
+Usage:
+    python benchmark_inference_pool.py [video.mp4] [--mode fall] [--cameras 4] [--frames 200]
+"""
+import os
+import time
+import glob
+import argparse
+import threading
+import multiprocessing
+import cv2
+from replay_source import ReplaySource
+from inference_pool import InferencePool
+
+def load_frames(source, height, limit):
+    """Decode up to limit frames as RGB at the processing height"""
+    replay = ReplaySource(source)
+    frames = []
+    while len(frames) < limit:
+        ret, frame = replay.read()
+        if not ret:
+            break
+        h, w = frame.shape[:2]
+        small_frame = cv2.resize(frame, (int(w * height / h), height))
+        frames.append(cv2.cvtColor(small_frame, cv2.COLOR_BGR2RGB))
+    replay.release()
+    return frames
+
+def run_camera(pool, camera_id, mode, frames, count, in_flight):
+    """Submit count frames, keeping in_flight outstanding, and collect results in order"""
+    for frame_id in range(count):
+        pool.submit(camera_id, frame_id, mode, frames[frame_id % len(frames)])
+        if pool.in_flight(camera_id) >= in_flight:
+            pool.get_result(camera_id, mode)
+    while pool.in_flight(camera_id):
+        pool.get_result(camera_id, mode)
+
+def benchmark(frames, mode, workers, cameras, count, in_flight):
+    pool = InferencePool((mode,), workers=workers)
+
+    # Warm up every worker before timing
+    run_camera(pool, "warmup", mode, frames, workers * 2, workers * 2)
+
+    threads = [
+        threading.Thread(target=run_camera, args=(pool, f"camera-{i}", mode, frames, count, in_flight))
+        for i in range(cameras)
+    ]
+    start = time.time()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.time() - start
+
+    stats = pool.get_stats()
+    pool.close()
+    return cameras * count / elapsed, stats
+
+def main():
+    parser = argparse.ArgumentParser(description="Inference worker pool scaling benchmark")
+    parser.add_argument("source", nargs="?", help="Local video file (default: first clip in fall_events/)")
+    parser.add_argument("--mode", choices=["fall", "hand", "face"], default="fall")
+    parser.add_argument("--cameras", type=int, default=4, help="Simulated cameras submitting frames")
+    parser.add_argument("--frames", type=int, default=200, help="Frames per camera")
+    parser.add_argument("--in-flight", type=int, default=2, help="Outstanding frames per camera")
+    parser.add_argument("--height", type=int, default=480, help="Processing height")
+    parser.add_argument("--max-workers", type=int, default=multiprocessing.cpu_count(), help="Largest pool to try")
+    args = parser.parse_args()
+
+    source = args.source
+    if source is None:
+        clips = sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), "fall_events", "*.mp4")))
+        if not clips:
+            print("No source given and no clips found in fall_events/")
+            return
+        source = clips[0]
+
+    frames = load_frames(source, args.height, args.frames)
+    if not frames:
+        print(f"Could not read frames from {source}")
+        return
+
+    print(f"Source: {source} ({len(frames)} frames at {frames[0].shape[1]}x{frames[0].shape[0]})")
+    print(f"Mode: {args.mode}, {args.cameras} cameras x {args.frames} frames, {args.in_flight} in flight per camera")
+
+    baseline = None
+    workers = 1
+    while workers <= args.max_workers:
+        fps, stats = benchmark(frames, args.mode, workers, args.cameras, args.frames, args.in_flight)
+        baseline = baseline or fps
+        print(f"{workers:3d} worker(s): {fps:7.1f} fps  ({fps / baseline:4.2f}x, "
+              f"{stats['avg_inference_ms']:.1f} ms/inference, per worker {stats['per_worker']})")
+        workers *= 2
+
+if __name__ == "__main__":
+    main()
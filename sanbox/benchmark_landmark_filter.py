@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Compare the vectorized LandmarkFilter with the per-coordinate filter it replaced.
+
+The old filter ran one OneEuroFilter object per landmark coordinate (33 x 4 =
+132 per person), read every coordinate from the protobuf separately and built
+a new class per landmark for its output. Both filters are fed the same
+synthetic pose stream: 33 landmarks drifting on a random walk, with a fall
+half way through, at 30 fps with timing jitter. The stream is made of
+mediapipe NormalizedLandmarkList protobufs when mediapipe is installed, and
+of plain objects with the same attributes otherwise.
+
+Reported: time per pose for both filters, the speedup, and the largest
+difference between their outputs over the whole stream (expected: 0).
+
+Usage:
+    python benchmark_landmark_filter.py [--frames 3000] [--people 1]
+"""
+import time
+import types
+import argparse
+import numpy as np
+from landmark_filter import LandmarkFilter, X, Y, Z, VISIBILITY
+
+# Settings of PoseDetector.create_landmark_filter()
+FILTER_SETTINGS = dict(frequency=30.0, min_cutoff=0.1, beta=0.1, dcutoff=1.0)
+
+class OneEuroFilter:
+    """The scalar One Euro filter, as used before (one per coordinate)"""
+    def __init__(self, freq, mincutoff=1.0, beta=0.0, dcutoff=1.0):
+        self.freq = freq
+        self.mincutoff = mincutoff
+        self.beta = beta
+        self.dcutoff = dcutoff
+        self.x_prev = None
+        self.dx_prev = None
+        self.t_prev = None
+
+    def filter(self, x, t=None):
+        if t is None:
+            t = time.time()
+
+        if self.x_prev is None:
+            self.x_prev = x
+            self.t_prev = t
+            return x
+
+        dt = t - self.t_prev
+        if dt == 0:
+            return self.x_prev
+
+        alpha = self._calculate_alpha(dt, self.mincutoff)
+        dx = (x - self.x_prev) / dt
+        if self.dx_prev is None:
+            self.dx_prev = dx
+        else:
+            dx_alpha = self._calculate_alpha(dt, self.dcutoff)
+            dx = dx_alpha * dx + (1 - dx_alpha) * self.dx_prev
+
+        cutoff = self.mincutoff + self.beta * abs(dx)
+        alpha = self._calculate_alpha(dt, cutoff)
+        filtered_x = alpha * x + (1 - alpha) * self.x_prev
+
+        self.x_prev = filtered_x
+        self.dx_prev = dx
+        self.t_prev = t
+        return filtered_x
+
+    def _calculate_alpha(self, dt, cutoff):
+        tau = 1.0 / (2 * np.pi * cutoff)
+        te = dt / tau
+        alpha = 1.0 / (1.0 + te)
+        return alpha
+
+class ScalarLandmarkFilter:
+    """The dict of OneEuroFilter objects LandmarkFilter replaced"""
+    def __init__(self, frequency=30.0, min_cutoff=1.0, beta=0.0, dcutoff=1.0):
+        self.frequency = frequency
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.dcutoff = dcutoff
+        self.filters = {}
+
+    def process(self, landmarks, timestamp=None):
+        smoothed_landmarks = []
+        for i, landmark in enumerate(landmarks):
+            if i not in self.filters:
+                self.filters[i] = {
+                    'x': OneEuroFilter(self.frequency, self.min_cutoff, self.beta, self.dcutoff),
+                    'y': OneEuroFilter(self.frequency, self.min_cutoff, self.beta, self.dcutoff),
+                    'z': OneEuroFilter(self.frequency, self.min_cutoff, self.beta, self.dcutoff),
+                    'visibility': OneEuroFilter(self.frequency, self.min_cutoff, self.beta, self.dcutoff)
+                }
+            x = self.filters[i]['x'].filter(landmark.x, timestamp)
+            y = self.filters[i]['y'].filter(landmark.y, timestamp)
+            z = self.filters[i]['z'].filter(landmark.z, timestamp)
+            visibility = self.filters[i]['visibility'].filter(landmark.visibility, timestamp)
+            smoothed_landmarks.append(type('obj', (object,), {
+                'x': x,
+                'y': y,
+                'z': z,
+                'visibility': visibility
+            }))
+        return smoothed_landmarks
+
+def make_landmark_list(values):
+    """A NormalizedLandmarkList (or a stand-in without mediapipe) from an (n, 4) array"""
+    try:
+        from mediapipe.framework.formats import landmark_pb2
+    except ImportError:
+        landmark = [types.SimpleNamespace(x=x, y=y, z=z, visibility=visibility) for x, y, z, visibility in values]
+        return types.SimpleNamespace(landmark=landmark)
+
+    landmark_list = landmark_pb2.NormalizedLandmarkList()
+    for x, y, z, visibility in values:
+        landmark_list.landmark.add(x=x, y=y, z=z, visibility=visibility)
+    return landmark_list
+
+def pose_stream(frames, seed):
+    """Timestamps and poses: a random walk around a standing pose that falls half way through"""
+    rng = np.random.default_rng(seed)
+    pose = np.column_stack([
+        rng.uniform(0.4, 0.6, 33), np.linspace(0.2, 0.8, 33),
+        rng.uniform(-0.3, 0.0, 33), rng.uniform(0.5, 1.0, 33)
+    ])
+    t = 0.0
+    stream = []
+    for i in range(frames):
+        t += 1 / 30 + rng.uniform(-0.005, 0.005)
+        pose = pose + rng.normal(0, 0.003, pose.shape)
+        if frames // 2 <= i < frames // 2 + 15:
+            pose[:, Y] += 0.02  # Falling
+        stream.append((t, make_landmark_list(pose)))
+    return stream
+
+def run(filter_class, streams):
+    """Filter every person's stream; returns seconds spent and the outputs as arrays"""
+    filters = [filter_class(**FILTER_SETTINGS) for _ in streams]
+    outputs = []
+    elapsed = 0.0
+    for frame in zip(*streams):
+        start = time.perf_counter()
+        results = [landmark_filter.process(pose.landmark, t) for landmark_filter, (t, pose) in zip(filters, frame)]
+        elapsed += time.perf_counter() - start
+        outputs.append(results)
+    return elapsed, outputs
+
+def as_array(result):
+    if isinstance(result, np.ndarray):
+        return result
+    return np.array([(landmark.x, landmark.y, landmark.z, landmark.visibility) for landmark in result])
+
+def main():
+    parser = argparse.ArgumentParser(description="Vectorized vs per-coordinate landmark filter benchmark")
+    parser.add_argument("--frames", type=int, default=3000, help="Poses per person")
+    parser.add_argument("--people", type=int, default=1, help="People filtered per frame (one filter each)")
+    args = parser.parse_args()
+
+    streams = [pose_stream(args.frames, seed) for seed in range(args.people)]
+    poses = args.frames * args.people
+
+    old_seconds, old_outputs = run(ScalarLandmarkFilter, streams)
+    new_seconds, new_outputs = run(LandmarkFilter, streams)
+
+    difference = max(
+        float(np.max(np.abs(as_array(old)[:, [X, Y, Z, VISIBILITY]] - new)))
+        for old_frame, new_frame in zip(old_outputs, new_outputs)
+        for old, new in zip(old_frame, new_frame)
+    )
+
+    print(f"{poses} poses ({args.people} people x {args.frames} frames)")
+    print(f"    per coordinate: {old_seconds * 1e6 / poses:8.1f} us/pose")
+    print(f"    vectorized:     {new_seconds * 1e6 / poses:8.1f} us/pose")
+    print(f"    speedup {old_seconds / new_seconds:.1f}x, largest output difference {difference:g}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Compare the legacy Pose solution with the Tasks PoseLandmarker (LIVE_STREAM) backend.
+
+Frames of a local clip are resized to the processing height and converted to
+RGB once, then replayed as a live camera: frame i becomes available at i / fps
+seconds. Each backend is driven the way PoseDetector drives it:
+
+    legacy   process() blocks, so the loop takes the newest frame whenever the
+             previous inference is done; frames arriving meanwhile are missed
+    tasks    every frame is submitted as it arrives; the landmarker drops what
+             it cannot keep up with and delivers results through its callback
+
+Reported per backend: results per second (throughput), the share of frames
+that got a result, and end-to-end latency from a frame's arrival to its result
+(average and 95th percentile). With --fps 0 frames are offered back to back
+instead (to the tasks backend once the previous result is in), which measures
+raw throughput.
+
+Usage:
+    python benchmark_pose_backend.py [video.mp4] [--fps 30] [--complexity 1] [--model-dir models]
+"""
+import os
+import time
+import glob
+import argparse
+import cv2
+import numpy as np
+from replay_source import ReplaySource
+from pose_landmarker import PoseLandmarkerModel, bundle_path
+
+def load_frames(source, height, limit):
+    """Decode up to limit frames as read-only RGB at the processing height"""
+    replay = ReplaySource(source)
+    frames = []
+    while len(frames) < limit:
+        ret, frame = replay.read()
+        if not ret:
+            break
+        h, w = frame.shape[:2]
+        small_frame = cv2.resize(frame, (int(w * height / h), height))
+        rgb_frame = cv2.cvtColor(small_frame, cv2.COLOR_BGR2RGB)
+        rgb_frame.flags.writeable = False  # Like the detectors, so the legacy graph does not copy it
+        frames.append(rgb_frame)
+    replay.release()
+    return frames
+
+class LiveFeed:
+    """Frame i of the clip is available from start + i / fps (every frame at once with fps 0)"""
+    def __init__(self, count, fps):
+        self.count = count
+        self.fps = fps
+        self.start = time.perf_counter()
+
+    def arrival(self, index):
+        return self.start + index / self.fps if self.fps else self.start
+
+    def newest(self, after):
+        """Index of the newest frame after index after, waiting for it to arrive; None at the end"""
+        if not self.fps:
+            return after + 1 if after + 1 < self.count else None
+        if after + 1 >= self.count:
+            return None
+        delay = self.arrival(after + 1) - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        return min(self.count - 1, int((time.perf_counter() - self.start) * self.fps))
+
+def run_legacy(frames, fps, complexity):
+    import mediapipe as mp
+
+    pose = mp.solutions.pose.Pose(static_image_mode=False, model_complexity=complexity,
+                                  enable_segmentation=False, min_detection_confidence=0.7,
+                                  min_tracking_confidence=0.5)
+    pose.process(frames[0])  # Load the graph before timing
+
+    feed = LiveFeed(len(frames), fps)
+    latencies = []
+    index = -1
+    while True:
+        index = feed.newest(index)
+        if index is None:
+            break
+        pose.process(frames[index])
+        latencies.append(time.perf_counter() - feed.arrival(index))
+    elapsed = time.perf_counter() - feed.start
+    pose.close()
+    return len(latencies), elapsed, latencies
+
+def run_tasks(frames, fps, complexity, model_dir):
+    model = PoseLandmarkerModel(bundle_path(model_dir, complexity))
+    model.process(frames[0])  # Load the graph before timing
+    time.sleep(1.0)
+
+    feed = LiveFeed(len(frames), fps)
+    latencies = []
+    last = model.latest
+    completed_before = model.get_metrics()["completed"]
+    index = -1
+    while True:
+        index = feed.newest(index)
+        if index is None:
+            break
+        if not fps:
+            # Back to back: offer the next frame once the previous result is in, not all at once
+            while model.submit_times:
+                time.sleep(0.0005)
+        results = model.process(frames[index])
+        if results is not last and results.latency is not None:
+            latencies.append(results.latency)
+            last = results
+
+    # Collect the results still in flight
+    deadline = time.perf_counter() + 2.0
+    while time.perf_counter() < deadline and model.submit_times:
+        time.sleep(0.005)
+    elapsed = time.perf_counter() - feed.start
+    if model.latest is not last and model.latest.latency is not None:
+        latencies.append(model.latest.latency)
+
+    metrics = model.get_metrics()
+    model.close()
+    return metrics["completed"] - completed_before, elapsed, latencies
+
+def report(name, results, elapsed, latencies, frames):
+    latencies = np.array(latencies) * 1000 if latencies else np.zeros(1)
+    print(f"{name:>7}: {results / elapsed:6.1f} results/s, {results}/{frames} frames "
+          f"({results * 100 / frames:5.1f}%), latency avg {latencies.mean():6.1f} ms, "
+          f"p95 {np.percentile(latencies, 95):6.1f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description="Legacy Pose vs Tasks PoseLandmarker benchmark")
+    parser.add_argument("source", nargs="?", help="Local video file (default: first clip in fall_events/)")
+    parser.add_argument("--fps", type=float, default=30.0, help="Simulated camera frame rate (0: back to back)")
+    parser.add_argument("--complexity", type=int, choices=[0, 1, 2], default=1,
+                        help="Legacy model complexity; the tasks backend uses the matching lite/full/heavy bundle")
+    parser.add_argument("--model-dir", default="models", help="Directory with the pose_landmarker_*.task bundles")
+    parser.add_argument("--height", type=int, default=480, help="Processing height")
+    parser.add_argument("--frames", type=int, default=300, help="Frames to load")
+    args = parser.parse_args()
+
+    source = args.source
+    if source is None:
+        clips = sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), "fall_events", "*.mp4")))
+        if not clips:
+            print("No source given and no clips found in fall_events/")
+            return
+        source = clips[0]
+
+    frames = load_frames(source, args.height, args.frames)
+    if not frames:
+        print(f"Could not read frames from {source}")
+        return
+
+    print(f"Source: {source} ({len(frames)} frames at {frames[0].shape[1]}x{frames[0].shape[0]}), "
+          f"{'%.0f fps live' % args.fps if args.fps else 'back to back'}, complexity {args.complexity}")
+
+    report("legacy", *run_legacy(frames, args.fps, args.complexity), len(frames))
+    report("tasks", *run_tasks(frames, args.fps, args.complexity, args.model_dir), len(frames))
+
+if __name__ == "__main__":
+    main()
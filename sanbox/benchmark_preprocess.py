@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Measure what dropping the preprocessing round trip saves per processed frame.
+
+The old path of detect_pose / detect_hands / detect_faces was resize -> BGR2RGB
+-> inference -> RGB2BGR -> resize back (only when displaying), with overlays
+drawn on the converted copy. The new path resizes and converts into reused
+RGBInput buffers and draws on the original frame. All three detection modes
+share this preprocessing, so the numbers apply to each of them; inference
+itself is not part of the measurement.
+
+Paths compared:
+    display   old: resize, cvtColor, cvtColor back, resize back to full size
+    headless  old: resize, cvtColor, cvtColor back (overlays on the small frame)
+    roi       old: crop, resize to 256 lines, cvtColor (--roi-crop before the change)
+
+Allocations are counted with tracemalloc: new blocks of at least 64 KiB made
+while processing one frame.
+
+Usage:
+    python benchmark_preprocess.py [video.mp4] [--height 480] [--frames 100]
+"""
+import os
+import time
+import glob
+import argparse
+import tracemalloc
+import cv2
+from replay_source import ReplaySource
+from rgb_input import RGBInput
+
+ROI = (0.35, 0.15, 0.65, 0.95)  # A standing person in the middle of the view
+ROI_HEIGHT = 256
+MIN_BLOCK_BYTES = 64 * 1024  # Smaller blocks are not frame buffers
+
+def crop(frame):
+    h, w = frame.shape[:2]
+    return frame[int(ROI[1] * h):int(ROI[3] * h), int(ROI[0] * w):int(ROI[2] * w)]
+
+def old_display(frame, height, rgb_input):
+    h, w = frame.shape[:2]
+    small_frame = cv2.resize(frame, (int(w * height / h), height))
+    rgb_frame = cv2.cvtColor(small_frame, cv2.COLOR_BGR2RGB)
+    processed_frame = cv2.cvtColor(rgb_frame, cv2.COLOR_RGB2BGR)
+    display_frame = cv2.resize(processed_frame, (w, h))
+    return small_frame, rgb_frame, processed_frame, display_frame
+
+def old_headless(frame, height, rgb_input):
+    h, w = frame.shape[:2]
+    small_frame = cv2.resize(frame, (int(w * height / h), height))
+    rgb_frame = cv2.cvtColor(small_frame, cv2.COLOR_BGR2RGB)
+    processed_frame = cv2.cvtColor(rgb_frame, cv2.COLOR_RGB2BGR)
+    return small_frame, rgb_frame, processed_frame
+
+def old_roi(frame, height, rgb_input):
+    region = crop(frame)
+    scale = ROI_HEIGHT / region.shape[0]
+    small_crop = cv2.resize(region, (int(region.shape[1] * scale), ROI_HEIGHT), interpolation=cv2.INTER_AREA)
+    rgb_frame = cv2.cvtColor(small_crop, cv2.COLOR_BGR2RGB)
+    return small_crop, rgb_frame, frame
+
+def new_full(frame, height, rgb_input):
+    return rgb_input.prepare(frame, height), frame
+
+def new_roi(frame, height, rgb_input):
+    region = crop(frame)
+    return rgb_input.prepare(region, min(region.shape[0], ROI_HEIGHT), interpolation=cv2.INTER_AREA), frame
+
+PATHS = {
+    "display": (old_display, new_full),
+    "headless": (old_headless, new_full),
+    "roi": (old_roi, new_roi)
+}
+
+def load_frames(source, limit):
+    replay = ReplaySource(source)
+    frames = []
+    while len(frames) < limit:
+        ret, frame = replay.read()
+        if not ret:
+            break
+        frames.append(frame)
+    replay.release()
+    return frames
+
+def count_allocations(path, frame, height):
+    """Large blocks allocated while processing one frame (results are kept alive until counted)"""
+    rgb_input = RGBInput()
+    path(frame, height, rgb_input)  # Warm up: reused buffers are allocated once, not per frame
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    outputs = path(frame, height, rgb_input)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    large = lambda snapshot: sum(1 for trace in snapshot.traces if trace.size >= MIN_BLOCK_BYTES)
+    del outputs
+    return large(after) - large(before)
+
+def time_path(path, frames, height, repeat):
+    rgb_input = RGBInput()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for frame in frames:
+            path(frame, height, rgb_input)
+    return (time.perf_counter() - start) * 1000 / (repeat * len(frames))
+
+def main():
+    parser = argparse.ArgumentParser(description="Preprocessing round-trip benchmark")
+    parser.add_argument("source", nargs="?", help="Local video file (default: first clip in fall_events/)")
+    parser.add_argument("--height", type=int, default=480, help="Processing height")
+    parser.add_argument("--frames", type=int, default=100, help="Frames to load")
+    parser.add_argument("--repeat", type=int, default=3, help="Passes over the frames per path")
+    args = parser.parse_args()
+
+    source = args.source
+    if source is None:
+        clips = sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), "fall_events", "*.mp4")))
+        if not clips:
+            print("No source given and no clips found in fall_events/")
+            return
+        source = clips[0]
+
+    frames = load_frames(source, args.frames)
+    if not frames:
+        print(f"Could not read frames from {source}")
+        return
+
+    h, w = frames[0].shape[:2]
+    print(f"Source: {source} ({len(frames)} frames at {w}x{h}), processing height {args.height}")
+
+    for name, (old, new) in PATHS.items():
+        old_allocations = count_allocations(old, frames[0], args.height)
+        new_allocations = count_allocations(new, frames[0], args.height)
+        old_ms = time_path(old, frames, args.height, args.repeat)
+        new_ms = time_path(new, frames, args.height, args.repeat)
+        print(f"{name:>9}: old {old_ms:6.2f} ms, {old_allocations} allocations | "
+              f"new {new_ms:6.2f} ms, {new_allocations} allocations | "
+              f"saved {old_ms - new_ms:5.2f} ms/frame ({(1 - new_ms / old_ms) * 100:4.1f}%)")
+
+if __name__ == "__main__":
+    main()
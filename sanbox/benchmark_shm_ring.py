@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Compare the single-process capture path with a capture process feeding a
+shared-memory ring (ProcessCapture).
+
+Both paths replay a local clip in a loop as fast as it decodes and hand the
+newest frame to a consumer that simulates inference by holding the GIL for
+--work-ms per frame (like MediaPipe's Python-side pre/post-processing). In the
+single-process path the decode thread competes with that work for the GIL; with
+the ring, decoding runs in its own process.
+
+Reported per path: frames decoded, frames processed (end-to-end fps) and frame
+copies per processed frame.
+
+Usage:
+    python benchmark_shm_ring.py [video.mp4] [--seconds 10] [--work-ms 20]
+"""
+import os
+import time
+import glob
+import argparse
+import functools
+from camera_connect import LatestFrameCapture
+from replay_source import ReplaySource
+from shm_ring import ProcessCapture
+
+def simulated_inference(frame, work_ms):
+    """Hold the GIL for work_ms"""
+    end = time.perf_counter() + work_ms / 1000.0
+    while time.perf_counter() < end:
+        pass
+
+def consume(cap, seconds, work_ms):
+    processed = 0
+    start = time.time()
+    while time.time() - start < seconds:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        simulated_inference(frame, work_ms)
+        processed += 1
+    return processed, time.time() - start
+
+def benchmark_single_process(source, seconds, work_ms):
+    """Decode thread (LatestFrameCapture) and consumer in the same process"""
+    cap = LatestFrameCapture(ReplaySource(source, loop=True))
+    processed, elapsed = consume(cap, seconds, work_ms)
+    decoded = cap.get_stats()["frame_seq"]
+    cap.release()
+
+    # Frames are handed from the decode thread to the consumer by reference
+    return {"decoded": decoded, "processed": processed, "elapsed": elapsed, "copies": 0}
+
+def benchmark_shared_memory(source, seconds, work_ms, slots):
+    """Capture process writing into the ring, consumer reading from it"""
+    cap = ProcessCapture(functools.partial(ReplaySource, source, loop=True), slots=slots, reconnect=False)
+    if not cap.isOpened():
+        print("Capture process failed to start")
+        return None
+
+    processed, elapsed = consume(cap, seconds, work_ms)
+    stats = cap.get_stats()
+    cap.release()
+
+    # One copy into the ring per decoded frame; the reader uses frames in place (reader_copies stays 0)
+    return {
+        "decoded": stats["frame_seq"],
+        "processed": processed,
+        "elapsed": elapsed,
+        "copies": stats["frame_seq"] + stats["reader_copies"]
+    }
+
+def print_result(name, result):
+    if result is None or result["processed"] == 0:
+        print(f"{name:>15}: no frames processed")
+        return
+
+    fps = result["processed"] / result["elapsed"]
+    decode_fps = result["decoded"] / result["elapsed"]
+    copies = result["copies"] / result["processed"]
+    print(f"{name:>15}: {fps:6.1f} fps processed, {decode_fps:6.1f} fps decoded, "
+          f"{copies:.2f} frame copies per processed frame")
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared-memory ring vs single-process capture benchmark")
+    parser.add_argument("source", nargs="?", help="Local video file (default: first clip in fall_events/)")
+    parser.add_argument("--seconds", type=float, default=10, help="Duration of each run")
+    parser.add_argument("--work-ms", type=float, default=20, help="Simulated GIL-holding inference time per frame")
+    parser.add_argument("--slots", type=int, default=4, help="Ring slots")
+    args = parser.parse_args()
+
+    source = args.source
+    if source is None:
+        clips = sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), "fall_events", "*.mp4")))
+        if not clips:
+            print("No source given and no clips found in fall_events/")
+            return
+        source = clips[0]
+
+    print(f"Source: {source}")
+    print(f"Simulated inference: {args.work_ms} ms/frame, {args.seconds}s per run")
+
+    print_result("single-process", benchmark_single_process(source, args.seconds, args.work_ms))
+    print_result("shared-memory", benchmark_shared_memory(source, args.seconds, args.work_ms, args.slots))
+
+if __name__ == "__main__":
+    main()
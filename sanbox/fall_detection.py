@@ -1,11 +1,13 @@
 #!/usr/bin/env python3
 import cv2
-import numpy as np
 import time
 import os
 import datetime
 import argparse
 import threading
+import collections
+import types
+import concurrent.futures
 import subprocess
 import platform
 import requests
@@ -13,19 +15,29 @@ import json
 import ssl
 import urllib.request
 from io import BytesIO
-from camera_connect import connect_to_ip_camera, open_in_vlc
+from camera_connect import open_in_vlc, OnDemandStream, IdleController
+from motion_gate import MotionGate, GATE_SKIP, GATE_FORCE
+from pose_roi import PoseROI, map_landmarks, INPUT_HEIGHT as CROP_INPUT_HEIGHT
+from pose_tracker import PoseTracker
+from fall_features import FallFeatures
+from qos_governor import QoSGovernor
+from rgb_input import RGBInput
+from pose_landmarker import PoseLandmarkerModel, bundle_path
+from landmark_filter import LandmarkFilter, VISIBILITY, landmarks_to_array, array_to_landmark_list
+from pipeline import CameraDetector, DetectionPipeline, FrameContext, run_model, draw_timestamp
 import mediapipe as mp
 
 # Fix SSL certificate verification issue
 ssl._create_default_https_context = ssl._create_unverified_context
 
 # Global variables
-fall_detected = False
-last_fall_time = 0
 MIN_TIME_BETWEEN_ALERTS = 5  # Minimum seconds between fall alerts to prevent duplicates
+EVIDENCE_FRAME_TIMEOUT = 3  # Seconds an alert waits for the main stream before using the substream frame
 DISCORD_WEBHOOK = "https://discord.com/api/webhooks/1371493877063614494/UKIlJtVA8gKU0d4cO8PAu_pf1HpJ3CKagCwTv5rCrm4yM8anNGMxJajh1H2APmMH9b2y"
 
-class HandDetector:
+class HandDetector(CameraDetector):
+    recording_name = "hand event"
+    
     def __init__(self, 
                 camera_ip="192.168.1.40", 
                 camera_port="10554", 
@@ -38,7 +50,17 @@ class HandDetector:
                 record_detections=False,
                 output_dir="hand_events",
                 discord_webhook=DISCORD_WEBHOOK,
-                verify_ssl=False):
+                verify_ssl=False,
+                capture_backend="opencv",
+                camera_substream_path=None,
+                idle_after=None,
+                idle_fps=1.0,
+                replay_source=None,
+                replay_realtime=False,
+                shared_model=None,
+                capture_process=False,
+                resolution=480,
+                connect=True):
         """
         Initialize the hand detector with camera connection parameters and detection settings
         """
@@ -54,6 +76,28 @@ class HandDetector:
         self.output_dir = output_dir
         self.discord_webhook = discord_webhook
         self.verify_ssl = verify_ssl
+        self.capture_backend = capture_backend  # "opencv" or "ffmpeg"
+        self.resolution = resolution  # Processing height in lines
+        self.rgb_input = RGBInput()   # Reused resize/RGB buffers for the model input
+        
+        # Dual-stream mode: run inference on a low-resolution substream and open the
+        # full-resolution main stream only for screenshots, recordings and alert images
+        self.camera_substream_path = camera_substream_path
+        self.evidence = OnDemandStream(self.open_main_stream) if camera_substream_path else None
+        
+        # Idle decoding: after idle_after seconds without detections or motion the
+        # capture decodes keyframes only (or idle_fps frames); None disables it
+        self.idle_controller = IdleController(idle_after, idle_fps) if idle_after and not replay_source else None
+        
+        # Offline replay: a video file, directory or image sequence instead of the camera
+        self.replay_source = replay_source
+        self.replay_realtime = replay_realtime  # Pace frames at their media timestamps
+        
+        # Run capture in its own process, feeding a shared-memory frame ring
+        self.capture_process = capture_process
+        
+        # Row of the detector's own text line (moved down when detectors share a frame)
+        self.label_y = 90
         
         # Create output directory if it doesn't exist
         if not os.path.exists(output_dir):
@@ -64,8 +108,9 @@ class HandDetector:
         self.mp_drawing = mp.solutions.drawing_utils
         self.mp_drawing_styles = mp.solutions.drawing_styles
         
-        # Initialize hand detector
-        self.hands = self.mp_hands.Hands(
+        # Initialize hand detector, unless a model shared between cameras was passed in
+        self.owns_model = shared_model is None
+        self.hands = shared_model if shared_model is not None else self.mp_hands.Hands(
             static_image_mode=False,
             max_num_hands=2,  # Detect up to 2 hands
             min_detection_confidence=min_detection_confidence,
@@ -76,60 +121,28 @@ class HandDetector:
         self.video_writer = None
         self.record_start_time = None
         self.recording = False
+        self.record_size = None
         
-        # Frame processing optimization
-        self.frame_count = 0
-        self.process_every_n_frames = 1  # Process every frame by default
+        # Results of the last inference, redrawn on main-stream evidence frames
+        self.last_results = None
         
-        # Connect to the camera
-        self.connect_camera()
-    
-    def connect_camera(self):
-        """Connect to the camera using the provided parameters"""
-        print(f"Connecting to camera at {self.camera_ip}:{self.camera_port}...")
-        self.cap = connect_to_ip_camera(
-            ip=self.camera_ip,
-            port=self.camera_port,
-            user=self.camera_user,
-            password=self.camera_pass,
-            path=self.camera_path
-        )
+        # Per-detector alert cooldown, so several cameras in one process do not share it
+        self.last_alert_time = None  # Capture time of the last alert
         
-        if self.cap is None or not self.cap.isOpened():
-            print("Failed to connect to camera. Exiting.")
-            return False
-            
-        print("Successfully connected to camera")
-        return True
-    
-    def start_recording(self, frame):
-        """Start recording a video when hands are detected"""
-        if self.recording:
-            return
-            
-        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-        video_filename = os.path.join(self.output_dir, f"hand_event_{timestamp}.mp4")
+        # Cleared by stop() to end run() from another thread
+        self.running = True
         
-        # Get frame dimensions
-        height, width = frame.shape[:2]
+        # Frame processing optimization
+        self.frame_count = 0
+        self.process_every_n_frames = 1  # Process every frame by default
         
-        # Initialize video writer
-        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-        self.video_writer = cv2.VideoWriter(video_filename, fourcc, 10, (width, height))
+        # The detection loop: source -> preprocess -> infer -> postprocess -> annotate -> sinks
+        self.pipeline = self.build_pipeline()
         
-        self.record_start_time = time.time()
-        self.recording = True
-        print(f"Started recording hand event to {video_filename}")
-    
-    def stop_recording(self):
-        """Stop recording the video"""
-        if not self.recording:
-            return
-            
-        self.video_writer.release()
-        self.video_writer = None
-        self.recording = False
-        print("Stopped recording hand event")
+        # Connect to the camera, unless a CombinedDetector owns the capture
+        self.cap = None
+        if connect:
+            self.connect_camera()
     
     def save_screenshot(self, frame):
         """Save a screenshot of the detected hands"""
@@ -202,188 +215,150 @@ class HandDetector:
             import traceback
             traceback.print_exc()
     
-    def detect_hands(self, frame):
+    def preprocess(self, ctx):
         """
-        Process a frame to detect hands using MediaPipe
+        Build the model input for an inferred frame.
         
-        Returns landmarks and annotated frame
+        The combined detector's shared input and RGB frames from the FFmpeg backend
+        are already at the processing resolution; otherwise the frame is resized and
+        converted to RGB (MediaPipe requires RGB) in buffers reused across frames.
         """
-        # Resize frame to improve performance
-        h, w = frame.shape[:2]
-        target_height = 480  # Lower resolution for faster processing
-        scale = target_height / h
-        new_width = int(w * scale)
-        
-        # Use OpenCV resize (faster than numpy operations)
-        small_frame = cv2.resize(frame, (new_width, target_height))
-        
-        # Convert frame to RGB (MediaPipe requires RGB)
-        rgb_frame = cv2.cvtColor(small_frame, cv2.COLOR_BGR2RGB)
-        
-        # Set image data as not writeable to improve performance
-        rgb_frame.flags.writeable = False
+        if ctx.infer:
+            if ctx.shared_input is not None:
+                ctx.model_input = ctx.shared_input
+            else:
+                ctx.model_input = ctx.rgb_frame if ctx.rgb_frame is not None else self.rgb_input.prepare(ctx.frame, self.resolution)
+    
+    def infer(self, ctx):
+        ctx.results = run_model(self.hands, ctx.model_input)
+    
+    def postprocess(self, ctx):
+        """Count the hands of the newest results and decide whether to alert"""
+        if ctx.inferred:
+            self.last_results = ctx.results
+        
+        # Later stages draw from ctx.results: when pipelined, last_results may already be the next frame's
+        results = ctx.results = self.last_results
+        ctx.count = len(results.multi_hand_landmarks) if results is not None and results.multi_hand_landmarks else 0
+        ctx.detected = ctx.count > 0
+        ctx.activity = ctx.detected
+        ctx.alert = ctx.detected and ctx.inferred
+    
+    def annotate(self, ctx):
+        # Landmarks are normalized, so they are drawn straight onto the captured frame
+        if ctx.results is not None:
+            self.draw_hands(ctx.display_frame, ctx.results)
+        draw_timestamp(ctx.display_frame)
+    
+    def draw_hands(self, frame, results):
+        """
+        Draw hand landmarks on a frame and return the number of hands.
         
-        # Process the image and detect hands
-        results = self.hands.process(rgb_frame)
+        Landmarks are normalized, so this works on the captured frame and on a
+        full-resolution main-stream frame alike.
+        """
+        if not results.multi_hand_landmarks:
+            return 0
         
-        # Set image as writeable again
-        rgb_frame.flags.writeable = True
+        num_hands = len(results.multi_hand_landmarks)
         
-        # Convert back to BGR for OpenCV
-        processed_frame = cv2.cvtColor(rgb_frame, cv2.COLOR_RGB2BGR)
+        for hand_landmarks in results.multi_hand_landmarks:
+            self.mp_drawing.draw_landmarks(
+                frame,
+                hand_landmarks,
+                self.mp_hands.HAND_CONNECTIONS,
+                self.mp_drawing_styles.get_default_hand_landmarks_style(),
+                self.mp_drawing_styles.get_default_hand_connections_style()
+            )
+            
+        # Add text showing number of hands detected
+        cv2.putText(frame, f"Hands Detected: {num_hands}", (10, self.label_y), 
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+        return num_hands
+    
+    def evidence_frame(self, frame, results, timeout=0.0):
+        """
+        Return the newest main-stream frame with the detected hands drawn on it.
         
-        # Resize back to original dimensions if needed for display
-        if self.display:
-            processed_frame = cv2.resize(processed_frame, (w, h))
+        Falls back to the given inference frame when not in dual-stream mode or
+        when the main stream has not delivered a frame within timeout seconds.
+        """
+        if self.evidence is None:
+            return frame
         
-        # Draw hand landmarks on the processed frame
-        if results.multi_hand_landmarks:
-            num_hands = len(results.multi_hand_landmarks)
-            
-            for hand_landmarks in results.multi_hand_landmarks:
-                self.mp_drawing.draw_landmarks(
-                    processed_frame,
-                    hand_landmarks,
-                    self.mp_hands.HAND_CONNECTIONS,
-                    self.mp_drawing_styles.get_default_hand_landmarks_style(),
-                    self.mp_drawing_styles.get_default_hand_connections_style()
-                )
-                
-            # Add text showing number of hands detected
-            cv2.putText(processed_frame, f"Hands Detected: {num_hands}", (10, 90), 
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-            
-            return True, processed_frame, num_hands
+        ret, main_frame = self.evidence.latest_frame(timeout)
+        if not ret:
+            return frame
         
-        return False, processed_frame, 0
+        main_frame = main_frame.copy()
+        self.draw_hands(main_frame, results)
+        return main_frame
     
-    def run(self):
-        """Run the hand detection system"""
-        if self.cap is None or not self.cap.isOpened():
-            print("Camera is not connected. Please try connecting to the camera first.")
+    def send_evidence_alert(self, num_hands, frame, results):
+        """Send the Discord alert with a full-resolution image when the main stream is available"""
+        self.send_discord_alert(num_hands, self.evidence_frame(frame, results, EVIDENCE_FRAME_TIMEOUT))
+    
+    def handle_alert(self, ctx):
+        """Alert, screenshot and start recording when hands were detected"""
+        if not ctx.alert:
             return
         
-        print("Starting hand detection. Press 'q' to quit.")
-        
-        try:
-            # For FPS calculation
-            prev_time = time.time()
-            frame_counter = 0
-            fps = 0
-            last_alert_time = 0
-            
-            while True:
-                # Read a frame from the camera
-                ret, frame = self.cap.read()
-                
-                if not ret:
-                    print("Failed to grab frame. Reconnecting...")
-                    self.cap.release()
-                    if not self.connect_camera():
-                        break
-                    continue
-                
-                # Calculate FPS
-                frame_counter += 1
-                if (time.time() - prev_time) > 1:
-                    fps = frame_counter
-                    frame_counter = 0
-                    prev_time = time.time()
-                
-                # Skip frames to improve performance
-                self.frame_count += 1
-                if self.frame_count % self.process_every_n_frames != 0:
-                    continue
-                
-                # Make a copy of the frame for display
-                display_frame = frame.copy()
-                
-                # Add timestamp to the frame
-                timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                cv2.putText(display_frame, timestamp, (10, 30), 
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
-                
-                # Detect hands in the frame
-                hands_detected, display_frame, num_hands = self.detect_hands(display_frame)
-                
-                # If hands are detected, we can optionally send alerts and record
-                if hands_detected:
-                    # Send Discord alert (but not too frequently)
-                    current_time = time.time()
-                    if current_time - last_alert_time > MIN_TIME_BETWEEN_ALERTS:
-                        if self.discord_webhook:
-                            threading.Thread(
-                                target=self.send_discord_alert,
-                                args=(num_hands, display_frame.copy()),  # Pass the frame to the alert method
-                                daemon=True
-                            ).start()
-                        last_alert_time = current_time
-                    
-                    # Save screenshot if recording is enabled
-                    if self.record_detections and not self.recording:
-                        self.save_screenshot(display_frame)
-                        self.start_recording(display_frame)
-                
-                # Record video if in recording mode
-                if self.recording:
-                    self.video_writer.write(display_frame)
-                    
-                    # Add a green border to indicate recording
-                    cv2.rectangle(display_frame, (0, 0), 
-                                 (display_frame.shape[1], display_frame.shape[0]), 
-                                 (0, 255, 0), 5)
-                    
-                    # Stop recording after 10 seconds
-                    if time.time() - self.record_start_time > 10:
-                        self.stop_recording()
-                
-                # Add status text
-                status_text = "Status: "
-                if self.recording:
-                    status_text += "RECORDING HAND EVENT"
-                    status_color = (0, 255, 0)
-                elif hands_detected:
-                    status_text += f"{num_hands} HAND(S) DETECTED!"
-                    status_color = (0, 255, 0)
-                else:
-                    status_text += "Monitoring"
-                    status_color = (255, 255, 255)
-                
-                cv2.putText(display_frame, status_text, (10, 60), 
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.7, status_color, 2)
-                
-                # Add FPS display
-                cv2.putText(display_frame, f"FPS: {fps}", (display_frame.shape[1] - 120, 30),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-                
-                # Display the frame if required
-                if self.display:
-                    cv2.imshow("Hand Detection", display_frame)
-                    
-                    # Press 'q' to exit
-                    if cv2.waitKey(1) & 0xFF == ord('q'):
-                        break
-                
-                # Small delay to reduce CPU usage
-                time.sleep(0.005)
-                
-        except KeyboardInterrupt:
-            print("Interrupted by user")
-        finally:
-            # Clean up
-            if self.recording:
-                self.stop_recording()
-            
-            if self.cap is not None:
-                self.cap.release()
-            
-            # Free up MediaPipe resources
+        # Start opening the main stream for evidence in dual-stream mode
+        if self.evidence is not None:
+            self.evidence.request()
+        
+        # Send Discord alert (but not too frequently, on the capture clock)
+        current_time = ctx.timestamp
+        if self.last_alert_time is None or current_time - self.last_alert_time > MIN_TIME_BETWEEN_ALERTS:
+            if self.discord_webhook:
+                threading.Thread(
+                    target=self.send_evidence_alert,
+                    args=(ctx.count, ctx.display_frame.copy(), ctx.results),  # Pass the frame to the alert method
+                    daemon=True
+                ).start()
+            self.last_alert_time = current_time
+        
+        # Save screenshot if recording is enabled
+        if self.record_detections and not self.recording:
+            evidence_frame = self.evidence_frame(ctx.display_frame, ctx.results)
+            self.save_screenshot(evidence_frame)
+            self.start_recording(evidence_frame, ctx.timestamp)
+    
+    def status(self, ctx):
+        """Status line text and colour"""
+        if self.recording:
+            return "RECORDING HAND EVENT", (0, 255, 0)
+        if ctx.detected:
+            return f"{ctx.count} HAND(S) DETECTED!", (0, 255, 0)
+        if self.is_idle():
+            return "Idle (low-rate decoding)", (160, 160, 160)
+        return "Monitoring", (255, 255, 255)
+    
+    def close_model(self):
+        if self.owns_model:
             self.hands.close()
-            
-            cv2.destroyAllWindows()
-            print("Hand detection stopped")
+    
+    def build_pipeline(self):
+        """The hand detection loop as pipeline stages"""
+        return DetectionPipeline(
+            self, "hand", "Hand Detection",
+            preprocess=self.preprocess,
+            infer=self.infer,
+            postprocess=self.postprocess,
+            annotate=self.annotate,
+            alert=self.handle_alert,
+            status=self.status,
+            record_seconds=10,
+            record_color=(0, 255, 0)
+        )
+    
+    def run(self):
+        """Run the hand detection system"""
+        self.pipeline.run()
 
-class PoseDetector:
+class PoseDetector(CameraDetector):
+    recording_name = "fall event"
+    
     def __init__(self, 
                 camera_ip="192.168.1.40", 
                 camera_port="10554", 
@@ -396,7 +371,26 @@ class PoseDetector:
                 record_falls=False,
                 output_dir="fall_events",
                 discord_webhook=DISCORD_WEBHOOK,
-                verify_ssl=False):
+                verify_ssl=False,
+                capture_backend="opencv",
+                camera_substream_path=None,
+                idle_after=None,
+                idle_fps=1.0,
+                replay_source=None,
+                replay_realtime=False,
+                shared_model=None,
+                capture_process=False,
+                motion_gate=None,
+                roi_crop=False,
+                resolution=480,
+                qos_budget_ms=None,
+                pose_backend="legacy",
+                num_poses=1,
+                pose_model_dir="models",
+                max_people=1,
+                people_crops=False,
+                model_complexity=1,
+                connect=True):
         """
         Initialize the pose detector with camera connection parameters and detection settings
         """
@@ -412,6 +406,45 @@ class PoseDetector:
         self.output_dir = output_dir
         self.discord_webhook = discord_webhook
         self.verify_ssl = verify_ssl
+        self.capture_backend = capture_backend  # "opencv" or "ffmpeg"
+        self.resolution = resolution  # Processing height in lines
+        self.rgb_input = RGBInput()   # Reused resize/RGB buffers for the model input
+        
+        # Dual-stream mode: run inference on a low-resolution substream and open the
+        # full-resolution main stream only for screenshots, recordings and alert images
+        self.camera_substream_path = camera_substream_path
+        self.evidence = OnDemandStream(self.open_main_stream) if camera_substream_path else None
+        
+        # Idle decoding: after idle_after seconds without detections or motion the
+        # capture decodes keyframes only (or idle_fps frames); None disables it
+        self.idle_controller = IdleController(idle_after, idle_fps) if idle_after and not replay_source else None
+        
+        # Offline replay: a video file, directory or image sequence instead of the camera
+        self.replay_source = replay_source
+        self.replay_realtime = replay_realtime  # Pace frames at their media timestamps
+        
+        # Run capture in its own process, feeding a shared-memory frame ring
+        self.capture_process = capture_process
+        
+        # Row of the detector's own text line (moved down when detectors share a frame)
+        self.label_y = 90
+        
+        # MOG2 motion gate: skip pose inference while nothing moves and nobody is
+        # tracked (motion_gate is a sensitivity level, None disables it)
+        self.motion_gate = MotionGate(motion_gate) if motion_gate else None
+        
+        # Run pose on a padded crop around the person (previous landmarks or motion)
+        self.roi = PoseROI() if roi_crop else None
+        
+        # Pose backend: "legacy" (mp.solutions.pose, synchronous) or "tasks" (PoseLandmarker
+        # in LIVE_STREAM mode, asynchronous, with up to num_poses people)
+        self.pose_backend = pose_backend
+        self.num_poses = num_poses
+        self.pose_model_dir = pose_model_dir  # Directory of the PoseLandmarker .task bundles
+        if pose_backend == "tasks" and self.roi is not None:
+            # Asynchronous results belong to an earlier frame than the crop region in hand
+            print("ROI cropping is not available with the tasks pose backend; running on full frames")
+            self.roi = None
         
         # Create output directory if it doesn't exist
         if not os.path.exists(output_dir):
@@ -422,87 +455,118 @@ class PoseDetector:
         self.mp_drawing = mp.solutions.drawing_utils
         self.mp_drawing_styles = mp.solutions.drawing_styles
         
-        # Initialize pose detector with optimized parameters
-        self.pose = self.mp_pose.Pose(
-            static_image_mode=False,
-            model_complexity=1,  # Use lighter model (0=Lite, 1=Full, 2=Heavy)
-            enable_segmentation=False,
-            min_detection_confidence=min_detection_confidence,
-            min_tracking_confidence=min_tracking_confidence
-        )
+        # Initialize pose detector with optimized parameters, unless a model shared
+        # between cameras was passed in
+        self.owns_model = shared_model is None
+        self.model_complexity = model_complexity  # 0=Lite, 1=Full (default), 2=Heavy
+        self.pose = shared_model if shared_model is not None else self.create_pose_model(self.model_complexity)
+        
+        # Per-person crops: run the single-pose model on a crop around each tracked person and
+        # each new motion blob. Each track has its own model (by track id), so the model's
+        # tracking state always belongs to the same person; a blob's model passes to the
+        # track its pose starts
+        self.people_crops = people_crops and max_people > 1
+        if self.people_crops and (pose_backend != "legacy" or not self.owns_model or self.motion_gate is None):
+            print("Per-person crops need the legacy pose backend, an own model and the motion gate; "
+                  "running pose on full frames")
+            self.people_crops = False
+        if self.people_crops and self.roi is not None:
+            print("ROI cropping is replaced by per-person crops")
+            self.roi = None
+        self.crop_inputs = [RGBInput() for _ in range(max_people)] if self.people_crops else []
+        self.crop_models = {}  # Track id -> that person's crop model
+        self.spare_crop_models = [self.create_pose_model(self.model_complexity)
+                                  for _ in range(max_people - 1)] if self.people_crops else []
+        
+        # Latency-budget governor for resolution, frame skip and model complexity;
+        # created in run() once process_every_n_frames is final
+        self.qos_budget_ms = qos_budget_ms
+        self.qos = None
         
         # Initialize video writer variables
         self.video_writer = None
         self.record_start_time = None
         self.recording = False
+        self.record_size = None
+        
+        # Results of the last inference, redrawn on main-stream evidence frames
+        self.last_results = None
+        
+        # Per-detector fall state and alert cooldown, so several cameras in one process do not share it
+        self.fall_detected = False
+        self.last_fall_time = None  # Capture time of the last alert
+        
+        # Cleared by stop() to end run() from another thread
+        self.running = True
         
         # Fall detection variables
-        self.prev_landmarks = None
-        self.fall_history = []
         self.fall_threshold = 0.3  # Threshold for vertical movement to detect fall
-        self.stability_counter = 0
+        self.fall_window = 0.5     # Seconds the shoulder drop is measured over
+        self.posture_window = 0.3  # Seconds the torso angle and aspect ratio are averaged over
+        self.pose_status = None  # Pose status text and colour of the first analysed person
+        self.people = []  # Track id, box and pose status of every analysed person
         
         # Frame processing optimization
         self.frame_count = 0
         self.process_every_n_frames = 2  # Process only every 2nd frame
+        self.prediction_horizon = 0.5    # Seconds predicted landmarks fade out over on frames without inference
+        
+        # Person tracks, each with its own landmark filter and fall features; at
+        # most max_people of them are analysed per frame, in priority order
+        self.tracker = PoseTracker(self.create_landmark_filter, self.create_fall_features, max_people=max_people)
+        
+        # The detection loop: source -> preprocess -> infer -> postprocess -> annotate -> sinks
+        self.pipeline = self.build_pipeline()
         
-        # One Euro Filter for landmark smoothing
-        self.landmark_filter = LandmarkFilter(
+        # Connect to the camera, unless a CombinedDetector owns the capture
+        self.cap = None
+        if connect:
+            self.connect_camera()
+    
+    def create_pose_model(self, model_complexity):
+        """MediaPipe Pose (or a PoseLandmarker for the tasks backend) with the detector's confidence settings"""
+        if self.pose_backend == "tasks":
+            return PoseLandmarkerModel(
+                bundle_path(self.pose_model_dir, model_complexity),
+                num_poses=self.num_poses,
+                min_detection_confidence=self.min_detection_confidence,
+                min_tracking_confidence=self.min_tracking_confidence
+            )
+        
+        return self.mp_pose.Pose(
+            static_image_mode=False,
+            model_complexity=model_complexity,
+            enable_segmentation=False,
+            min_detection_confidence=self.min_detection_confidence,
+            min_tracking_confidence=self.min_tracking_confidence
+        )
+    
+    def create_landmark_filter(self):
+        """One Euro Filter for the landmark smoothing of one person"""
+        return LandmarkFilter(
             frequency=30.0,  # Estimated camera FPS
             min_cutoff=0.1,  # Minimum cutoff frequency
             beta=0.1,        # Speed coefficient
             dcutoff=1.0      # Derivative cutoff frequency
         )
-        
-        # Connect to the camera
-        self.connect_camera()
-    
-    def connect_camera(self):
-        """Connect to the camera using the provided parameters"""
-        print(f"Connecting to camera at {self.camera_ip}:{self.camera_port}...")
-        self.cap = connect_to_ip_camera(
-            ip=self.camera_ip,
-            port=self.camera_port,
-            user=self.camera_user,
-            password=self.camera_pass,
-            path=self.camera_path
-        )
-        
-        if self.cap is None or not self.cap.isOpened():
-            print("Failed to connect to camera. Exiting.")
-            return False
-            
-        print("Successfully connected to camera")
-        return True
     
-    def start_recording(self, frame):
-        """Start recording a video when a fall is detected"""
-        if self.recording:
-            return
-            
-        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-        video_filename = os.path.join(self.output_dir, f"fall_event_{timestamp}.mp4")
-        
-        # Get frame dimensions
-        height, width = frame.shape[:2]
-        
-        # Initialize video writer
-        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-        self.video_writer = cv2.VideoWriter(video_filename, fourcc, 10, (width, height))
-        
-        self.record_start_time = time.time()
-        self.recording = True
-        print(f"Started recording fall event to {video_filename}")
+    def create_fall_features(self):
+        """Sliding-window fall features of one person"""
+        return FallFeatures(motion_window=self.fall_window, posture_window=self.posture_window)
     
-    def stop_recording(self):
-        """Stop recording the video"""
-        if not self.recording:
-            return
-            
-        self.video_writer.release()
-        self.video_writer = None
-        self.recording = False
-        print("Stopped recording fall event")
+    def apply_qos(self, settings):
+        """Switch to the resolution, frame skip and model complexity chosen by the QoS governor"""
+        self.resolution = settings["resolution"]
+        self.process_every_n_frames = settings["skip"]
+        
+        if settings["complexity"] != self.model_complexity:
+            for model in [self.pose] + list(self.crop_models.values()) + self.spare_crop_models:
+                model.close()
+            self.model_complexity = settings["complexity"]
+            self.pose = self.create_pose_model(self.model_complexity)
+            self.spare_crop_models = [self.create_pose_model(self.model_complexity)
+                                      for _ in self.spare_crop_models]
+            self.crop_models = {}
     
     def save_screenshot(self, frame):
         """Save a screenshot of the detected fall with enhanced image quality"""
@@ -587,26 +651,36 @@ class PoseDetector:
             import traceback
             traceback.print_exc()
     
-    def alert_fall(self, frame):
-        """Handle fall detection alert - save screenshots, play sound, send alerts"""
-        global fall_detected, last_fall_time
+    def alert_fall(self, frame, results=None, timestamp=None):
+        """
+        Handle fall detection alert - save screenshots, play sound, send alerts
+        
+        results are the pose results drawn on main-stream evidence (default: the last inference's).
+        timestamp is the capture time of the frame (default: now), which the alert
+        cooldown and the recording length are measured on
+        """
+        if results is None:
+            results = self.last_results
         
         # Check if enough time has passed since the last alert
-        current_time = time.time()
-        if current_time - last_fall_time < MIN_TIME_BETWEEN_ALERTS:
+        current_time = time.time() if timestamp is None else timestamp
+        if self.last_fall_time is not None and current_time - self.last_fall_time < MIN_TIME_BETWEEN_ALERTS:
             return
             
-        fall_detected = True
-        last_fall_time = current_time
+        self.fall_detected = True
+        self.last_fall_time = current_time
         
         print("\n🚨 FALL DETECTED! 🚨")
         
+        # Use the full-resolution main stream for evidence in dual-stream mode
+        evidence_frame = self.evidence_frame(frame, results)
+        
         # Save the primary screenshot
-        screenshot_path = self.save_screenshot(frame)
+        screenshot_path = self.save_screenshot(evidence_frame)
         
         # If video recording is enabled and not already recording
         if self.record_falls and not self.recording:
-            self.start_recording(frame)
+            self.start_recording(evidence_frame, current_time)
         
         # Play an alert sound
         self.play_alert_sound()
@@ -614,8 +688,8 @@ class PoseDetector:
         # Send alert to Discord if webhook is configured
         if self.discord_webhook:
             threading.Thread(
-                target=self.send_discord_alert,
-                args=(frame.copy(),),  # Pass the frame to the alert method
+                target=self.send_evidence_alert,
+                args=(frame.copy(), results),  # Pass the frame to the alert method
                 daemon=True
             ).start()
     
@@ -632,163 +706,375 @@ class PoseDetector:
         except Exception as e:
             print(f"Could not play alert sound: {e}")
     
-    def detect_pose(self, frame):
+    def prepare_pose_input(self, frame, rgb_frame=None, shared_input=None):
         """
-        Process a frame to detect human pose using MediaPipe
-        
-        Returns landmarks and annotated frame
-        """
-        # Resize frame to improve performance
-        h, w = frame.shape[:2]
-        target_height = 480  # Lower resolution for faster processing
-        scale = target_height / h
-        new_width = int(w * scale)
+        Build the RGB model input for pose inference.
         
-        # Use OpenCV resize (faster than numpy operations)
-        small_frame = cv2.resize(frame, (new_width, target_height))
+        If the capture already delivers RGB frames at the processing resolution,
+        pass them as rgb_frame to skip the resize and colour conversion.
+        shared_input is an RGB buffer already at the processing resolution
+        (the combined detector's), used as is for the full frame; ROI crops are
+        still cut from frame or rgb_frame.
         
-        # Convert frame to RGB (MediaPipe requires RGB)
-        rgb_frame = cv2.cvtColor(small_frame, cv2.COLOR_BGR2RGB)
+        With ROI cropping enabled, the input is a crop around the person and the
+        returned region (normalized, None for the full frame) is what the
+        landmarks have to be mapped back with.
         
-        # Set image data as not writeable to improve performance
-        rgb_frame.flags.writeable = False
-        
-        # Process the image and detect pose
-        results = self.pose.process(rgb_frame)
-        
-        # Set image as writeable again
-        rgb_frame.flags.writeable = True
+        Returns the model input and the region
+        """
+        preconverted = rgb_frame is not None
+        source = rgb_frame if preconverted else frame
+        
+        # Crop a padded region around the person instead of shrinking the whole frame
+        region = None
+        if self.roi is not None:
+            motion_boxes = self.motion_gate.motion_boxes if self.motion_gate is not None else None
+            region = self.roi.select(self.last_results, motion_boxes)
+        
+        if region is None and shared_input is not None:
+            return shared_input, None
+        
+        if region is not None:
+            source, region = self.roi.crop(source, region)
+            target_height = min(source.shape[0], self.roi.input_height)
+            interpolation = cv2.INTER_AREA
+        else:
+            # Lower resolution for faster processing (RGB frames from the FFmpeg backend are
+            # already there unless the QoS governor lowered it since)
+            target_height = min(source.shape[0], self.resolution) if preconverted else self.resolution
+            interpolation = cv2.INTER_LINEAR
+        
+        if region is None and preconverted and target_height == source.shape[0]:
+            return source, None
+        
+        # Resize (and convert to RGB, MediaPipe requires RGB) in buffers reused across frames
+        model_input = self.rgb_input.prepare(source, target_height, convert=not preconverted,
+                                             interpolation=interpolation)
+        return model_input, region
+    
+    def prepare_person_crops(self, frame, rgb_frame, timestamp):
+        """
+        Build one model input per person for per-person crops: the tracked
+        people and the motion blobs nobody covers, at most max_people, in
+        priority order (see PoseTracker).
         
-        # Convert back to BGR for OpenCV
-        processed_frame = cv2.cvtColor(rgb_frame, cv2.COLOR_RGB2BGR)
+        Returns (track or None for a blob, model input, region) triples, cut from
+        the full-resolution frame like the ROI crop; empty when there is nobody
+        to look at
+        """
+        source = rgb_frame if rgb_frame is not None else frame
+        crops = []
+        for slot, (track, region) in enumerate(self.tracker.crop_regions(self.motion_gate.motion_boxes, timestamp)):
+            crop, region = PoseROI.crop(source, region)
+            model_input = self.crop_inputs[slot].prepare(crop, min(crop.shape[0], CROP_INPUT_HEIGHT),
+                                                         convert=rgb_frame is None, interpolation=cv2.INTER_AREA)
+            crops.append((track, model_input, region))
+        return crops
+    
+    def preprocess(self, ctx):
+        """
+        Run the motion gate and build the model input for an inferred frame.
         
-        # Resize back to original dimensions if needed for display
-        if self.display:
-            processed_frame = cv2.resize(processed_frame, (w, h))
+        The background model sees every (clean) frame; pose is skipped while
+        nothing moves and nobody is tracked, and forced on the first frame of new
+        motion even when frame skipping would drop it.
+        """
+        clean_frame = ctx.rgb_frame if ctx.rgb_frame is not None else ctx.frame
+        if self.motion_gate is not None:
+            person_tracked = self.last_results is not None and self.last_results.pose_landmarks is not None
+            gate = self.motion_gate.check(clean_frame, person_tracked)
+            if gate == GATE_SKIP:
+                ctx.infer = False
+            elif gate == GATE_FORCE:
+                ctx.infer = True
+        
+        ctx.region = None
+        ctx.crops = None
+        if ctx.infer:
+            start = time.perf_counter()
+            if self.people_crops:
+                ctx.crops = self.prepare_person_crops(ctx.frame, ctx.rgb_frame, ctx.timestamp)
+            if not ctx.crops:
+                ctx.model_input, ctx.region = self.prepare_pose_input(ctx.frame, ctx.rgb_frame, ctx.shared_input)
+            ctx.prepare_time = time.perf_counter() - start
+    
+    def infer(self, ctx):
+        if ctx.crops:
+            ctx.results = self.infer_person_crops(ctx.crops)
+        elif self.pose_backend == "tasks":
+            # Submitted at its capture time, which comes back with the frame's result
+            ctx.results = run_model(self.pose, ctx.model_input, timestamp=ctx.timestamp)
+        else:
+            ctx.results = run_model(self.pose, ctx.model_input)
+    
+    def crop_model(self, track):
+        """The crop model of a track (created on its first crop), or a spare one for a motion blob"""
+        if track is None:
+            return self.spare_crop_models.pop() if self.spare_crop_models else self.create_pose_model(self.model_complexity)
+        model = self.crop_models.get(track.track_id)
+        if model is None:
+            model = self.crop_models[track.track_id] = self.create_pose_model(self.model_complexity)
+        return model
+    
+    def infer_person_crops(self, crops):
+        """
+        Run each crop on its person's model and collect the poses, mapped to the full frame, as one result
         
-        return results, processed_frame, scale
+        The models of blobs that showed a pose are returned as blob_models (by
+        pose id) for update_crop_models(); those that found nobody hold no
+        tracking state and go back to the spares.
+        """
+        poses = []
+        blob_models = {}
+        for track, model_input, region in crops:
+            model = self.crop_model(track)
+            results = run_model(model, model_input)
+            if results.pose_landmarks:
+                pose = map_landmarks(results.pose_landmarks, region)
+                poses.append(pose)
+                if track is None:
+                    blob_models[id(pose)] = model
+            elif track is None:
+                self.spare_crop_models.append(model)
+        return types.SimpleNamespace(pose_landmarks=poses[0] if poses else None, multi_pose_landmarks=poses,
+                                     blob_models=blob_models)
+    
+    def update_crop_models(self, blob_models):
+        """
+        After tracking: give each track started from a blob that blob's model,
+        and close the models of blobs no new track took and of dropped tracks
+        """
+        tracks = {track.track_id: track for track in self.tracker.tracks}
+        for track_id, track in tracks.items():
+            model = blob_models.pop(id(track.pose), None)
+            if model is not None and track_id not in self.crop_models:
+                self.crop_models[track_id] = model
+            elif model is not None:
+                model.close()
+        for model in blob_models.values():
+            model.close()
+        blob_models.clear()
+        for track_id in [track_id for track_id in self.crop_models if track_id not in tracks]:
+            self.crop_models.pop(track_id).close()
     
-    def detect_fall(self, frame):
+    def postprocess(self, ctx):
         """
-        Process a frame to detect falls using pose analysis
+        Map the newest results to the full frame, run the fall analysis and decide whether to alert
         
-        Returns True if a fall is detected, False otherwise
+        Frames without a fresh result (skipped, or still in flight on the tasks
+        backend) get the tracked poses predicted to their capture time instead
+        of the last result's.
         """
-        # Skip frames to improve performance
-        self.frame_count += 1
-        if self.frame_count % self.process_every_n_frames != 0:
-            # Just return the previous detection result if we're skipping this frame
-            if hasattr(self, 'prev_display_frame') and hasattr(self, 'prev_fall_result'):
-                return self.prev_fall_result, self.prev_display_frame
+        ctx.fall = False
+        fresh = False
+        if ctx.inferred:
+            if ctx.region is not None:
+                # Landmarks are relative to the crop; map them back to the full frame
+                self.roi.map_results(ctx.results, ctx.region)
+            elif self.roi is not None:
+                self.roi.record_full_frame()
+            
+            # The tasks backend returns the same result until the landmarker delivers a newer one
+            fresh = ctx.results is not self.last_results
+            self.last_results = ctx.results
+            
+            if self.qos is not None and fresh:
+                # An asynchronous result carries its own submission-to-result latency
+                latency = getattr(ctx.results, "latency", None)
+                inference_time = latency if latency is not None else ctx.timings["infer"]
+                settings = self.qos.record(ctx.prepare_time + inference_time, ctx.timestamp)
+                if settings is not None:
+                    self.apply_qos(settings)
+            
+            if fresh:
+                # An asynchronous result is for an earlier frame: analyse it at that frame's capture time
+                observed = getattr(ctx.results, "timestamp", None)
+                h, w = ctx.frame.shape[:2]
+                ctx.fall, self.pose_status = self.detect_fall(
+                    ctx.results, ctx.timestamp if observed is None else observed, w / h)
+                if self.people_crops:
+                    self.update_crop_models(getattr(ctx.results, "blob_models", {}))
+        
+        # Later stages draw from ctx: when pipelined, the detector may already be on the next frame
+        ctx.results = self.last_results if fresh else self.predict_results(self.last_results, ctx.timestamp)
+        ctx.pose_status = self.pose_status
+        ctx.people = self.people
+        ctx.person_present = ctx.results is not None and ctx.results.pose_landmarks is not None
+        
+        # Keep the main stream warm while someone is in view so fall evidence is
+        # available at full resolution without waiting for the stream to open
+        if ctx.inferred and ctx.person_present and self.evidence is not None:
+            self.evidence.request()
+        
+        ctx.motion = self.motion_gate is not None and self.motion_gate.motion
+        ctx.detected = ctx.fall
+        ctx.activity = ctx.fall or ctx.person_present or ctx.motion
+        ctx.alert = ctx.fall
+    
+    def annotate(self, ctx):
+        frame = ctx.display_frame
         
-        # Detect pose in the frame
-        results, annotated_frame, scale = self.detect_pose(frame)
+        # Draw pose landmarks on the frame (only when displaying)
+        if self.display and ctx.person_present:
+            self.draw_pose(frame, ctx.results)
+        
+        if ctx.fall:
+            cv2.putText(frame, "FALL DETECTED", (10, 60), 
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
+        elif ctx.person_present and ctx.pose_status is not None:
+            status, status_color = ctx.pose_status
+            cv2.putText(frame, f"Pose: {status}", (10, self.label_y), 
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.6, status_color, 2)
+        
+        # With several people in view, label each of them above their pose
+        if self.display and len(ctx.people) > 1:
+            h, w = frame.shape[:2]
+            for track_id, box, pose_status in ctx.people:
+                text, color = pose_status if pose_status is not None else ("Tracking", (255, 255, 255))
+                cv2.putText(frame, f"#{track_id} {text}", (int(box[0] * w), max(15, int(box[1] * h) - 10)),
+                           cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
+        
+        draw_timestamp(frame)
+    
+    def draw_pose(self, frame, results):
+        """
+        Draw pose landmarks on a frame.
         
-        # Check if pose was detected
+        Landmarks are normalized, so this works on the captured frame and on a
+        full-resolution main-stream frame alike.
+        """
         if not results.pose_landmarks:
-            self.stability_counter += 1
-            if self.stability_counter > 10:  # If stable for several frames
-                self.prev_landmarks = None
-                self.fall_history = []
-            
-            self.prev_display_frame = annotated_frame
-            self.prev_fall_result = False
-            return False, annotated_frame
-        
-        # Reset stability counter when pose is detected
-        self.stability_counter = 0
+            return
         
-        # Draw pose landmarks on the frame (only when displaying)
-        if self.display:
+        # Every pose from the tasks backend, the single pose from the legacy one
+        for pose_landmarks in getattr(results, "multi_pose_landmarks", None) or [results.pose_landmarks]:
             self.mp_drawing.draw_landmarks(
-                annotated_frame,
-                results.pose_landmarks,
+                frame,
+                pose_landmarks,
                 self.mp_pose.POSE_CONNECTIONS,
                 landmark_drawing_spec=self.mp_drawing_styles.get_default_pose_landmarks_style()
             )
+    
+    def evidence_frame(self, frame, results, timeout=0.0):
+        """
+        Return the newest main-stream frame with the detected pose drawn on it.
         
-        # Get relevant landmarks and apply filtering for smoothness
-        raw_landmarks = results.pose_landmarks.landmark
-        landmarks = self.landmark_filter.process(raw_landmarks)
-        
-        # Get key landmarks for fall detection
-        nose = landmarks[self.mp_pose.PoseLandmark.NOSE]
-        left_shoulder = landmarks[self.mp_pose.PoseLandmark.LEFT_SHOULDER]
-        right_shoulder = landmarks[self.mp_pose.PoseLandmark.RIGHT_SHOULDER]
-        left_hip = landmarks[self.mp_pose.PoseLandmark.LEFT_HIP]
-        right_hip = landmarks[self.mp_pose.PoseLandmark.RIGHT_HIP]
-        
-        # Calculate vertical position of key parts (normalized to frame height)
-        shoulder_y = (left_shoulder.y + right_shoulder.y) / 2
-        hip_y = (left_hip.y + right_hip.y) / 2
-        
-        # Calculate shoulder-to-hip vertical distance ratio
-        shoulder_hip_ratio = abs(shoulder_y - hip_y)
-        
-        # Check if this is the first frame with landmarks
-        if self.prev_landmarks is None:
-            self.prev_landmarks = {
-                "nose": nose.y,
-                "shoulder": shoulder_y,
-                "hip": hip_y,
-                "time": time.time()
-            }
-            
-            self.prev_display_frame = annotated_frame
-            self.prev_fall_result = False
-            return False, annotated_frame
-        
-        # Calculate time since last landmark update
-        time_diff = time.time() - self.prev_landmarks["time"]
-        
-        # Only check for falls if enough time has passed (reduce false positives)
-        if time_diff > 0.5:  # Check every half second
-            # Calculate vertical movement of key landmarks
-            nose_movement = abs(nose.y - self.prev_landmarks["nose"])
-            shoulder_movement = abs(shoulder_y - self.prev_landmarks["shoulder"])
-            
-            # Add current vertical position to fall history
-            self.fall_history.append(shoulder_y)
-            
-            # Keep only recent history (last 10 frames)
-            if len(self.fall_history) > 10:
-                self.fall_history.pop(0)
-            
-            # Fall detection logic:
-            # 1. Significant downward movement of shoulders
-            # 2. Body is more horizontal than vertical (shoulder-hip ratio is small)
-            
-            # Check if shoulders moved significantly downward
-            if (shoulder_movement > self.fall_threshold and 
-                shoulder_y > self.prev_landmarks["shoulder"]):
-                
-                # Additional check: Ratio of shoulder-hip is small in a fall (body more horizontal)
-                if shoulder_hip_ratio < 0.15:
-                    # Add fall indicator to the frame
-                    cv2.putText(annotated_frame, "FALL DETECTED", (10, 60), 
-                               cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
-                    
-                    # Update landmarks for next comparison
-                    self.prev_landmarks = {
-                        "nose": nose.y,
-                        "shoulder": shoulder_y,
-                        "hip": hip_y,
-                        "time": time.time()
-                    }
-                    
-                    self.prev_display_frame = annotated_frame
-                    self.prev_fall_result = True
-                    return True, annotated_frame
-            
-            # Update landmarks for next comparison
-            self.prev_landmarks = {
-                "nose": nose.y,
-                "shoulder": shoulder_y,
-                "hip": hip_y,
-                "time": time.time()
-            }
+        Falls back to the given inference frame when not in dual-stream mode, when
+        there are no pose results yet, or when the main stream has not delivered
+        a frame within timeout seconds.
+        """
+        if self.evidence is None or results is None:
+            return frame
+        
+        ret, main_frame = self.evidence.latest_frame(timeout)
+        if not ret:
+            return frame
+        
+        main_frame = main_frame.copy()
+        self.draw_pose(main_frame, results)
+        return main_frame
+    
+    def send_evidence_alert(self, frame, results):
+        """Send the Discord alert with a full-resolution image when the main stream is available"""
+        self.send_discord_alert(self.evidence_frame(frame, results, EVIDENCE_FRAME_TIMEOUT))
+    
+    def predict_results(self, results, timestamp):
+        """
+        Results for a frame without a fresh inference
+        
+        Each tracked pose is moved along its landmark filter's velocity from
+        the time it was seen to timestamp, so the overlay follows the person
+        instead of freezing until the next inference. Its visibility fades
+        linearly to 0 over prediction_horizon seconds, so landmarks that are
+        only guessed drop out of the drawing. Poses without a track are kept
+        as they are.
+        """
+        if results is None or not results.pose_landmarks or not self.prediction_horizon:
+            return results
+        
+        tracks = {id(track.pose): track for track in self.tracker.tracks if track.missed == 0}
+        predicted = []
+        for pose_landmarks in getattr(results, "multi_pose_landmarks", None) or [results.pose_landmarks]:
+            track = tracks.get(id(pose_landmarks))
+            landmarks = None
+            if track is not None:
+                landmarks = track.landmark_filter.predict(timestamp, landmarks_to_array(pose_landmarks.landmark))
+            if landmarks is None:
+                predicted.append(pose_landmarks)
+                continue
+            age = timestamp - track.landmark_filter.t_prev
+            landmarks[:, VISIBILITY] *= max(0.0, 1.0 - age / self.prediction_horizon)
+            predicted.append(array_to_landmark_list(landmarks))
+        
+        return types.SimpleNamespace(pose_landmarks=predicted[0], multi_pose_landmarks=predicted)
+    
+    def detect_fall(self, results, current_time, aspect=1.0):
+        """
+        Analyse the poses of one inference for falls
+        
+        Each pose continues the track of the same person (see PoseTracker), so
+        every person has their own landmark filter and fall features; at most
+        max_people are analysed. current_time is the frame time, used for the
+        landmark filter and the feature windows; aspect is the frame's width / height.
         
-        # Add pose status to the frame
+        Returns whether anybody fell and the pose status of the first person in
+        priority order (text and colour, None without a pose)
+        """
+        poses = getattr(results, "multi_pose_landmarks", None)
+        if not poses:
+            poses = [results.pose_landmarks] if results.pose_landmarks else []
+        
+        fall = False
+        pose_status = None
+        people = []
+        for track, pose_landmarks in self.tracker.update(poses, current_time):
+            is_fall, track.status = self.detect_person_fall(track, pose_landmarks, current_time, aspect)
+            if is_fall:
+                new_fall = track.last_fall_time is None or current_time - track.last_fall_time > self.fall_window
+                if new_fall and self.tracker.max_people > 1:
+                    print(f"Fall of person #{track.track_id}")
+                track.last_fall_time = current_time
+                fall = True
+            elif pose_status is None:
+                pose_status = track.status
+            people.append((track.track_id, track.box, ("FALL", (0, 0, 255)) if is_fall else track.status))
+        
+        self.people = people
+        return fall, None if fall else pose_status
+    
+    def detect_person_fall(self, track, pose_landmarks, current_time, aspect=1.0):
+        """
+        Analyse one person's pose with their track's fall features
+        
+        The check runs on every analysed pose: the shoulders' drop is measured
+        against the oldest pose of the last fall_window seconds, so a fall is
+        seen on the first frame that completes it rather than on the next
+        half-second sample.
+        
+        Returns whether they fell and their pose status
+        """
+        # Apply filtering for smoothness; rows are landmarks, columns x, y, z, visibility
+        landmarks = track.landmark_filter.process(pose_landmarks.landmark, current_time)
+        features = track.features.update(landmarks, current_time, aspect)
+        
+        shoulder_y = features.shoulder_y
+        shoulder_hip_ratio = features.shoulder_hip_ratio
+        track.lying = shoulder_hip_ratio < 0.15
+        
+        # Fall detection logic:
+        # 1. Significant downward movement of shoulders within the fall window
+        # 2. Body is more horizontal than vertical (shoulder-hip ratio is small)
+        is_fall = (features.drop > self.fall_threshold and
+                   shoulder_hip_ratio < 0.15)  # Body more horizontal in a fall
+        if is_fall:
+            # The drop stays over the threshold for up to a window after a fall; report its start
+            if track.last_fall_time is None or current_time - track.last_fall_time > self.fall_window:
+                print(f"Fall features: drop {features.drop:.2f}, velocity {features.velocity:.2f}/s, "
+                      f"acceleration {features.acceleration:.2f}/s2, torso {features.torso_angle:.0f} deg, "
+                      f"aspect {features.aspect_ratio:.2f}")
+            return True, None
+        
+        # Pose status
         vertical_position = 1 - shoulder_y  # Normalize to 0-1 scale (1 is standing)
         
         status = "Standing"
@@ -802,221 +1088,81 @@ class PoseDetector:
             status = "Sitting/Crouching"
             status_color = (0, 255, 255)  # Yellow for sitting
         
-        # Display pose status
-        cv2.putText(annotated_frame, f"Pose: {status}", (10, 90), 
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.6, status_color, 2)
-        
-        self.prev_display_frame = annotated_frame
-        self.prev_fall_result = False
-        return False, annotated_frame
+        return False, (status, status_color)
     
-    def run(self):
-        """Run the pose detection and fall detection system"""
-        if self.cap is None or not self.cap.isOpened():
-            print("Camera is not connected. Please try connecting to the camera first.")
+    def handle_alert(self, ctx):
+        if not ctx.alert:
             return
-        
-        print("Starting fall detection. Press 'q' to quit.")
-        
-        try:
-            # For FPS calculation
-            prev_time = time.time()
-            frame_counter = 0
-            fps = 0
-            
-            while True:
-                # Read a frame from the camera
-                ret, frame = self.cap.read()
-                
-                if not ret:
-                    print("Failed to grab frame. Reconnecting...")
-                    self.cap.release()
-                    if not self.connect_camera():
-                        break
-                    continue
-                
-                # Calculate FPS
-                frame_counter += 1
-                if (time.time() - prev_time) > 1:
-                    fps = frame_counter
-                    frame_counter = 0
-                    prev_time = time.time()
-                
-                # Make a copy of the frame for display
-                display_frame = frame.copy()
-                
-                # Add timestamp to the frame
-                timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                cv2.putText(display_frame, timestamp, (10, 30), 
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
-                
-                # Detect falls in the frame
-                is_fall, display_frame = self.detect_fall(display_frame)
-                
-                if is_fall:
-                    self.alert_fall(display_frame)
-                
-                # Record video if in recording mode
-                if self.recording:
-                    self.video_writer.write(display_frame)
-                    
-                    # Add a red border to indicate recording
-                    cv2.rectangle(display_frame, (0, 0), 
-                                 (display_frame.shape[1], display_frame.shape[0]), 
-                                 (0, 0, 255), 5)
-                    
-                    # Stop recording after 15 seconds
-                    if time.time() - self.record_start_time > 15:
-                        self.stop_recording()
-                
-                # Add status text
-                status_text = "Status: "
-                if self.recording:
-                    status_text += "RECORDING FALL EVENT"
-                    status_color = (0, 0, 255)
-                elif fall_detected and time.time() - last_fall_time < 5:
-                    status_text += "FALL DETECTED!"
-                    status_color = (0, 0, 255)
-                else:
-                    status_text += "Monitoring"
-                    status_color = (0, 255, 0)
-                
-                cv2.putText(display_frame, status_text, (10, 60), 
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.7, status_color, 2)
-                
-                # Add FPS display
-                cv2.putText(display_frame, f"FPS: {fps}", (display_frame.shape[1] - 120, 30),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-                
-                # Display the frame if required
-                if self.display:
-                    cv2.imshow("Fall Detection", display_frame)
-                    
-                    # Press 'q' to exit
-                    if cv2.waitKey(1) & 0xFF == ord('q'):
-                        break
-                
-                # Small delay to reduce CPU usage, but less than before
-                time.sleep(0.005)
-                
-        except KeyboardInterrupt:
-            print("Interrupted by user")
-        finally:
-            # Clean up
-            if self.recording:
-                self.stop_recording()
-            
-            if self.cap is not None:
-                self.cap.release()
-            
-            # Free up MediaPipe resources
+        if self.replay_source:
+            print(f"Fall detected at {ctx.timestamp:.2f}s of the replay")
+        self.alert_fall(ctx.display_frame, ctx.results, ctx.timestamp)
+    
+    def status(self, ctx):
+        """Status line text and colour"""
+        if self.recording:
+            return "RECORDING FALL EVENT", (0, 0, 255)
+        if self.fall_detected and ctx.timestamp - self.last_fall_time < 5:
+            return "FALL DETECTED!", (0, 0, 255)
+        if self.is_idle():
+            return "Idle (low-rate decoding)", (160, 160, 160)
+        if self.motion_gate is not None and not ctx.motion and not ctx.person_present:
+            return "No motion (pose paused)", (160, 160, 160)
+        return "Monitoring", (0, 255, 0)
+    
+    def close_model(self):
+        # A shared model belongs to the caller; our own may have been replaced by the QoS governor
+        if self.owns_model:
             self.pose.close()
-            
-            cv2.destroyAllWindows()
-            print("Fall detection stopped")
-
-# One Euro Filter for landmark smoothing
-class LandmarkFilter:
-    def __init__(self, frequency=30.0, min_cutoff=1.0, beta=0.0, dcutoff=1.0):
-        self.frequency = frequency
-        self.min_cutoff = min_cutoff
-        self.beta = beta
-        self.dcutoff = dcutoff
-        self.filters = {}
-    
-    def process(self, landmarks):
-        # Create a copy of landmarks to not modify the original
-        smoothed_landmarks = []
-        
-        for i, landmark in enumerate(landmarks):
-            if i not in self.filters:
-                self.filters[i] = {
-                    'x': OneEuroFilter(self.frequency, self.min_cutoff, self.beta, self.dcutoff),
-                    'y': OneEuroFilter(self.frequency, self.min_cutoff, self.beta, self.dcutoff),
-                    'z': OneEuroFilter(self.frequency, self.min_cutoff, self.beta, self.dcutoff),
-                    'visibility': OneEuroFilter(self.frequency, self.min_cutoff, self.beta, self.dcutoff)
-                }
-            
-            # Filter each coordinate
-            x = self.filters[i]['x'].filter(landmark.x)
-            y = self.filters[i]['y'].filter(landmark.y)
-            z = self.filters[i]['z'].filter(landmark.z)
-            visibility = self.filters[i]['visibility'].filter(landmark.visibility)
-            
-            # Create a new landmark with filtered values
-            filtered_landmark = type('obj', (object,), {
-                'x': x,
-                'y': y,
-                'z': z,
-                'visibility': visibility
-            })
-            
-            smoothed_landmarks.append(filtered_landmark)
+        for model in list(self.crop_models.values()) + self.spare_crop_models:
+            model.close()
+    
+    def build_pipeline(self):
+        """The fall detection loop as pipeline stages"""
+        metrics = {}
+        if self.motion_gate is not None:
+            metrics["Motion gate"] = self.motion_gate.get_metrics
+        if self.roi is not None:
+            metrics["ROI"] = self.roi.get_metrics
+        if self.qos_budget_ms:
+            # The governor is only created in run()
+            metrics["QoS"] = lambda: self.qos.get_metrics()
+        if self.pose_backend == "tasks" and self.owns_model:
+            # The QoS governor may have replaced the model since
+            metrics["Pose landmarker"] = lambda: self.pose.get_metrics()
+        if self.tracker.max_people > 1:
+            metrics["People"] = self.tracker.get_metrics
+        
+        return DetectionPipeline(
+            self, "fall", "Fall Detection",
+            preprocess=self.preprocess,
+            infer=self.infer,
+            postprocess=self.postprocess,
+            annotate=self.annotate,
+            alert=self.handle_alert,
+            status=self.status,
+            record_seconds=15,
+            record_color=(0, 0, 255),
+            metrics=metrics
+        )
+    
+    def run(self):
+        """Run the pose detection and fall detection system"""
+        if self.qos_budget_ms:
+            # A shared model belongs to several cameras, so only resolution and skip are governed
+            self.qos = QoSGovernor(
+                self.qos_budget_ms,
+                resolution=self.resolution,
+                skip=self.process_every_n_frames,
+                complexity=self.model_complexity,
+                complexities=(2, 1, 0) if self.owns_model else (self.model_complexity,)
+            )
+            self.apply_qos(self.qos.settings)
         
-        return smoothed_landmarks
+        self.pipeline.run()
 
-class OneEuroFilter:
-    def __init__(self, freq, mincutoff=1.0, beta=0.0, dcutoff=1.0):
-        self.freq = freq
-        self.mincutoff = mincutoff
-        self.beta = beta
-        self.dcutoff = dcutoff
-        self.x_prev = None
-        self.dx_prev = None
-        self.t_prev = None
-    
-    def filter(self, x):
-        t = time.time()
-        
-        if self.x_prev is None:
-            self.x_prev = x
-            self.t_prev = t
-            return x
-        
-        # Calculate the timestep
-        dt = t - self.t_prev
-        
-        # Avoid division by zero
-        if dt == 0:
-            return self.x_prev
-            
-        # Adjust alpha based on the timestep
-        alpha = self._calculate_alpha(dt, self.mincutoff)
-        
-        # Calculate the derivative
-        dx = (x - self.x_prev) / dt
-        
-        # Filter the derivative
-        if self.dx_prev is None:
-            self.dx_prev = dx
-        else:
-            dx_alpha = self._calculate_alpha(dt, self.dcutoff)
-            dx = dx_alpha * dx + (1 - dx_alpha) * self.dx_prev
-        
-        # Calculate the cutoff frequency
-        cutoff = self.mincutoff + self.beta * abs(dx)
-        
-        # Calculate the smoothing factor
-        alpha = self._calculate_alpha(dt, cutoff)
-        
-        # Filter the signal
-        filtered_x = alpha * x + (1 - alpha) * self.x_prev
-        
-        # Save values for next iteration
-        self.x_prev = filtered_x
-        self.dx_prev = dx
-        self.t_prev = t
-        
-        return filtered_x
+class FaceDetector(CameraDetector):
+    recording_name = "face event"
     
-    def _calculate_alpha(self, dt, cutoff):
-        # Formula for alpha based on cutoff frequency
-        tau = 1.0 / (2 * np.pi * cutoff)
-        te = dt / tau
-        alpha = 1.0 / (1.0 + te)
-        return alpha
-
-class FaceDetector:
     def __init__(self, 
                 camera_ip="192.168.1.40", 
                 camera_port="10554", 
@@ -1028,7 +1174,17 @@ class FaceDetector:
                 record_detections=False,
                 output_dir="face_events",
                 discord_webhook=DISCORD_WEBHOOK,
-                verify_ssl=False):
+                verify_ssl=False,
+                capture_backend="opencv",
+                camera_substream_path=None,
+                idle_after=None,
+                idle_fps=1.0,
+                replay_source=None,
+                replay_realtime=False,
+                shared_model=None,
+                capture_process=False,
+                resolution=480,
+                connect=True):
         """
         Initialize the face detector with camera connection parameters and detection settings
         """
@@ -1043,6 +1199,28 @@ class FaceDetector:
         self.output_dir = output_dir
         self.discord_webhook = discord_webhook
         self.verify_ssl = verify_ssl
+        self.capture_backend = capture_backend  # "opencv" or "ffmpeg"
+        self.resolution = resolution  # Processing height in lines
+        self.rgb_input = RGBInput()   # Reused resize/RGB buffers for the model input
+        
+        # Dual-stream mode: run inference on a low-resolution substream and open the
+        # full-resolution main stream only for screenshots, recordings and alert images
+        self.camera_substream_path = camera_substream_path
+        self.evidence = OnDemandStream(self.open_main_stream) if camera_substream_path else None
+        
+        # Idle decoding: after idle_after seconds without detections or motion the
+        # capture decodes keyframes only (or idle_fps frames); None disables it
+        self.idle_controller = IdleController(idle_after, idle_fps) if idle_after and not replay_source else None
+        
+        # Offline replay: a video file, directory or image sequence instead of the camera
+        self.replay_source = replay_source
+        self.replay_realtime = replay_realtime  # Pace frames at their media timestamps
+        
+        # Run capture in its own process, feeding a shared-memory frame ring
+        self.capture_process = capture_process
+        
+        # Row of the detector's own text line (moved down when detectors share a frame)
+        self.label_y = 90
         
         # Create output directory if it doesn't exist
         if not os.path.exists(output_dir):
@@ -1056,8 +1234,10 @@ class FaceDetector:
         # 1 for full-range detection (faces within 5 meters)
         self.model_selection = 1
         
-        # Initialize face detector with the selected model
-        self.face_detector = self.mp_face_detection.FaceDetection(
+        # Initialize face detector with the selected model, unless a model shared
+        # between cameras was passed in
+        self.owns_model = shared_model is None
+        self.face_detector = shared_model if shared_model is not None else self.mp_face_detection.FaceDetection(
             model_selection=self.model_selection,
             min_detection_confidence=min_detection_confidence
         )
@@ -1066,60 +1246,28 @@ class FaceDetector:
         self.video_writer = None
         self.record_start_time = None
         self.recording = False
+        self.record_size = None
         
-        # Frame processing optimization
-        self.frame_count = 0
-        self.process_every_n_frames = 1  # Process every frame by default
+        # Results of the last inference, redrawn on main-stream evidence frames
+        self.last_results = None
         
-        # Connect to the camera
-        self.connect_camera()
-    
-    def connect_camera(self):
-        """Connect to the camera using the provided parameters"""
-        print(f"Connecting to camera at {self.camera_ip}:{self.camera_port}...")
-        self.cap = connect_to_ip_camera(
-            ip=self.camera_ip,
-            port=self.camera_port,
-            user=self.camera_user,
-            password=self.camera_pass,
-            path=self.camera_path
-        )
+        # Per-detector alert cooldown, so several cameras in one process do not share it
+        self.last_alert_time = None  # Capture time of the last alert
         
-        if self.cap is None or not self.cap.isOpened():
-            print("Failed to connect to camera. Exiting.")
-            return False
-            
-        print("Successfully connected to camera")
-        return True
-    
-    def start_recording(self, frame):
-        """Start recording a video when faces are detected"""
-        if self.recording:
-            return
-            
-        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-        video_filename = os.path.join(self.output_dir, f"face_event_{timestamp}.mp4")
+        # Cleared by stop() to end run() from another thread
+        self.running = True
         
-        # Get frame dimensions
-        height, width = frame.shape[:2]
+        # Frame processing optimization
+        self.frame_count = 0
+        self.process_every_n_frames = 1  # Process every frame by default
         
-        # Initialize video writer
-        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-        self.video_writer = cv2.VideoWriter(video_filename, fourcc, 10, (width, height))
+        # The detection loop: source -> preprocess -> infer -> postprocess -> annotate -> sinks
+        self.pipeline = self.build_pipeline()
         
-        self.record_start_time = time.time()
-        self.recording = True
-        print(f"Started recording face event to {video_filename}")
-    
-    def stop_recording(self):
-        """Stop recording the video"""
-        if not self.recording:
-            return
-            
-        self.video_writer.release()
-        self.video_writer = None
-        self.recording = False
-        print("Stopped recording face event")
+        # Connect to the camera, unless a CombinedDetector owns the capture
+        self.cap = None
+        if connect:
+            self.connect_camera()
     
     def save_screenshot(self, frame):
         """Save a screenshot of the detected faces"""
@@ -1192,201 +1340,493 @@ class FaceDetector:
             import traceback
             traceback.print_exc()
     
-    def detect_faces(self, frame):
+    def preprocess(self, ctx):
         """
-        Process a frame to detect faces using MediaPipe
+        Build the model input for an inferred frame.
         
-        Returns detections and annotated frame
+        The combined detector's shared input and RGB frames from the FFmpeg backend
+        are already at the processing resolution; otherwise the frame is resized and
+        converted to RGB (MediaPipe requires RGB) in buffers reused across frames.
         """
-        # Resize frame to improve performance
+        if ctx.infer:
+            if ctx.shared_input is not None:
+                ctx.model_input = ctx.shared_input
+            else:
+                ctx.model_input = ctx.rgb_frame if ctx.rgb_frame is not None else self.rgb_input.prepare(ctx.frame, self.resolution)
+    
+    def infer(self, ctx):
+        ctx.results = run_model(self.face_detector, ctx.model_input)
+    
+    def postprocess(self, ctx):
+        """Count the faces of the newest results and decide whether to alert"""
+        if ctx.inferred:
+            self.last_results = ctx.results
+        
+        # Later stages draw from ctx.results: when pipelined, last_results may already be the next frame's
+        results = ctx.results = self.last_results
+        ctx.count = len(results.detections) if results is not None and results.detections else 0
+        ctx.detected = ctx.count > 0
+        ctx.activity = ctx.detected
+        ctx.alert = ctx.detected and ctx.inferred
+    
+    def annotate(self, ctx):
+        # Detections are normalized, so they are drawn straight onto the captured frame
+        if ctx.results is not None:
+            self.draw_faces(ctx.display_frame, ctx.results)
+        draw_timestamp(ctx.display_frame)
+    
+    def draw_faces(self, frame, results):
+        """
+        Draw face boxes and keypoints on a frame and return the number of faces.
+        
+        Detections are normalized and mapped to the size of the frame they are
+        drawn on, so this works on the captured frame and on a full-resolution
+        main-stream frame alike.
+        """
+        if not results.detections:
+            return 0
+        
         h, w = frame.shape[:2]
-        target_height = 480  # Lower resolution for faster processing
-        scale = target_height / h
-        new_width = int(w * scale)
+        num_faces = len(results.detections)
+        
+        for detection in results.detections:
+            # Get bounding box coordinates
+            bbox = detection.location_data.relative_bounding_box
+            
+            # Convert normalized coordinates to pixel coordinates
+            x_min = int(bbox.xmin * w)
+            y_min = int(bbox.ymin * h)
+            width = int(bbox.width * w)
+            height = int(bbox.height * h)
+            
+            # Draw bounding box
+            cv2.rectangle(frame, (x_min, y_min), (x_min + width, y_min + height), (0, 255, 0), 2)
+            
+            # Add confidence score
+            confidence = detection.score[0]
+            cv2.putText(frame, f"{confidence:.2f}", (x_min, y_min - 10),
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
+            
+            # Extract and draw facial landmarks
+            for idx, landmark in enumerate(detection.location_data.relative_keypoints):
+                # Convert normalized coordinates to pixel coordinates
+                landmark_x = int(landmark.x * w)
+                landmark_y = int(landmark.y * h)
+                
+                # Draw landmarks
+                cv2.circle(frame, (landmark_x, landmark_y), 5, (255, 0, 0), -1)
+            
+        # Add text showing number of faces detected
+        cv2.putText(frame, f"Faces Detected: {num_faces}", (10, self.label_y), 
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+        return num_faces
+    
+    def evidence_frame(self, frame, results, timeout=0.0):
+        """
+        Return the newest main-stream frame with the detected faces drawn on it.
         
-        # Use OpenCV resize (faster than numpy operations)
-        small_frame = cv2.resize(frame, (new_width, target_height))
+        Falls back to the given inference frame when not in dual-stream mode or
+        when the main stream has not delivered a frame within timeout seconds.
+        """
+        if self.evidence is None:
+            return frame
         
-        # Convert frame to RGB (MediaPipe requires RGB)
-        rgb_frame = cv2.cvtColor(small_frame, cv2.COLOR_BGR2RGB)
+        ret, main_frame = self.evidence.latest_frame(timeout)
+        if not ret:
+            return frame
+        
+        main_frame = main_frame.copy()
+        self.draw_faces(main_frame, results)
+        return main_frame
+    
+    def send_evidence_alert(self, num_faces, frame, results):
+        """Send the Discord alert with a full-resolution image when the main stream is available"""
+        self.send_discord_alert(num_faces, self.evidence_frame(frame, results, EVIDENCE_FRAME_TIMEOUT))
+    
+    def handle_alert(self, ctx):
+        """Alert, screenshot and start recording when faces were detected"""
+        if not ctx.alert:
+            return
+        
+        # Start opening the main stream for evidence in dual-stream mode
+        if self.evidence is not None:
+            self.evidence.request()
+        
+        # Send Discord alert (but not too frequently, on the capture clock)
+        current_time = ctx.timestamp
+        if self.last_alert_time is None or current_time - self.last_alert_time > MIN_TIME_BETWEEN_ALERTS:
+            if self.discord_webhook:
+                threading.Thread(
+                    target=self.send_evidence_alert,
+                    args=(ctx.count, ctx.display_frame.copy(), ctx.results),  # Pass the frame to the alert method
+                    daemon=True
+                ).start()
+            self.last_alert_time = current_time
+        
+        # Save screenshot if recording is enabled
+        if self.record_detections and not self.recording:
+            evidence_frame = self.evidence_frame(ctx.display_frame, ctx.results)
+            self.save_screenshot(evidence_frame)
+            self.start_recording(evidence_frame, ctx.timestamp)
+    
+    def status(self, ctx):
+        """Status line text and colour"""
+        if self.recording:
+            return "RECORDING FACE EVENT", (0, 255, 0)
+        if ctx.detected:
+            return f"{ctx.count} FACE(S) DETECTED!", (0, 255, 0)
+        if self.is_idle():
+            return "Idle (low-rate decoding)", (160, 160, 160)
+        return "Monitoring", (255, 255, 255)
+    
+    def close_model(self):
+        if self.owns_model:
+            self.face_detector.close()
+    
+    def build_pipeline(self):
+        """The face detection loop as pipeline stages"""
+        return DetectionPipeline(
+            self, "face", "Face Detection",
+            preprocess=self.preprocess,
+            infer=self.infer,
+            postprocess=self.postprocess,
+            annotate=self.annotate,
+            alert=self.handle_alert,
+            status=self.status,
+            record_seconds=10,
+            record_color=(0, 255, 0)
+        )
+    
+    def run(self):
+        """Run the face detection system"""
+        self.pipeline.run()
+
+class CombinedDetector(CameraDetector):
+    """
+    Fall, hand and face detection on one camera, from a single decode.
+    
+    Each frame is read and converted to an RGB buffer at the processing
+    resolution once; the selected detectors run their preprocess / infer /
+    postprocess / annotate steps on that shared buffer, with the inferences
+    running concurrently on a thread pool (MediaPipe releases the GIL while a
+    graph runs). Results are drawn onto one frame, and the detections of all
+    detectors feed one event stream and one recording.
+    
+    The member detectors are created without a camera connection; capture,
+    reconnects, idle decoding, dual-stream evidence and recording belong to the
+    combined detector. Each member keeps its own state, alerts and cooldowns.
+    """
+    MODES = {
+        "fall": (PoseDetector, "draw_pose"),
+        "hand": (HandDetector, "draw_hands"),
+        "face": (FaceDetector, "draw_faces")
+    }
+    recording_name = "event"
+    
+    def __init__(self, 
+                modes=("fall", "hand", "face"),
+                camera_ip="192.168.1.40", 
+                camera_port="10554", 
+                camera_user="admin", 
+                camera_pass="12345678", 
+                camera_path="/tcp/av0_0",
+                min_detection_confidence=0.7,
+                min_tracking_confidence=0.5,
+                display=True,
+                record_detections=False,
+                output_dir="events",
+                discord_webhook=DISCORD_WEBHOOK,
+                verify_ssl=False,
+                capture_backend="opencv",
+                camera_substream_path=None,
+                idle_after=None,
+                idle_fps=1.0,
+                replay_source=None,
+                replay_realtime=False,
+                capture_process=False,
+                motion_gate=None,
+                roi_crop=False,
+                resolution=480):
+        """
+        Initialize the combined detector and its member detectors (one per mode)
+        """
+        unknown = [mode for mode in modes if mode not in self.MODES]
+        if unknown or not modes:
+            raise ValueError(f"Combined mode needs one or more of {', '.join(self.MODES)}, got {', '.join(modes)}")
+        
+        self.camera_ip = camera_ip
+        self.camera_port = camera_port
+        self.camera_user = camera_user
+        self.camera_pass = camera_pass
+        self.camera_path = camera_path
+        self.display = display
+        self.record_detections = record_detections
+        self.output_dir = output_dir
+        self.capture_backend = capture_backend  # "opencv" or "ffmpeg"
+        self.resolution = resolution  # Processing height in lines
+        self.rgb_input = RGBInput()   # The RGB buffer shared by all models
         
-        # Set image data as not writeable to improve performance
-        rgb_frame.flags.writeable = False
+        # Dual-stream mode: run inference on a low-resolution substream and open the
+        # full-resolution main stream only for screenshots, recordings and alert images
+        self.camera_substream_path = camera_substream_path
+        self.evidence = OnDemandStream(self.open_main_stream) if camera_substream_path else None
         
-        # Process the image and detect faces
-        results = self.face_detector.process(rgb_frame)
+        # Idle decoding: after idle_after seconds without detections or motion the
+        # capture decodes keyframes only (or idle_fps frames); None disables it
+        self.idle_controller = IdleController(idle_after, idle_fps) if idle_after and not replay_source else None
         
-        # Set image as writeable again
-        rgb_frame.flags.writeable = True
+        # Offline replay: a video file, directory or image sequence instead of the camera
+        self.replay_source = replay_source
+        self.replay_realtime = replay_realtime  # Pace frames at their media timestamps
         
-        # Convert back to BGR for OpenCV
-        processed_frame = cv2.cvtColor(rgb_frame, cv2.COLOR_RGB2BGR)
+        # Run capture in its own process, feeding a shared-memory frame ring
+        self.capture_process = capture_process
         
-        # Resize back to original dimensions if needed for display
-        if self.display:
-            processed_frame = cv2.resize(processed_frame, (w, h))
+        # Create output directory if it doesn't exist
+        if not os.path.exists(output_dir):
+            os.makedirs(output_dir)
         
-        # Draw face detections on the processed frame
-        if results.detections:
-            num_faces = len(results.detections)
-            
-            for detection in results.detections:
-                # Get bounding box coordinates
-                bbox = detection.location_data.relative_bounding_box
-                
-                # Convert normalized coordinates to pixel coordinates
-                x_min = int(bbox.xmin * w)
-                y_min = int(bbox.ymin * h)
-                width = int(bbox.width * w)
-                height = int(bbox.height * h)
-                
-                # Draw bounding box
-                cv2.rectangle(processed_frame, (x_min, y_min), (x_min + width, y_min + height), (0, 255, 0), 2)
-                
-                # Add confidence score
-                confidence = detection.score[0]
-                cv2.putText(processed_frame, f"{confidence:.2f}", (x_min, y_min - 10),
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
-                
-                # Extract and draw facial landmarks
-                for idx, landmark in enumerate(detection.location_data.relative_keypoints):
-                    # Convert normalized coordinates to pixel coordinates
-                    landmark_x = int(landmark.x * w)
-                    landmark_y = int(landmark.y * h)
-                    
-                    # Draw landmarks
-                    cv2.circle(processed_frame, (landmark_x, landmark_y), 5, (255, 0, 0), -1)
-                
-            # Add text showing number of faces detected
-            cv2.putText(processed_frame, f"Faces Detected: {num_faces}", (10, 90), 
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+        # Member detectors: no camera, no recording of their own, and the shared evidence stream
+        member_kwargs = dict(
+            camera_ip=camera_ip,
+            camera_port=camera_port,
+            camera_user=camera_user,
+            camera_pass=camera_pass,
+            camera_path=camera_path,
+            min_detection_confidence=min_detection_confidence,
+            display=display,
+            discord_webhook=discord_webhook,
+            verify_ssl=verify_ssl,
+            replay_source=replay_source,
+            resolution=resolution,
+            connect=False
+        )
+        self.modes = list(modes)
+        self.detectors = []
+        for row, mode in enumerate(self.modes):
+            kwargs = dict(member_kwargs)
+            if mode == "fall":
+                kwargs.update(output_dir=output_dir, record_falls=False, motion_gate=motion_gate,
+                              roi_crop=roi_crop, min_tracking_confidence=min_tracking_confidence)
+            elif mode == "hand":
+                kwargs.update(output_dir=os.path.join(output_dir, "hands"), record_detections=False,
+                              min_tracking_confidence=min_tracking_confidence)
+            else:
+                kwargs.update(output_dir=os.path.join(output_dir, "faces"), record_detections=False)
             
-            return True, processed_frame, num_faces
+            detector = self.MODES[mode][0](**kwargs)
+            detector.evidence = self.evidence
+            detector.label_y = 90 + 30 * row
+            self.detectors.append(detector)
+        
+        # One inference thread per model
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=len(self.detectors),
+                                                              thread_name_prefix="combined-infer")
+        
+        # Initialize video writer variables
+        self.video_writer = None
+        self.record_start_time = None
+        self.recording = False
+        self.record_size = None
+        
+        # Results of every member as of the last postprocessed frame (one list entry per mode)
+        self.last_results = None
+        
+        # Merged event stream: one entry each time a mode starts detecting
+        self.events = collections.deque(maxlen=100)
+        self.detecting = {mode: False for mode in self.modes}
+        self.metrics = {
+            "events": {mode: 0 for mode in self.modes},
+            "inferences": {mode: 0 for mode in self.modes},
+            "infer_seconds": {mode: 0.0 for mode in self.modes}
+        }
         
-        return False, processed_frame, 0
+        # Cleared by stop() to end run() from another thread
+        self.running = True
+        
+        # Frame processing optimization
+        self.frame_count = 0
+        self.process_every_n_frames = 1  # Process every frame by default
+        
+        # The detection loop: source -> preprocess -> infer -> postprocess -> annotate -> sinks
+        self.pipeline = self.build_pipeline()
+        
+        # Connect to the camera
+        self.connect_camera()
     
-    def run(self):
-        """Run the face detection system"""
-        if self.cap is None or not self.cap.isOpened():
-            print("Camera is not connected. Please try connecting to the camera first.")
-            return
+    def evidence_frame(self, frame, results=None, timeout=0.0):
+        """
+        Return the newest main-stream frame with every detector's results drawn on it.
+        
+        results has one entry per mode (the frame context's results); None uses
+        every member's last results. Falls back to the given frame when not in
+        dual-stream mode or when the main stream has not delivered a frame within
+        timeout seconds.
+        """
+        if self.evidence is None:
+            return frame
+        
+        ret, main_frame = self.evidence.latest_frame(timeout)
+        if not ret:
+            return frame
         
-        print("Starting face detection. Press 'q' to quit.")
+        if results is None:
+            results = [detector.last_results for detector in self.detectors]
         
+        main_frame = main_frame.copy()
+        for mode, detector, mode_results in zip(self.modes, self.detectors, results):
+            if mode_results is not None:
+                getattr(detector, self.MODES[mode][1])(main_frame, mode_results)
+        return main_frame
+    
+    def preprocess(self, ctx):
+        """
+        Build the shared RGB buffer and hand every member its own frame context.
+        
+        The buffer is made once per inferred frame: RGB frames from the FFmpeg
+        backend are used as they are, otherwise the frame is resized and
+        converted once instead of once per model. Members get it as
+        shared_input and the capture's own frames as in single mode, so the
+        fall detector's motion gate always sees frames of the same colour order
+        and its ROI crops are cut at full resolution. Members may still change
+        their own infer decision (the motion gate).
+        """
+        shared_input = ctx.rgb_frame
+        if ctx.infer and shared_input is None:
+            shared_input = self.rgb_input.prepare(ctx.frame, self.resolution)
+        
+        ctx.members = []
+        for detector in self.detectors:
+            member = FrameContext(ctx.index)
+            member.frame = ctx.frame
+            member.rgb_frame = ctx.rgb_frame  # As in single mode: the motion gate and ROI crops use it
+            member.shared_input = shared_input
+            member.display_frame = ctx.display_frame
+            member.timestamp = ctx.timestamp
+            member.fps = ctx.fps
+            member.infer = ctx.infer
+            detector.preprocess(member)
+            ctx.members.append(member)
+        
+        ctx.infer = any(member.infer for member in ctx.members)
+    
+    def infer_member(self, detector, member):
+        start = time.perf_counter()
+        detector.infer(member)
+        member.timings["infer"] = time.perf_counter() - start
+        member.inferred = True
+    
+    def infer(self, ctx):
+        """Run the members' inferences concurrently on the shared, read-only buffer"""
+        jobs = [(detector, member) for detector, member in zip(self.detectors, ctx.members) if member.infer]
+        inputs = {id(member.model_input): member.model_input for _, member in jobs}
+        for image in inputs.values():
+            image.flags.writeable = False
         try:
-            # For FPS calculation
-            prev_time = time.time()
-            frame_counter = 0
-            fps = 0
-            last_alert_time = 0
-            
-            while True:
-                # Read a frame from the camera
-                ret, frame = self.cap.read()
-                
-                if not ret:
-                    print("Failed to grab frame. Reconnecting...")
-                    self.cap.release()
-                    if not self.connect_camera():
-                        break
-                    continue
-                
-                # Calculate FPS
-                frame_counter += 1
-                if (time.time() - prev_time) > 1:
-                    fps = frame_counter
-                    frame_counter = 0
-                    prev_time = time.time()
-                
-                # Skip frames to improve performance
-                self.frame_count += 1
-                if self.frame_count % self.process_every_n_frames != 0:
-                    continue
-                
-                # Make a copy of the frame for display
-                display_frame = frame.copy()
-                
-                # Add timestamp to the frame
-                timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                cv2.putText(display_frame, timestamp, (10, 30), 
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
-                
-                # Detect faces in the frame
-                faces_detected, display_frame, num_faces = self.detect_faces(display_frame)
-                
-                # If faces are detected, we can optionally send alerts and record
-                if faces_detected:
-                    # Send Discord alert (but not too frequently)
-                    current_time = time.time()
-                    if current_time - last_alert_time > MIN_TIME_BETWEEN_ALERTS:
-                        if self.discord_webhook:
-                            threading.Thread(
-                                target=self.send_discord_alert,
-                                args=(num_faces, display_frame.copy()),  # Pass the frame to the alert method
-                                daemon=True
-                            ).start()
-                        last_alert_time = current_time
-                    
-                    # Save screenshot if recording is enabled
-                    if self.record_detections and not self.recording:
-                        self.save_screenshot(display_frame)
-                        self.start_recording(display_frame)
-                
-                # Record video if in recording mode
-                if self.recording:
-                    self.video_writer.write(display_frame)
-                    
-                    # Add a green border to indicate recording
-                    cv2.rectangle(display_frame, (0, 0), 
-                                 (display_frame.shape[1], display_frame.shape[0]), 
-                                 (0, 255, 0), 5)
-                    
-                    # Stop recording after 10 seconds
-                    if time.time() - self.record_start_time > 10:
-                        self.stop_recording()
-                
-                # Add status text
-                status_text = "Status: "
-                if self.recording:
-                    status_text += "RECORDING FACE EVENT"
-                    status_color = (0, 255, 0)
-                elif faces_detected:
-                    status_text += f"{num_faces} FACE(S) DETECTED!"
-                    status_color = (0, 255, 0)
-                else:
-                    status_text += "Monitoring"
-                    status_color = (255, 255, 255)
-                
-                cv2.putText(display_frame, status_text, (10, 60), 
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.7, status_color, 2)
-                
-                # Add FPS display
-                cv2.putText(display_frame, f"FPS: {fps}", (display_frame.shape[1] - 120, 30),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-                
-                # Display the frame if required
-                if self.display:
-                    cv2.imshow("Face Detection", display_frame)
-                    
-                    # Press 'q' to exit
-                    if cv2.waitKey(1) & 0xFF == ord('q'):
-                        break
-                
-                # Small delay to reduce CPU usage
-                time.sleep(0.005)
-                
-        except KeyboardInterrupt:
-            print("Interrupted by user")
+            futures = [self.executor.submit(self.infer_member, detector, member) for detector, member in jobs]
+            for future in futures:
+                future.result()
         finally:
-            # Clean up
-            if self.recording:
-                self.stop_recording()
-            
-            if self.cap is not None:
-                self.cap.release()
+            for image in inputs.values():
+                image.flags.writeable = True
+        
+        for mode, member in zip(self.modes, ctx.members):
+            if member.inferred:
+                self.metrics["inferences"][mode] += 1
+                self.metrics["infer_seconds"][mode] += member.timings["infer"]
+    
+    def postprocess(self, ctx):
+        for detector, member in zip(self.detectors, ctx.members):
+            detector.postprocess(member)
+        
+        ctx.results = self.last_results = [member.results for member in ctx.members]
+        ctx.detected = any(member.detected for member in ctx.members)
+        ctx.activity = any(member.activity for member in ctx.members)
+        ctx.alert = any(member.alert for member in ctx.members)
+    
+    def annotate(self, ctx):
+        for detector, member in zip(self.detectors, ctx.members):
+            detector.annotate(member)
+    
+    def handle_alert(self, ctx):
+        """Let every member alert as it would on its own, and merge new detections into one event stream"""
+        new_events = []
+        for mode, detector, member in zip(self.modes, self.detectors, ctx.members):
+            detector.handle_alert(member)
             
-            cv2.destroyAllWindows()
-            print("Face detection stopped")
+            # A mode becoming active is one event, however many frames it stays active
+            if member.inferred:
+                if member.detected and not self.detecting[mode]:
+                    new_events.append({
+                        "time": ctx.timestamp,
+                        "mode": mode,
+                        "count": member.count
+                    })
+                self.detecting[mode] = member.detected
+        
+        for event in new_events:
+            self.events.append(event)
+            self.metrics["events"][event["mode"]] += 1
+            print(f"Event: {event['mode']} detection ({event['count']}) at {event['time']:.2f}")
+        
+        if new_events and self.record_detections and not self.recording:
+            self.start_recording(self.evidence_frame(ctx.display_frame, ctx.results), ctx.timestamp)
+    
+    def status(self, ctx):
+        """Status line text and colour: the members' statuses that are not plain monitoring"""
+        if self.recording:
+            return "RECORDING EVENT", (0, 0, 255)
+        if self.is_idle():
+            return "Idle (low-rate decoding)", (160, 160, 160)
+        
+        statuses = [detector.status(member) for detector, member in zip(self.detectors, ctx.members)]
+        statuses = [status for status in statuses if status[0] != "Monitoring"]
+        if statuses:
+            return " | ".join(text for text, _ in statuses), statuses[0][1]
+        return "Monitoring", (0, 255, 0)
+    
+    def close_model(self):
+        self.executor.shutdown(wait=True)
+        for detector in self.detectors:
+            detector.close_model()
+    
+    def get_metrics(self):
+        """Events and average inference time per mode"""
+        return {
+            mode: {
+                "events": self.metrics["events"][mode],
+                "inferences": self.metrics["inferences"][mode],
+                "avg_infer_ms": round(self.metrics["infer_seconds"][mode] * 1000 / self.metrics["inferences"][mode], 2)
+                                if self.metrics["inferences"][mode] else 0.0
+            }
+            for mode in self.modes
+        }
+    
+    def build_pipeline(self):
+        """The combined detection loop as pipeline stages"""
+        metrics = {"Combined": self.get_metrics}
+        for detector in self.detectors:
+            if getattr(detector, "motion_gate", None) is not None:
+                metrics["Motion gate"] = detector.motion_gate.get_metrics
+            if getattr(detector, "roi", None) is not None:
+                metrics["ROI"] = detector.roi.get_metrics
+        
+        return DetectionPipeline(
+            self, "combined", "Combined Detection",
+            preprocess=self.preprocess,
+            infer=self.infer,
+            postprocess=self.postprocess,
+            annotate=self.annotate,
+            alert=self.handle_alert,
+            status=self.status,
+            record_seconds=15,
+            record_color=(0, 0, 255),
+            metrics=metrics
+        )
+    
+    def run(self):
+        """Run every selected detection on the camera"""
+        self.pipeline.run()
 
 def main():
     """Main function to run the detector"""
@@ -1398,6 +1838,9 @@ def main():
     parser.add_argument("--user", default="admin", help="Camera username")
     parser.add_argument("--pass", dest="password", default="12345678", help="Camera password")
     parser.add_argument("--path", default="/tcp/av0_0", help="Camera RTSP path")
+    parser.add_argument("--substream-path", default=None,
+                       help="Low-resolution RTSP substream path for inference (e.g. /tcp/av0_1); "
+                            "the main --path stream is then only opened for screenshots, recordings and alerts")
     
     # Detection parameters
     parser.add_argument("--min-detection-confidence", type=float, default=0.7, 
@@ -1406,12 +1849,53 @@ def main():
                        help="Minimum confidence for tracking")
     parser.add_argument("--fall-threshold", type=float, default=0.3, 
                        help="Threshold for vertical movement to detect fall")
+    parser.add_argument("--fall-window", type=float, default=0.5,
+                       help="Fall mode: seconds the shoulder drop is measured over, checked on every analysed pose")
+    parser.add_argument("--posture-window", type=float, default=0.3,
+                       help="Fall mode: seconds the torso angle and bounding-box aspect ratio are averaged over")
+    parser.add_argument("--prediction-horizon", type=float, default=0.5,
+                       help="Fall mode: on frames without inference, draw landmarks predicted from their velocity, "
+                            "fading out over this many seconds (0 redraws the last result)")
     
     # Performance parameters
     parser.add_argument("--skip-frames", type=int, default=2,
                        help="Process every nth frame (higher values increase speed)")
     parser.add_argument("--resolution", type=int, default=480,
                        help="Processing resolution (lower values increase speed)")
+    parser.add_argument("--qos-budget-ms", type=float, default=None,
+                       help="Fall mode: inference time budget per frame in ms; resolution, frame skip and model "
+                            "complexity are adjusted at runtime to stay within it (default: fixed settings)")
+    parser.add_argument("--backend", choices=["opencv", "ffmpeg"], default="opencv",
+                       help="Capture backend: opencv (cv2.VideoCapture) or ffmpeg (subprocess decoding straight to RGB at the processing resolution)")
+    parser.add_argument("--motion-gate", choices=["off", "low", "medium", "high"], default="off",
+                       help="Fall mode: skip pose inference while the MOG2 motion pass sees no motion and nobody "
+                            "is tracked, at this sensitivity (default off: pose runs on every processed frame)")
+    parser.add_argument("--roi-crop", action="store_true",
+                       help="Fall mode: run pose on a padded crop around the person (previous landmarks or "
+                            "motion) instead of the whole downscaled frame")
+    parser.add_argument("--pose-backend", choices=["legacy", "tasks"], default="legacy",
+                       help="Fall mode: legacy mp.solutions.pose (synchronous) or tasks PoseLandmarker in "
+                            "LIVE_STREAM mode (asynchronous, needs the .task bundles in --pose-model-dir)")
+    parser.add_argument("--num-poses", type=int, default=1,
+                       help="Fall mode with the tasks backend: maximum number of people detected per frame")
+    parser.add_argument("--pose-model-dir", default="models",
+                       help="Directory with pose_landmarker_{lite,full,heavy}.task for the tasks backend")
+    parser.add_argument("--max-people", type=int, default=1,
+                       help="Fall mode: people tracked and analysed per frame, each with their own filter and fall "
+                            "state (at risk first, then longest tracked, then largest new)")
+    parser.add_argument("--people-crops", action="store_true",
+                       help="Fall mode with --max-people > 1 and the legacy backend: run pose on a crop per tracked "
+                            "person and per new motion blob instead of once on the full frame")
+    parser.add_argument("--frames-in-flight", type=int, default=1,
+                       help="Pipeline capture, inference and annotation/output on separate threads with up to this "
+                            "many frames in flight (1 runs them in sequence; 3 overlaps all three)")
+    parser.add_argument("--capture-process", action="store_true",
+                       help="Decode the camera in a separate process and pass frames through a shared-memory ring")
+    parser.add_argument("--idle-after", type=float, default=0,
+                       help="Seconds without detections or motion before decoding drops to keyframes "
+                            "only (ffmpeg backend) or --idle-fps frames (opencv); default 0: disabled")
+    parser.add_argument("--idle-fps", type=float, default=1.0,
+                       help="Frames per second retrieved in idle mode with the opencv backend")
     
     # Other parameters
     parser.add_argument("--no-display", action="store_true", 
@@ -1422,17 +1906,30 @@ def main():
                        help="Directory to save detection screenshots and videos")
     parser.add_argument("--use-vlc", action="store_true", 
                        help="Use VLC to view the camera feed instead of OpenCV")
-    parser.add_argument("--discord-webhook", default=DISCORD_WEBHOOK,
-                      help="Discord webhook URL for sending alerts")
+    parser.add_argument("--discord-webhook", default=None,
+                      help="Discord webhook URL for sending alerts (default: the built-in webhook, none when replaying)")
     parser.add_argument("--verify-ssl", action="store_true",
                       help="Verify SSL certificates for HTTPS requests")
     
+    # Offline replay
+    parser.add_argument("--replay", default=None,
+                      help="Replay a video file, a directory of clips or images, or a glob pattern instead of the camera")
+    parser.add_argument("--replay-realtime", action="store_true",
+                      help="Pace the replay at the clip's own frame timestamps instead of as fast as possible")
+    
     # Mode selection
-    parser.add_argument("--mode", choices=["fall", "hand", "face"], default="fall",
-                      help="Detection mode: fall for fall detection, hand for hand detection, face for face detection")
+    parser.add_argument("--mode", choices=["fall", "hand", "face", "combined"], default="fall",
+                      help="Detection mode: fall for fall detection, hand for hand detection, face for face detection, "
+                           "combined for the --models detections on one decoded stream")
+    parser.add_argument("--models", default="fall,hand,face",
+                      help="Combined mode: comma-separated detections to run on each frame (fall, hand, face)")
     
     args = parser.parse_args()
     
+    # Replays are for benchmarks and regression runs, so they only alert when asked to
+    if args.discord_webhook is None and not args.replay:
+        args.discord_webhook = DISCORD_WEBHOOK
+    
     if args.use_vlc:
         # Open the camera feed in VLC
         url = f"rtsp://{args.user}:{args.password}@{args.ip}:{args.port}{args.path}"
@@ -1448,7 +1945,7 @@ def main():
         else:
             print("Video recording is disabled")
         
-        print("Discord notifications are enabled")
+        print("Discord notifications are enabled" if args.discord_webhook else "Discord notifications are disabled")
         if not args.verify_ssl:
             print("SSL certificate verification is disabled")
         
@@ -1465,12 +1962,32 @@ def main():
             record_falls=args.record_video,
             output_dir=args.output_dir,
             discord_webhook=args.discord_webhook,
-            verify_ssl=args.verify_ssl
+            verify_ssl=args.verify_ssl,
+            capture_backend=args.backend,
+            camera_substream_path=args.substream_path,
+            idle_after=args.idle_after,
+            idle_fps=args.idle_fps,
+            replay_source=args.replay,
+            replay_realtime=args.replay_realtime,
+            capture_process=args.capture_process,
+            motion_gate=None if args.motion_gate == "off" else args.motion_gate,
+            roi_crop=args.roi_crop,
+            resolution=args.resolution,
+            qos_budget_ms=args.qos_budget_ms,
+            pose_backend=args.pose_backend,
+            num_poses=args.num_poses,
+            pose_model_dir=args.pose_model_dir,
+            max_people=args.max_people,
+            people_crops=args.people_crops
         )
         
         # Set the performance parameters
         detector.fall_threshold = args.fall_threshold
+        detector.fall_window = args.fall_window
+        detector.posture_window = args.posture_window
+        detector.prediction_horizon = args.prediction_horizon
         detector.process_every_n_frames = args.skip_frames
+        detector.pipeline.frames_in_flight = args.frames_in_flight
         
         detector.run()
     
@@ -1482,7 +1999,7 @@ def main():
         else:
             print("Video recording is disabled")
         
-        print("Discord notifications are enabled")
+        print("Discord notifications are enabled" if args.discord_webhook else "Discord notifications are disabled")
         if not args.verify_ssl:
             print("SSL certificate verification is disabled")
         
@@ -1499,11 +2016,20 @@ def main():
             record_detections=args.record_video,
             output_dir=os.path.join(args.output_dir, "hands"),
             discord_webhook=args.discord_webhook,
-            verify_ssl=args.verify_ssl
+            verify_ssl=args.verify_ssl,
+            capture_backend=args.backend,
+            camera_substream_path=args.substream_path,
+            idle_after=args.idle_after,
+            idle_fps=args.idle_fps,
+            replay_source=args.replay,
+            replay_realtime=args.replay_realtime,
+            capture_process=args.capture_process,
+            resolution=args.resolution
         )
         
         # Set the performance parameters
         detector.process_every_n_frames = args.skip_frames
+        detector.pipeline.frames_in_flight = args.frames_in_flight
         
         detector.run()
     
@@ -1515,7 +2041,7 @@ def main():
         else:
             print("Video recording is disabled")
         
-        print("Discord notifications are enabled")
+        print("Discord notifications are enabled" if args.discord_webhook else "Discord notifications are disabled")
         if not args.verify_ssl:
             print("SSL certificate verification is disabled")
         
@@ -1531,11 +2057,72 @@ def main():
             record_detections=args.record_video,
             output_dir=os.path.join(args.output_dir, "faces"),
             discord_webhook=args.discord_webhook,
-            verify_ssl=args.verify_ssl
+            verify_ssl=args.verify_ssl,
+            capture_backend=args.backend,
+            camera_substream_path=args.substream_path,
+            idle_after=args.idle_after,
+            idle_fps=args.idle_fps,
+            replay_source=args.replay,
+            replay_realtime=args.replay_realtime,
+            capture_process=args.capture_process,
+            resolution=args.resolution
+        )
+        
+        # Set the performance parameters
+        detector.process_every_n_frames = args.skip_frames
+        detector.pipeline.frames_in_flight = args.frames_in_flight
+        
+        detector.run()
+    
+    elif args.mode == "combined":
+        modes = [mode.strip() for mode in args.models.split(",") if mode.strip()]
+        print("\n=== MediaPipe Combined Detection System ===")
+        print(f"System will run {', '.join(modes)} detection on each decoded frame")
+        if args.record_video:
+            print("Video recording is enabled")
+        else:
+            print("Video recording is disabled")
+        
+        print("Discord notifications are enabled" if args.discord_webhook else "Discord notifications are disabled")
+        if not args.verify_ssl:
+            print("SSL certificate verification is disabled")
+        
+        # Create and run the combined detector
+        detector = CombinedDetector(
+            modes=modes,
+            camera_ip=args.ip,
+            camera_port=args.port,
+            camera_user=args.user,
+            camera_pass=args.password,
+            camera_path=args.path,
+            min_detection_confidence=args.min_detection_confidence,
+            min_tracking_confidence=args.min_tracking_confidence,
+            display=not args.no_display,
+            record_detections=args.record_video,
+            output_dir=args.output_dir,
+            discord_webhook=args.discord_webhook,
+            verify_ssl=args.verify_ssl,
+            capture_backend=args.backend,
+            camera_substream_path=args.substream_path,
+            idle_after=args.idle_after,
+            idle_fps=args.idle_fps,
+            replay_source=args.replay,
+            replay_realtime=args.replay_realtime,
+            capture_process=args.capture_process,
+            motion_gate=None if args.motion_gate == "off" else args.motion_gate,
+            roi_crop=args.roi_crop,
+            resolution=args.resolution
         )
         
         # Set the performance parameters
+        for member in detector.detectors:
+            if isinstance(member, PoseDetector):
+                member.fall_threshold = args.fall_threshold
+                member.fall_window = args.fall_window
+                member.posture_window = args.posture_window
+                member.prediction_horizon = args.prediction_horizon
         detector.process_every_n_frames = args.skip_frames
+        detector.pipeline.frames_in_flight = args.frames_in_flight
         
         detector.run()
 
@@ -0,0 +1,136 @@
+"""
+Streaming fall features over sliding time windows.
+
+The fall check used to compare the shoulders with a snapshot taken at least
+half a second earlier, so it ran about twice a second and a fall could be seen
+up to half a second late. FallFeatures instead keeps every analysed pose of the
+last few tenths of a second in fixed-size rings and updates these features in
+constant time per pose:
+
+    drop              downward shoulder movement over the motion window
+    velocity          vertical shoulder velocity over the motion window (down is positive)
+    acceleration      change of that velocity over the motion window
+    shoulder_hip_ratio  vertical shoulder-to-hip distance of the latest pose
+    torso_angle       angle of the hip-to-shoulder line from vertical, in degrees
+                      (0 upright, 90 horizontal), averaged over the posture window
+    aspect_ratio      width / height of the landmarks' bounding box, averaged over the posture window
+
+so the fall check can run on every analysed pose. Each pose enters a window
+once and leaves it once, and window means are running sums, so an update costs
+the same however long the windows are.
+"""
+import math
+import types
+import numpy as np
+from landmark_filter import X, Y
+
+# Landmark indices (mp.solutions.pose.PoseLandmark)
+LEFT_SHOULDER, RIGHT_SHOULDER, LEFT_HIP, RIGHT_HIP = 11, 12, 23, 24
+
+MAX_POSE_RATE = 60  # Poses per second the rings are sized for
+
+class SlidingWindow:
+    """
+    The samples of the last `seconds` in a fixed ring, with their running sum.
+
+    The newest sample that is at least `seconds` old is kept as the oldest, so
+    a difference against it spans the whole window; older ones (or the oldest,
+    when the ring is full) are evicted as new samples are pushed.
+    """
+    def __init__(self, seconds, width=1, capacity=64):
+        self.seconds = seconds
+        self.capacity = capacity
+        self.times = np.zeros(capacity)
+        self.values = np.zeros((capacity, width))
+        self.sum = np.zeros(width)
+        self.start = 0  # Ring index of the oldest sample
+        self.count = 0
+
+    def push(self, timestamp, values):
+        while self.count and (self.count == self.capacity or (
+                self.count > 1 and timestamp - self.times[(self.start + 1) % self.capacity] >= self.seconds)):
+            self.sum -= self.values[self.start]
+            self.start = (self.start + 1) % self.capacity
+            self.count -= 1
+
+        end = (self.start + self.count) % self.capacity
+        self.times[end] = timestamp
+        self.values[end] = values
+        self.sum += values
+        self.count += 1
+
+    def full(self):
+        return self.count == self.capacity
+
+    def oldest(self):
+        """Time and values of the oldest sample in the window"""
+        return self.times[self.start], self.values[self.start]
+
+    def mean(self):
+        return self.sum / self.count
+
+class FallFeatures:
+    """
+    Fall features of one person, updated with each filtered pose.
+
+    motion_window is the span drop, velocity and acceleration are measured over
+    (the fall check's comparison span); posture_window smooths the posture
+    features. Motion features stay 0 until a whole motion window of poses has
+    been seen, so a new track does not decide on a few frames; above
+    MAX_POSE_RATE they are measured over the shorter span the rings hold.
+    """
+    def __init__(self, motion_window=0.5, posture_window=0.3):
+        self.motion_window = motion_window
+        capacity = int(max(motion_window, posture_window) * MAX_POSE_RATE) + 2
+        self.shoulders = SlidingWindow(motion_window, capacity=capacity)
+        self.velocities = SlidingWindow(motion_window, capacity=capacity)
+        self.posture = SlidingWindow(posture_window, width=2, capacity=capacity)
+        self.current = None
+
+    def update(self, landmarks, timestamp, aspect=1.0):
+        """
+        Add a filtered pose ((33, 4) landmark array) at its capture time.
+
+        aspect is the frame's width / height, as landmarks are normalized to each.
+        Returns the features as a namespace (also kept as current).
+        """
+        shoulder_x = (landmarks[LEFT_SHOULDER, X] + landmarks[RIGHT_SHOULDER, X]) / 2
+        shoulder_y = (landmarks[LEFT_SHOULDER, Y] + landmarks[RIGHT_SHOULDER, Y]) / 2
+        hip_x = (landmarks[LEFT_HIP, X] + landmarks[RIGHT_HIP, X]) / 2
+        hip_y = (landmarks[LEFT_HIP, Y] + landmarks[RIGHT_HIP, Y]) / 2
+
+        # Posture of this pose
+        shoulder_hip_ratio = abs(shoulder_y - hip_y)
+        torso_angle = math.degrees(math.atan2(abs(shoulder_x - hip_x) * aspect, hip_y - shoulder_y))
+        width = (landmarks[:, X].max() - landmarks[:, X].min()) * aspect
+        height = landmarks[:, Y].max() - landmarks[:, Y].min()
+        aspect_ratio = width / height if height > 0 else 0.0
+        self.posture.push(timestamp, (torso_angle, aspect_ratio))
+
+        # Motion over the window: against its oldest pose
+        self.shoulders.push(timestamp, shoulder_y)
+        start_time, (start_y,) = self.shoulders.oldest()
+        span = timestamp - start_time
+        drop = velocity = acceleration = 0.0
+        if span >= self.motion_window or self.shoulders.full():
+            drop = shoulder_y - start_y
+            velocity = drop / span
+
+            self.velocities.push(timestamp, velocity)
+            start_time, (start_velocity,) = self.velocities.oldest()
+            span = timestamp - start_time
+            if span >= self.motion_window or self.velocities.full():
+                acceleration = (velocity - start_velocity) / span
+
+        mean_angle, mean_aspect = self.posture.mean()
+        self.current = types.SimpleNamespace(
+            shoulder_y=shoulder_y,
+            hip_y=hip_y,
+            drop=drop,
+            velocity=velocity,
+            acceleration=acceleration,
+            shoulder_hip_ratio=shoulder_hip_ratio,
+            torso_angle=mean_angle,
+            aspect_ratio=mean_aspect
+        )
+        return self.current
@@ -0,0 +1,403 @@
+"""
+Process pool of MediaPipe inference workers.
+
+Each camera is pinned to one worker process (the one with the fewest cameras
+when it first submits a frame), and that worker keeps a Pose / Hands /
+FaceDetection instance per camera, created with the camera's own settings.
+Every model therefore only ever sees consecutive frames of a single camera and
+runs in tracking mode (static_image_mode=False) like the single-camera
+detectors. Frames are written into a shared-memory arena of input slots and
+the slot index is put on the camera's worker's task queue, so frames are never
+pickled. Only the (small) MediaPipe result protobufs travel back.
+
+Results are tagged with the camera id and frame id they belong to and are
+handed out per camera in submission order, so per-camera state such as
+LandmarkFilter sees frames in sequence.
+
+Throughput scales across cores with the number of cameras; a single camera
+runs on one worker at a time.
+
+InferencePool.model(camera_id, mode, **model_options) returns an object with
+MediaPipe's process()/close() interface that can be passed to a detector as
+shared_model.
+"""
+import time
+import threading
+import collections
+import queue
+import multiprocessing
+import types
+import numpy as np
+from multiprocessing import shared_memory
+from shm_ring import attach_shared_memory
+
+# Result fields of each detection mode that the detectors use
+RESULT_FIELDS = {
+    "fall": ("pose_landmarks",),
+    "hand": ("multi_hand_landmarks", "multi_handedness"),
+    "face": ("detections",)
+}
+
+def create_model(mode, min_detection_confidence=0.7, min_tracking_confidence=0.5, static_image_mode=False,
+                 model_complexity=1):
+    """MediaPipe model for a detection mode, configured like the single-camera detectors"""
+    import mediapipe as mp
+
+    if mode == "fall":
+        return mp.solutions.pose.Pose(
+            static_image_mode=static_image_mode,
+            model_complexity=model_complexity,
+            enable_segmentation=False,
+            min_detection_confidence=min_detection_confidence,
+            min_tracking_confidence=min_tracking_confidence
+        )
+    if mode == "hand":
+        return mp.solutions.hands.Hands(
+            static_image_mode=static_image_mode,
+            max_num_hands=2,
+            min_detection_confidence=min_detection_confidence,
+            min_tracking_confidence=min_tracking_confidence
+        )
+    if mode == "face":
+        return mp.solutions.face_detection.FaceDetection(
+            model_selection=1,
+            min_detection_confidence=min_detection_confidence
+        )
+    raise ValueError(f"Unknown detection mode: {mode}")
+
+def empty_result(mode, camera_id=None, frame_id=None):
+    """A result with nothing detected, used when inference failed"""
+    fields = {field: None for field in RESULT_FIELDS[mode]}
+    return types.SimpleNamespace(camera_id=camera_id, frame_id=frame_id, **fields)
+
+def _worker_main(worker_id, modes, model_options, arena_name, slot_bytes, task_queue, result_queue):
+    """
+    Worker process: load a model per mode, then run tasks until a None task arrives.
+
+    ("model", camera_id, mode, options) tasks give a camera its own model; the
+    models loaded at start-up go to the first cameras whose options match.
+    """
+    arena = attach_shared_memory(arena_name)
+    try:
+        spare = {mode: create_model(mode, **model_options) for mode in modes}
+    except Exception as e:
+        result_queue.put(("failed", f"worker {worker_id}: {e}"))
+        arena.close()
+        return
+    result_queue.put(("ready", worker_id))
+
+    # (camera_id, mode) -> that camera's model
+    models = {}
+    try:
+        while True:
+            task = task_queue.get()
+            if task is None:
+                break
+
+            if task[0] == "model":
+                _, camera_id, mode, options = task
+                model = spare.pop(mode) if mode in spare and options == model_options else None
+                try:
+                    models[(camera_id, mode)] = model or create_model(mode, **options)
+                except Exception as e:
+                    print(f"Inference worker {worker_id}: could not load {mode} model for camera {camera_id}: {e}")
+                continue
+
+            _, camera_id, frame_id, mode, slot, shape = task
+            image = np.ndarray(shape, dtype=np.uint8, buffer=arena.buf, offset=slot * slot_bytes)
+            image.flags.writeable = False
+
+            start = time.perf_counter()
+            try:
+                results = models[(camera_id, mode)].process(image)
+                # Protobuf messages pickle compactly; only these fields cross the process boundary
+                fields = {field: getattr(results, field) for field in RESULT_FIELDS[mode]}
+                error = None
+            except Exception as e:
+                fields = None
+                error = str(e)
+            del image
+
+            result_queue.put(("result", (camera_id, frame_id, slot, worker_id,
+                                         time.perf_counter() - start, fields, error)))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for model in list(models.values()) + list(spare.values()):
+            model.close()
+        arena.close()
+
+class InferencePool:
+    """
+    Worker processes running inference tasks, each camera pinned to one worker.
+
+    submit() copies a frame into a free input slot (blocking while all slots are
+    in use) and get_result(camera_id) returns that camera's results in the order
+    its frames were submitted. The confidence and complexity arguments are the
+    defaults for cameras registered without options of their own.
+    """
+    def __init__(self, modes=("fall",), workers=None, slots=None, max_frame_shape=(720, 1280, 3),
+                 min_detection_confidence=0.7, min_tracking_confidence=0.5, model_complexity=1,
+                 ready_timeout=120):
+        self.modes = tuple(modes)
+        self.workers = workers or max(1, multiprocessing.cpu_count() - 1)
+        self.slots = slots or 2 * self.workers  # Enough to keep every worker busy while results are collected
+        self.max_frame_shape = max_frame_shape
+        self.slot_bytes = int(np.prod(max_frame_shape))
+
+        self.arena = shared_memory.SharedMemory(create=True, size=self.slots * self.slot_bytes)
+        self.free_slots = collections.deque(range(self.slots))
+        self.slot_available = threading.Condition()
+
+        # spawn: forking a process that already runs capture threads is not safe
+        context = multiprocessing.get_context("spawn")
+        self.task_queues = [context.Queue() for _ in range(self.workers)]
+        self.result_queue = context.Queue()
+        self.model_options = {
+            "min_detection_confidence": min_detection_confidence,
+            "min_tracking_confidence": min_tracking_confidence,
+            "model_complexity": model_complexity
+        }
+        self.processes = [
+            context.Process(
+                target=_worker_main,
+                args=(worker_id, self.modes, self.model_options, self.arena.name, self.slot_bytes,
+                      self.task_queues[worker_id], self.result_queue),
+                daemon=True
+            )
+            for worker_id in range(self.workers)
+        ]
+        for process in self.processes:
+            process.start()
+
+        # Worker each camera is pinned to, and the (camera_id, mode) models created so far
+        self.assign_lock = threading.Lock()
+        self.camera_workers = {}
+        self.registered = set()
+
+        # Per camera: frame ids in submission order and results that arrived early
+        self.results_lock = threading.Condition()
+        self.pending = collections.defaultdict(collections.deque)
+        self.completed = collections.defaultdict(dict)
+
+        self.stats = {
+            "submitted": 0,
+            "completed": 0,
+            "errors": 0,
+            "inference_seconds": 0.0,
+            "per_worker": [0] * self.workers,
+            "cameras_per_worker": [0] * self.workers
+        }
+
+        self.running = True
+        try:
+            self._wait_until_ready(ready_timeout)
+        except RuntimeError:
+            self.close()
+            raise
+        self.collector = threading.Thread(target=self._collect_results, daemon=True)
+        self.collector.start()
+
+    def _wait_until_ready(self, timeout):
+        """Block until every worker has loaded its models"""
+        deadline = time.time() + timeout
+        ready = 0
+        while ready < self.workers:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                raise RuntimeError(f"Only {ready} of {self.workers} inference workers started")
+            try:
+                kind, payload = self.result_queue.get(timeout=remaining)
+            except queue.Empty:
+                continue
+            if kind == "failed":
+                raise RuntimeError(f"Inference worker could not load its models ({payload})")
+            if kind == "ready":
+                ready += 1
+
+    def _collect_results(self):
+        while self.running:
+            try:
+                kind, payload = self.result_queue.get(timeout=0.5)
+            except Exception:
+                continue
+            if kind != "result":
+                continue
+
+            camera_id, frame_id, slot, worker_id, seconds, fields, error = payload
+
+            with self.slot_available:
+                self.free_slots.append(slot)
+                self.slot_available.notify()
+
+            with self.results_lock:
+                self.stats["completed"] += 1
+                self.stats["inference_seconds"] += seconds
+                self.stats["per_worker"][worker_id] += 1
+                if error is not None:
+                    self.stats["errors"] += 1
+                    print(f"Inference failed for camera {camera_id} frame {frame_id}: {error}")
+                
+                # Results of abandoned frames are dropped
+                if frame_id in self.pending[camera_id]:
+                    self.completed[camera_id][frame_id] = (fields, error)
+                    self.results_lock.notify_all()
+
+    def register(self, camera_id, mode, **model_options):
+        """
+        Pin camera_id to the worker with the fewest cameras (if it is not pinned
+        yet) and have that worker create the camera's model for mode.
+
+        model_options override the pool's defaults. Cameras that submit without
+        registering get a model with the defaults.
+        """
+        if mode not in self.modes:
+            raise ValueError(f"Pool was started without models for mode {mode!r}")
+        with self.assign_lock:
+            if (camera_id, mode) in self.registered:
+                return self.camera_workers[camera_id]
+
+            worker_id = self.camera_workers.get(camera_id)
+            if worker_id is None:
+                counts = self.stats["cameras_per_worker"]
+                worker_id = min(range(self.workers), key=lambda worker: counts[worker])
+                self.camera_workers[camera_id] = worker_id
+                counts[worker_id] += 1
+
+            self.registered.add((camera_id, mode))
+            options = {**self.model_options, **model_options}
+            self.task_queues[worker_id].put(("model", camera_id, mode, options))
+            return worker_id
+
+    def submit(self, camera_id, frame_id, mode, frame, timeout=None):
+        """
+        Queue an RGB frame for inference. frame_id must be unique per camera.
+
+        Blocks while all input slots are in use; returns False if timeout expires first.
+        """
+        worker_id = self.register(camera_id, mode)
+        if frame.size > self.slot_bytes or frame.ndim != 3:
+            raise ValueError(f"Frame {frame.shape} does not fit the pool's max frame shape {self.max_frame_shape}")
+
+        with self.slot_available:
+            if not self.slot_available.wait_for(lambda: self.free_slots, timeout=timeout):
+                return False
+            slot = self.free_slots.popleft()
+
+        target = np.ndarray(frame.shape, dtype=np.uint8, buffer=self.arena.buf, offset=slot * self.slot_bytes)
+        np.copyto(target, frame)
+        del target
+
+        with self.results_lock:
+            self.pending[camera_id].append(frame_id)
+            self.stats["submitted"] += 1
+
+        self.task_queues[worker_id].put(("frame", camera_id, frame_id, mode, slot, frame.shape))
+        return True
+
+    def get_result(self, camera_id, mode, timeout=10.0):
+        """
+        Return the result for the oldest submitted frame of camera_id.
+
+        The result has the MediaPipe result fields of the mode plus camera_id and
+        frame_id. Returns None if it did not arrive within timeout.
+        """
+        with self.results_lock:
+            pending = self.pending[camera_id]
+            if not pending:
+                return None
+            frame_id = pending[0]
+
+            completed = self.completed[camera_id]
+            if not self.results_lock.wait_for(lambda: frame_id in completed, timeout=timeout):
+                return None
+
+            pending.popleft()
+            fields, error = completed.pop(frame_id)
+
+        if fields is None:
+            return empty_result(mode, camera_id, frame_id)
+        return types.SimpleNamespace(camera_id=camera_id, frame_id=frame_id, **fields)
+
+    def abandon(self, camera_id, frame_id):
+        """Stop waiting for a frame; its result is dropped when it arrives"""
+        with self.results_lock:
+            try:
+                self.pending[camera_id].remove(frame_id)
+            except ValueError:
+                pass
+            self.completed[camera_id].pop(frame_id, None)
+            self.results_lock.notify_all()
+    
+    def in_flight(self, camera_id):
+        """Frames of camera_id submitted but not yet returned by get_result()"""
+        with self.results_lock:
+            return len(self.pending[camera_id])
+
+    def model(self, camera_id, mode, **model_options):
+        """A per-camera stand-in for a MediaPipe solution, backed by this pool"""
+        self.register(camera_id, mode, **model_options)
+        return PooledModel(self, camera_id, mode)
+
+    def get_stats(self):
+        with self.results_lock:
+            stats = dict(self.stats)
+            stats["per_worker"] = list(self.stats["per_worker"])
+            stats["cameras_per_worker"] = list(self.stats["cameras_per_worker"])
+        stats["workers"] = self.workers
+        stats["avg_inference_ms"] = (stats["inference_seconds"] * 1000 / stats["completed"]
+                                     if stats["completed"] else 0.0)
+        return stats
+
+    def close(self):
+        """Stop the workers and free the input arena"""
+        if not self.running:
+            return
+        self.running = False
+
+        for task_queue in self.task_queues:
+            task_queue.put(None)
+        for process in self.processes:
+            process.join(timeout=10)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+
+        if hasattr(self, "collector"):
+            self.collector.join(timeout=1)
+        self.arena.close()
+        self.arena.unlink()
+
+class PooledModel:
+    """
+    process()/close() like a MediaPipe solution, running on an InferencePool.
+
+    Frame ids are assigned per camera in call order. process() waits for its own
+    result, so a detector using it behaves exactly as with a local model while
+    the pool runs other cameras' frames on the other workers.
+    """
+    def __init__(self, pool, camera_id, mode, timeout=10.0):
+        self.pool = pool
+        self.camera_id = camera_id
+        self.mode = mode
+        self.timeout = timeout
+        self.next_frame_id = 0
+
+    def process(self, image):
+        frame_id = self.next_frame_id
+        self.next_frame_id += 1
+
+        if not self.pool.submit(self.camera_id, frame_id, self.mode, image, timeout=self.timeout):
+            print(f"Camera {self.camera_id}: no free inference slot within {self.timeout}s")
+            return empty_result(self.mode, self.camera_id, frame_id)
+
+        result = self.pool.get_result(self.camera_id, self.mode, timeout=self.timeout)
+        if result is None:
+            print(f"Camera {self.camera_id}: inference result for frame {frame_id} timed out")
+            self.pool.abandon(self.camera_id, frame_id)
+            return empty_result(self.mode, self.camera_id, frame_id)
+        return result
+
+    def close(self):
+        # The pool owns the models and is closed by whoever created it
+        pass
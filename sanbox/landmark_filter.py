@@ -0,0 +1,108 @@
+"""
+Vectorized One Euro filter for pose landmarks.
+
+The filter used to run one OneEuroFilter object per coordinate: 33 landmarks x
+(x, y, z, visibility) = 132 Python objects, each reading the clock and the
+landmark protobuf on its own, plus a new class per landmark for the output.
+LandmarkFilter keeps the state of all of them in (33, 4) arrays instead and
+filters a whole pose with a few NumPy operations. The landmarks are converted
+from the protobuf to an array once per frame.
+
+The arithmetic is the scalar filter's, element by element and in the same
+order, so the output is identical (benchmark_landmark_filter.py checks this).
+"""
+import time
+import numpy as np
+
+# Columns of a landmark array
+X, Y, Z, VISIBILITY = range(4)
+
+def landmarks_to_array(landmarks):
+    """(n, 4) array of x, y, z and visibility from a sequence of landmarks (e.g. NormalizedLandmarkList.landmark)"""
+    return np.array([(landmark.x, landmark.y, landmark.z, landmark.visibility) for landmark in landmarks],
+                    dtype=np.float64)
+
+def array_to_landmark_list(landmarks):
+    """NormalizedLandmarkList protobuf from an (n, 4) landmark array, for drawing"""
+    from mediapipe.framework.formats import landmark_pb2
+
+    landmark_list = landmark_pb2.NormalizedLandmarkList()
+    for x, y, z, visibility in landmarks:
+        landmark_list.landmark.add(x=x, y=y, z=z, visibility=visibility)
+    return landmark_list
+
+def smoothing_factor(dt, cutoff):
+    """Exponential smoothing factor for a time step and a cutoff frequency (scalar or array)"""
+    tau = 1.0 / (2 * np.pi * cutoff)
+    te = dt / tau
+    return 1.0 / (1.0 + te)
+
+class LandmarkFilter:
+    """
+    One Euro filter over every coordinate of a pose.
+
+    process() returns the filtered landmarks as an (n, 4) array with columns
+    X, Y, Z and VISIBILITY. The returned array is also the filter's state for
+    the next frame, so copy it before modifying it. predict() extrapolates a
+    pose to a later time with the filtered rate of change.
+    """
+    def __init__(self, frequency=30.0, min_cutoff=1.0, beta=0.0, dcutoff=1.0):
+        self.frequency = frequency
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.dcutoff = dcutoff
+
+        self.x_prev = None   # Filtered landmarks of the previous frame
+        self.dx_prev = None  # Filtered rate of change, after the second frame
+        self.t_prev = None
+
+    def process(self, landmarks, timestamp=None):
+        """
+        Filter one pose: a sequence of landmarks or an (n, 4) array.
+
+        timestamp is the frame time in seconds; None uses the wall clock.
+        """
+        x = landmarks if isinstance(landmarks, np.ndarray) else landmarks_to_array(landmarks)
+        t = time.time() if timestamp is None else timestamp
+
+        if self.x_prev is None or self.x_prev.shape != x.shape:
+            self.x_prev = x
+            self.dx_prev = None
+            self.t_prev = t
+            return x
+
+        dt = t - self.t_prev
+
+        # Avoid division by zero
+        if dt == 0:
+            return self.x_prev
+
+        # Filtered derivative, then a cutoff that rises with the speed of each coordinate
+        dx = (x - self.x_prev) / dt
+        if self.dx_prev is not None:
+            dx_alpha = smoothing_factor(dt, self.dcutoff)
+            dx = dx_alpha * dx + (1 - dx_alpha) * self.dx_prev
+        cutoff = self.min_cutoff + self.beta * np.abs(dx)
+        alpha = smoothing_factor(dt, cutoff)
+
+        filtered = alpha * x + (1 - alpha) * self.x_prev
+
+        self.x_prev = filtered
+        self.dx_prev = dx
+        self.t_prev = t
+        return filtered
+
+    def predict(self, timestamp, landmarks=None):
+        """
+        Landmarks at timestamp, extrapolated with the filtered rate of change.
+
+        Starts from landmarks (an (n, 4) array, e.g. the last raw pose) or from
+        the filtered landmarks; visibility is not extrapolated. Returns a new
+        array, or None before the first frame.
+        """
+        if self.x_prev is None:
+            return None
+        x = (self.x_prev if landmarks is None else landmarks).copy()
+        if self.dx_prev is not None and self.dx_prev.shape == x.shape:
+            x[:, :VISIBILITY] += self.dx_prev[:, :VISIBILITY] * (timestamp - self.t_prev)
+        return x
@@ -0,0 +1,105 @@
+"""
+Motion gate in front of pose inference.
+
+Runs the background-subtraction pass from prod/fall_detection.py (MOG2, erode
+and dilate, external contours above a minimum area) on a small copy of every
+frame and decides whether MediaPipe Pose has to run: not while the room is
+still and nobody is tracked, always on the first frame of new motion.
+"""
+import cv2
+import numpy as np
+
+# Same levels as prod/fall_detection.py. min_area is in pixels of the 640x360
+# frames prod analyses and is scaled to the gate's analysis size.
+SENSITIVITY_LEVELS = {
+    'low': {'min_area': 7000, 'history': 150, 'var_threshold': 60},
+    'medium': {'min_area': 5000, 'history': 100, 'var_threshold': 50},
+    'high': {'min_area': 3000, 'history': 50, 'var_threshold': 40}
+}
+REFERENCE_AREA = 640 * 360
+
+# Decisions returned by MotionGate.check()
+GATE_SKIP = "skip"    # No motion and nobody tracked: do not run pose
+GATE_RUN = "run"      # Motion or a tracked person: run pose (frame skipping still applies)
+GATE_FORCE = "force"  # First frame of new motion: run pose on this frame
+
+class MotionGate:
+    """
+    Decide per frame whether pose inference is needed.
+
+    Counters: hits are frames the gate skipped, misses are frames it let
+    through, forced are misses on the first frame of new motion.
+    """
+    def __init__(self, sensitivity="medium", analysis_width=320):
+        params = SENSITIVITY_LEVELS[sensitivity]
+        self.sensitivity = sensitivity
+        self.analysis_width = analysis_width
+        self.min_area_fraction = params['min_area'] / REFERENCE_AREA
+
+        self.background_subtractor = cv2.createBackgroundSubtractorMOG2(
+            history=params['history'],
+            varThreshold=params['var_threshold'],
+            detectShadows=False
+        )
+        # prod uses a 5x5 kernel on 640-wide frames
+        kernel_size = max(3, int(round(5 * analysis_width / 640)) | 1)
+        self.kernel = np.ones((kernel_size, kernel_size), np.uint8)
+
+        self.motion = False
+        self.motion_boxes = []  # Moving regions as normalized (x1, y1, x2, y2)
+        self.metrics = {
+            "frames": 0,
+            "motion_frames": 0,
+            "hits": 0,
+            "misses": 0,
+            "forced": 0
+        }
+
+    def analyse(self, frame):
+        """Update the background model with a frame; returns True if it contains significant motion"""
+        h, w = frame.shape[:2]
+        analysis_height = max(1, int(h * self.analysis_width / w))
+        small_frame = cv2.resize(frame, (self.analysis_width, analysis_height), interpolation=cv2.INTER_LINEAR)
+
+        fgmask = self.background_subtractor.apply(small_frame)
+        fgmask = cv2.erode(fgmask, self.kernel, iterations=1)
+        fgmask = cv2.dilate(fgmask, self.kernel, iterations=2)
+
+        contours, _ = cv2.findContours(fgmask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        min_area = self.min_area_fraction * self.analysis_width * analysis_height
+
+        self.motion_boxes = []
+        for contour in contours:
+            if cv2.contourArea(contour) < min_area:
+                continue
+            x, y, bw, bh = cv2.boundingRect(contour)
+            self.motion_boxes.append((x / self.analysis_width, y / analysis_height,
+                                      (x + bw) / self.analysis_width, (y + bh) / analysis_height))
+
+        return bool(self.motion_boxes)
+
+    def check(self, frame, person_tracked):
+        """Analyse a clean (unannotated) frame and return GATE_SKIP, GATE_RUN or GATE_FORCE"""
+        was_motion = self.motion
+        self.motion = self.analyse(frame)
+
+        self.metrics["frames"] += 1
+        if self.motion:
+            self.metrics["motion_frames"] += 1
+
+        if self.motion and not was_motion:
+            self.metrics["misses"] += 1
+            self.metrics["forced"] += 1
+            return GATE_FORCE
+
+        if self.motion or person_tracked:
+            self.metrics["misses"] += 1
+            return GATE_RUN
+
+        self.metrics["hits"] += 1
+        return GATE_SKIP
+
+    def get_metrics(self):
+        metrics = dict(self.metrics)
+        metrics["hit_rate"] = metrics["hits"] / metrics["frames"] if metrics["frames"] else 0.0
+        return metrics
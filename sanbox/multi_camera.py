@@ -0,0 +1,467 @@
+#!/usr/bin/env python3
+"""
+Run many cameras from one process.
+
+Reads a JSON camera list and runs one detector pipeline (capture, detection,
+alerts, recording) per camera on its own thread. Fall cameras load their own
+pose model, which tracks the person between frames. Hand and face models are
+not loaded per camera: each of those modes has a small pool of model instances
+that all its cameras borrow from in static_image_mode, so memory and model-load
+time grow with the number of workers rather than the number of cameras.
+Detector state (landmark filter, fall history, alert cooldowns, recordings)
+stays per camera.
+
+Camera list format:
+
+    {
+        "defaults": {"port": "10554", "user": "admin", "password": "...", "mode": "fall"},
+        "cameras": [
+            {"name": "living-room", "ip": "192.168.1.40"},
+            {"name": "hallway", "ip": "192.168.1.41", "substream_path": "/tcp/av0_1"}
+        ]
+    }
+
+A plain list of cameras is accepted as well. See cameras.example.json.
+
+Usage:
+    python multi_camera.py --cameras cameras.json [--workers 2] [--status-interval 30]
+"""
+import os
+import time
+import json
+import queue
+import argparse
+import threading
+import datetime
+from inference_pool import InferencePool, create_model
+from fall_detection import PoseDetector, HandDetector, FaceDetector, DISCORD_WEBHOOK
+
+DETECTOR_CLASSES = {
+    "fall": PoseDetector,
+    "hand": HandDetector,
+    "face": FaceDetector
+}
+
+# Seconds between attempts to start a camera whose initial connection failed
+CAMERA_RETRY_INTERVAL = 30
+
+class SharedModelPool:
+    """
+    A fixed number of MediaPipe model instances shared by many detectors.
+
+    process() borrows a free instance, so at most `size` inferences run at once and
+    callers queue for a model when all are busy. It has the same process() and
+    close() methods as a MediaPipe solution, so it can be passed to a detector as
+    shared_model.
+
+    Frames from different cameras interleave on the same instance, so the models
+    must run in static_image_mode; tracking state would otherwise leak between
+    cameras. Pose models are therefore not pooled: re-detecting every frame would
+    cost more than the memory a per-camera model saves.
+    """
+    def __init__(self, factory, size=2):
+        self.size = size
+        self.models = queue.Queue()
+        for _ in range(size):
+            self.models.put(factory())
+
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.wait_seconds = 0.0       # Time callers spent waiting for a free model
+        self.inference_seconds = 0.0
+        self.closed = False
+
+    def process(self, image):
+        wait_start = time.time()
+        model = self.models.get()
+        inference_start = time.time()
+        try:
+            return model.process(image)
+        finally:
+            inference_end = time.time()
+            self.models.put(model)
+            with self.lock:
+                self.calls += 1
+                self.wait_seconds += inference_start - wait_start
+                self.inference_seconds += inference_end - inference_start
+
+    def get_stats(self):
+        with self.lock:
+            return {
+                "workers": self.size,
+                "calls": self.calls,
+                "avg_wait_ms": self.wait_seconds * 1000 / self.calls if self.calls else 0.0,
+                "avg_inference_ms": self.inference_seconds * 1000 / self.calls if self.calls else 0.0
+            }
+
+    def close(self):
+        """Close every model once all of them have been returned"""
+        if self.closed:
+            return
+        self.closed = True
+        for _ in range(self.size):
+            self.models.get().close()
+
+def create_model_pool(mode, size, min_detection_confidence=0.7, min_tracking_confidence=0.5):
+    """Model pool for a detection mode, configured like the single-camera detectors"""
+    return SharedModelPool(lambda: create_model(mode, min_detection_confidence, min_tracking_confidence,
+                                                static_image_mode=True), size)
+
+def model_settings(camera):
+    """
+    Settings a camera's model is created with; cameras only share models with
+    the same mode and settings (face detection has no tracking confidence)
+    """
+    tracking = None if camera["mode"] == "face" else camera.get("min_tracking_confidence", 0.5)
+    return camera["mode"], camera.get("min_detection_confidence", 0.7), tracking
+
+def model_options(camera):
+    """Keyword arguments create_model() builds a camera's own model with"""
+    options = {"min_detection_confidence": camera.get("min_detection_confidence", 0.7)}
+    if camera["mode"] != "face":
+        options["min_tracking_confidence"] = camera.get("min_tracking_confidence", 0.5)
+    if camera["mode"] == "fall":
+        options["model_complexity"] = camera.get("model_complexity", 1)
+    return options
+
+def load_camera_list(path):
+    """Read the camera list; returns a list of camera dicts with the defaults applied"""
+    with open(path, "r") as f:
+        config = json.load(f)
+
+    if isinstance(config, list):
+        defaults, cameras = {}, config
+    else:
+        defaults, cameras = config.get("defaults", {}), config.get("cameras", [])
+
+    merged = []
+    names = set()
+    for index, camera in enumerate(cameras):
+        camera = {**defaults, **camera}
+        camera.setdefault("name", camera.get("ip") or f"camera-{index + 1}")
+        camera.setdefault("mode", "fall")
+
+        if camera["mode"] not in DETECTOR_CLASSES:
+            raise ValueError(f"Camera {camera['name']}: unknown mode {camera['mode']!r}")
+        if not camera.get("ip") and not camera.get("replay"):
+            raise ValueError(f"Camera {camera['name']}: needs an ip (or a replay source)")
+        if camera["name"] in names:
+            raise ValueError(f"Duplicate camera name {camera['name']!r}")
+
+        names.add(camera["name"])
+        merged.append(camera)
+
+    return merged
+
+class CameraPipeline:
+    """
+    One camera's detector running on its own thread.
+
+    The detector owns everything that is per camera (capture, reconnect
+    supervisor, filters, cooldowns, recordings); only the model can be shared.
+    shared_model None makes the detector load its own.
+    """
+    def __init__(self, camera, shared_model, output_dir="events"):
+        self.camera = camera
+        self.name = camera["name"]
+        self.mode = camera["mode"]
+        self.shared_model = shared_model
+        self.output_dir = os.path.join(output_dir, self.name)
+
+        self.detector = None
+        self.state = "starting"
+        self.started_at = None
+        self.running = False
+        self.stop_event = threading.Event()
+        self.thread = None
+
+        # For the fps column of the status report
+        self.last_status_frames = 0
+        self.last_status_time = None
+
+    def _create_detector(self):
+        camera = self.camera
+        kwargs = dict(
+            camera_ip=camera.get("ip", ""),
+            camera_port=str(camera.get("port", "10554")),
+            camera_user=camera.get("user", "admin"),
+            camera_pass=camera.get("password", ""),
+            camera_path=camera.get("path", "/tcp/av0_0"),
+            min_detection_confidence=camera.get("min_detection_confidence", 0.7),
+            display=False,
+            output_dir=self.output_dir,
+            discord_webhook=camera.get("discord_webhook", None if camera.get("replay") else DISCORD_WEBHOOK),
+            verify_ssl=camera.get("verify_ssl", False),
+            capture_backend=camera.get("backend", "opencv"),
+            camera_substream_path=camera.get("substream_path"),
+            idle_after=camera.get("idle_after", 0),
+            idle_fps=camera.get("idle_fps", 1.0),
+            replay_source=camera.get("replay"),
+            replay_realtime=camera.get("replay_realtime", True),
+            resolution=camera.get("resolution", 480),
+            shared_model=self.shared_model
+        )
+        if self.mode == "fall":
+            kwargs["record_falls"] = camera.get("record", False)
+            motion_gate = camera.get("motion_gate", "off")
+            kwargs["motion_gate"] = None if motion_gate in (None, "off") else motion_gate
+            kwargs["roi_crop"] = camera.get("roi_crop", False)
+            kwargs["max_people"] = camera.get("max_people", 1)
+            kwargs["qos_budget_ms"] = camera.get("qos_budget_ms")
+            kwargs["model_complexity"] = camera.get("model_complexity", 1)
+        else:
+            kwargs["record_detections"] = camera.get("record", False)
+        if self.mode != "face":
+            kwargs["min_tracking_confidence"] = camera.get("min_tracking_confidence", 0.5)
+
+        detector = DETECTOR_CLASSES[self.mode](**kwargs)
+        if "skip_frames" in camera:
+            detector.process_every_n_frames = camera["skip_frames"]
+        if "frames_in_flight" in camera:
+            detector.pipeline.frames_in_flight = camera["frames_in_flight"]
+        if self.mode == "fall" and "fall_threshold" in camera:
+            detector.fall_threshold = camera["fall_threshold"]
+        if self.mode == "fall" and "fall_window" in camera:
+            detector.fall_window = camera["fall_window"]
+        return detector
+
+    def _run(self):
+        while self.running:
+            self.state = "connecting"
+            if self.detector is None:
+                self.detector = self._create_detector()
+            elif not self.detector.connect_camera():
+                self.detector.cap = None
+
+            cap = self.detector.cap
+            if cap is None or not cap.isOpened():
+                self.state = "waiting to retry"
+                print(f"[{self.name}] Camera unavailable, retrying in {CAMERA_RETRY_INTERVAL}s")
+                if self.stop_event.wait(CAMERA_RETRY_INTERVAL):
+                    break
+                continue
+
+            if not self.running:
+                break
+            
+            self.state = "running"
+            self.started_at = time.time()
+            self.detector.run()
+
+            # run() only returns on its own when the stream ended or reconnecting gave up
+            if self.detector.replay_source:
+                self.state = "finished"
+                return
+            if self.running:
+                self.state = "waiting to retry"
+                if self.stop_event.wait(CAMERA_RETRY_INTERVAL):
+                    break
+
+        self.state = "stopped"
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name=f"camera-{self.name}", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        self.stop_event.set()
+        if self.detector is not None:
+            self.detector.stop()
+
+    def join(self, timeout=None):
+        if self.thread is not None:
+            self.thread.join(timeout=timeout)
+
+    def status(self):
+        """Current state, frame rate, reconnects and last detection of this camera"""
+        now = time.time()
+        detector = self.detector
+        stream = getattr(detector, "stream", None) if detector is not None else None
+        metrics = stream.get_metrics() if stream is not None else {}
+
+        frames = metrics.get("frames", 0)
+        fps = 0.0
+        if self.last_status_time is not None and frames >= self.last_status_frames:
+            fps = (frames - self.last_status_frames) / max(now - self.last_status_time, 1e-6)
+        self.last_status_frames = frames
+        self.last_status_time = now
+
+        state = self.state
+        if state == "running" and metrics.get("seconds_since_last_frame", 0) > 5:
+            state = "reconnecting"
+
+        # Capture time of the last alert: wall-clock for a camera, media time for a replay
+        last_event = None
+        if detector is not None:
+            last_event = getattr(detector, "last_fall_time", None) or getattr(detector, "last_alert_time", None)
+        if last_event is not None:
+            if detector.replay_source:
+                last_event = f"{last_event:.1f}s"
+            else:
+                last_event = datetime.datetime.fromtimestamp(last_event).isoformat(timespec="seconds")
+
+        return {
+            "name": self.name,
+            "mode": self.mode,
+            "state": state,
+            "fps": round(fps, 1),
+            "frames": frames,
+            "reconnects": metrics.get("reconnects", 0),
+            "idle": detector.is_idle() if detector is not None else False,
+            "recording": getattr(detector, "recording", False),
+            "stage_ms": {name: stage["avg_ms"] for name, stage in detector.pipeline.get_metrics()["stages"].items()}
+                        if detector is not None else {},
+            "last_event": last_event,
+            "uptime_seconds": round(now - self.started_at) if self.started_at else 0
+        }
+
+class MultiCameraSupervisor:
+    """
+    Start a pipeline per camera, share models between them and report status.
+
+    Fall cameras get their own pose model; thread-shared hand and face model
+    pools are kept per mode and confidence settings. With
+    process_workers, inference runs on an InferencePool of worker processes
+    instead: each camera is pinned to one worker, which keeps a tracking model
+    with the camera's own settings for it.
+    """
+    def __init__(self, cameras, workers=2, output_dir="events", status_file=None, process_workers=0):
+        self.cameras = cameras
+        self.workers = workers
+        self.output_dir = output_dir
+        self.status_file = status_file
+
+        self.model_pools = {}
+        self.inference_pool = None
+        modes = sorted({camera["mode"] for camera in cameras})
+
+        if process_workers:
+            print(f"Starting {process_workers} inference worker process(es) for {', '.join(modes)}")
+            self.inference_pool = InferencePool(modes, workers=process_workers)
+            self.pipelines = [
+                CameraPipeline(camera, self.inference_pool.model(camera["name"], camera["mode"], **model_options(camera)),
+                               output_dir)
+                for camera in cameras
+            ]
+            return
+
+        # One model pool per hand/face mode and confidence settings in use, sized to the cameras needing it
+        pool_settings = sorted({model_settings(camera) for camera in cameras if camera["mode"] != "fall"}, key=str)
+        pools = {}
+        for settings in pool_settings:
+            mode, detection, tracking = settings
+            pool_cameras = [camera for camera in cameras if model_settings(camera) == settings]
+            size = max(1, min(workers, len(pool_cameras)))
+            name = mode
+            if sum(other[0] == mode for other in pool_settings) > 1:
+                name = f"{mode} ({detection}/{tracking})" if tracking is not None else f"{mode} ({detection})"
+            print(f"Loading {size} {name} model(s) for {len(pool_cameras)} camera(s)")
+            pools[settings] = self.model_pools[name] = create_model_pool(
+                mode, size,
+                min_detection_confidence=detection,
+                min_tracking_confidence=0.5 if tracking is None else tracking
+            )
+
+        fall_cameras = sum(camera["mode"] == "fall" for camera in cameras)
+        if fall_cameras:
+            print(f"Loading a fall model for each of {fall_cameras} camera(s)")
+        self.pipelines = [CameraPipeline(camera, pools.get(model_settings(camera)), output_dir)
+                          for camera in cameras]
+
+    def start(self):
+        for pipeline in self.pipelines:
+            pipeline.start()
+
+    def stop(self):
+        for pipeline in self.pipelines:
+            pipeline.stop()
+        for pipeline in self.pipelines:
+            pipeline.join(timeout=10)
+        for pool in self.model_pools.values():
+            pool.close()
+        if self.inference_pool is not None:
+            self.inference_pool.close()
+
+    def get_status(self):
+        status = {
+            "time": datetime.datetime.now().isoformat(timespec="seconds"),
+            "cameras": [pipeline.status() for pipeline in self.pipelines],
+            "models": {mode: pool.get_stats() for mode, pool in self.model_pools.items()}
+        }
+        if self.inference_pool is not None:
+            status["inference_pool"] = self.inference_pool.get_stats()
+        return status
+
+    def report_status(self):
+        """Print one line per camera and write the status file if configured"""
+        status = self.get_status()
+
+        print(f"\n=== Camera status {status['time']} ===")
+        for camera in status["cameras"]:
+            flags = []
+            if camera["idle"]:
+                flags.append("idle")
+            if camera["recording"]:
+                flags.append("recording")
+            print(f"{camera['name']:<20} {camera['mode']:<5} {camera['state']:<17} "
+                  f"{camera['fps']:5.1f} fps  {camera['reconnects']} reconnects  "
+                  f"last event: {camera['last_event'] or '-'}  {' '.join(flags)}")
+        for name, stats in status["models"].items():
+            print(f"{name} models: {stats['workers']} worker(s), {stats['calls']} inferences, "
+                  f"{stats['avg_inference_ms']:.1f} ms avg, {stats['avg_wait_ms']:.1f} ms avg wait")
+        if "inference_pool" in status:
+            stats = status["inference_pool"]
+            print(f"Inference workers: {stats['workers']} process(es), {stats['completed']} inferences, "
+                  f"{stats['avg_inference_ms']:.1f} ms avg, per worker {stats['per_worker']}, "
+                  f"cameras per worker {stats['cameras_per_worker']}")
+
+        if self.status_file:
+            temp_file = f"{self.status_file}.tmp"
+            with open(temp_file, "w") as f:
+                json.dump(status, f, indent=2)
+            os.replace(temp_file, self.status_file)
+
+        return status
+
+    def run(self, status_interval=30):
+        """Run until interrupted (or until every replay has finished)"""
+        self.start()
+        try:
+            while any(pipeline.state not in ("finished", "stopped") for pipeline in self.pipelines):
+                time.sleep(status_interval)
+                self.report_status()
+        except KeyboardInterrupt:
+            print("Interrupted by user")
+        finally:
+            print("Stopping cameras...")
+            self.stop()
+            self.report_status()
+
+def main():
+    parser = argparse.ArgumentParser(description="Run detection on several cameras in one process")
+    parser.add_argument("--cameras", required=True, help="JSON camera list (see cameras.example.json)")
+    parser.add_argument("--workers", type=int, default=2,
+                        help="Hand/face model instances per mode, shared by all cameras of that mode "
+                             "(fall cameras load their own)")
+    parser.add_argument("--process-workers", type=int, default=0,
+                        help="Run inference in this many worker processes instead of threads (0: use --workers threads)")
+    parser.add_argument("--output-dir", default="events",
+                        help="Base directory for screenshots and videos (one subdirectory per camera)")
+    parser.add_argument("--status-interval", type=float, default=30, help="Seconds between status reports")
+    parser.add_argument("--status-file", default=None, help="Also write each status report to this JSON file")
+    args = parser.parse_args()
+
+    cameras = load_camera_list(args.cameras)
+    if not cameras:
+        print(f"No cameras in {args.cameras}")
+        return
+
+    print(f"\n=== FallSense multi-camera supervisor: {len(cameras)} camera(s) ===")
+    supervisor = MultiCameraSupervisor(cameras, workers=args.workers, output_dir=args.output_dir,
+                                       status_file=args.status_file, process_workers=args.process_workers)
+    supervisor.run(status_interval=args.status_interval)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,590 @@
+"""
+Staged detection pipeline shared by the hand, pose and face detectors.
+
+Every frame goes through the same stages, in order:
+
+    source       read a frame (and the RGB frame when the FFmpeg backend delivers RGB)
+    preprocess   decide whether this frame is inferred and build the model input
+    infer        run the MediaPipe model (only on frames that are inferred)
+    postprocess  detection logic on the results: counts, fall analysis, alert decisions
+    annotate     draw the results and the timestamp on the display frame
+    sinks        idle control, alerts, recording, status text, display
+
+DetectionPipeline owns the loop, FPS counting, frame skipping, per-stage timing
+and cleanup, and CameraDetector, the detectors' base class, owns capture,
+reconnects, idle decoding, the dual-stream main stream and recording. A
+detector only supplies its preprocess / infer / postprocess / annotate / alert
+/ status steps (see build_pipeline() on each detector), so changes to the loop
+or the camera handling land once for all modes.
+
+Stages are callables taking the FrameContext and are kept by name in
+pipeline.stages; any of them can be swapped with replace(). A stage returning
+False ends the run (end of stream, 'q' pressed).
+
+Frame skipping is the same for every mode: a frame that is not inferred still
+goes through postprocess, annotate and the sinks, with the last results, so the
+display keeps up with the stream.
+
+With frames_in_flight > 1 the stages run pipelined on three threads: capture
+(source), inference (preprocess, infer, postprocess) and output (annotate and
+the sinks, on the calling thread because of the display window). Capture of
+frame N+1, inference of N and annotation / recording of N-1 then overlap. At
+most frames_in_flight frames are between the start of source and the end of
+the sinks. Capture waits for a free slot, and then until the frame in
+inference is about to finish, before it reads: the next frame is the newest
+one and reaches the inference thread just as it frees up, instead of ageing in
+a queue, so overlapping does not add latency. Postprocess must leave everything
+annotate and the sinks need in the FrameContext (ctx.results rather than the
+detector's last_results), because the inference thread is already on the next
+frame by the time they run.
+
+Every frame carries its capture time in ctx.timestamp: the source's timestamp
+(stream PTS on the camera's clock, media time when replaying, see FrameClock)
+or the time it was read when the source has none. All temporal logic - the
+landmark filter, fall windows, alert cooldowns, recording length - runs on
+this clock rather than on the time a stage happens to run, so a replay decides
+the same whatever its speed and queueing delays do not distort velocities.
+"""
+import os
+import cv2
+import time
+import queue
+import datetime
+import functools
+import threading
+from camera_connect import connect_to_ip_camera, ReconnectSupervisor
+from replay_source import ReplaySource
+from shm_ring import ProcessCapture
+
+class FrameContext:
+    """Per-frame state handed from stage to stage; stages may add their own fields"""
+    def __init__(self, index):
+        self.index = index
+        self.frame = None          # Clean BGR frame
+        self.rgb_frame = None      # RGB frame from the capture (FFmpeg backend), if any
+        self.shared_input = None   # RGB model input shared by several detectors (combined mode), if any
+        self.display_frame = None  # Frame the overlays are drawn on
+        self.timestamp = None      # Capture time in seconds (media time when replaying)
+        self.fps = 0
+        self.infer = False         # Run inference on this frame
+        self.inferred = False      # Inference ran on this frame
+        self.model_input = None
+        self.results = None        # Newest results as of this frame (the last inference's on skipped frames)
+        self.detected = False
+        self.count = 0
+        self.alert = False         # Postprocess asks the alert sink to act
+        self.activity = False      # Anything going on, for the idle controller
+        self.timings = {}          # Seconds spent in each stage for this frame
+        self.started = None        # perf_counter() when the frame entered the pipeline
+
+def draw_timestamp(frame):
+    timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    cv2.putText(frame, timestamp, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
+
+def run_model(model, image, **kwargs):
+    """
+    Run a MediaPipe solution on an RGB image without letting it copy the buffer.
+
+    Keyword arguments go to the model's process() (the tasks backend's timestamp).
+
+    The writeable flag is restored to what it was, so a buffer shared by models
+    running concurrently stays read-only until its owner releases it.
+    """
+    writeable = image.flags.writeable
+    image.flags.writeable = False
+    results = model.process(image, **kwargs)
+    image.flags.writeable = writeable
+    return results
+
+class CameraDetector:
+    """
+    Camera handling shared by every detector: capture, reconnects, idle
+    decoding, the dual-stream main stream and recording.
+
+    Subclasses set the camera and recording attributes in __init__ (camera_*,
+    capture_backend, capture_process, replay_source, resolution, output_dir,
+    cap, stream, idle_controller, recording, ...) and supply the pipeline stages;
+    recording_name names their recordings and log lines.
+    """
+    recording_name = "event"
+
+    def connect_camera(self):
+        """Connect to the camera using the provided parameters"""
+        if self.replay_source:
+            print(f"Replaying {self.replay_source} ({'real-time' if self.replay_realtime else 'as fast as possible'})")
+            self.cap = ReplaySource(self.replay_source, realtime=self.replay_realtime)
+            return self.cap.isOpened()
+
+        print(f"Connecting to camera at {self.camera_ip}:{self.camera_port}...")
+        open_source = functools.partial(
+            connect_to_ip_camera,
+            ip=self.camera_ip,
+            port=self.camera_port,
+            user=self.camera_user,
+            password=self.camera_pass,
+            path=self.camera_substream_path or self.camera_path,
+            threaded=True,
+            backend=self.capture_backend,
+            frame_height=self.resolution,
+            stream_name="sub" if self.camera_substream_path else None
+        )
+
+        # Decode in a separate process and read frames through shared memory
+        self.cap = ProcessCapture(open_source) if self.capture_process else open_source()
+
+        if self.cap is None or not self.cap.isOpened():
+            print("Failed to connect to camera. Exiting.")
+            return False
+
+        print("Successfully connected to camera")
+        return True
+
+    def open_camera(self):
+        """Reconnect callback for the stream supervisor: returns the new capture or None"""
+        return self.cap if self.connect_camera() else None
+
+    def frames_are_rgb(self):
+        """True if the capture delivers RGB frames at the processing resolution (FFmpeg backend)"""
+        return getattr(self.cap, "pixel_format", "bgr24") == "rgb24"
+
+    def is_idle(self):
+        """True while the stream is in idle (low-rate) decoding"""
+        return self.idle_controller is not None and self.idle_controller.idle
+
+    def update_idle(self, frame, activity):
+        """Feed a clean (unannotated) frame and whether anything was detected to the idle controller"""
+        if self.idle_controller is not None:
+            self.idle_controller.update(self.stream, frame, activity)
+
+    def stop(self):
+        """Ask run() to finish after the current frame (safe to call from another thread)"""
+        self.running = False
+        stream = getattr(self, "stream", None)
+        if stream is not None and hasattr(stream, "stop"):
+            stream.stop()
+
+    def open_main_stream(self):
+        """Open the full-resolution main stream used for evidence in dual-stream mode"""
+        return connect_to_ip_camera(
+            ip=self.camera_ip,
+            port=self.camera_port,
+            user=self.camera_user,
+            password=self.camera_pass,
+            path=self.camera_path,
+            timeout=10,
+            threaded=True
+        )
+
+    def write_recording_frame(self, frame):
+        """Write a frame to the recording, resizing it if the evidence resolution changed"""
+        if (frame.shape[1], frame.shape[0]) != self.record_size:
+            frame = cv2.resize(frame, self.record_size)
+        self.video_writer.write(frame)
+
+    def start_recording(self, frame, timestamp):
+        """Start recording a video of the current event; timestamp is its capture time"""
+        if self.recording:
+            return
+
+        file_stamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        video_filename = os.path.join(self.output_dir, f"{self.recording_name.replace(' ', '_')}_{file_stamp}.mp4")
+
+        # Get frame dimensions
+        height, width = frame.shape[:2]
+        self.record_size = (width, height)
+
+        # Initialize video writer
+        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+        self.video_writer = cv2.VideoWriter(video_filename, fourcc, 10, (width, height))
+
+        self.record_start_time = timestamp  # Capture time, so the length follows the stream
+        self.recording = True
+        print(f"Started recording {self.recording_name} to {video_filename}")
+
+    def stop_recording(self):
+        """Stop recording the video"""
+        if not self.recording:
+            return
+
+        self.video_writer.release()
+        self.video_writer = None
+        self.recording = False
+        print(f"Stopped recording {self.recording_name}")
+
+class DetectionPipeline:
+    """
+    The detection loop of one detector, as a list of named, timed stages.
+
+    detector provides the camera and recording state shared by all modes (cap,
+    stream, recording, evidence, idle controller, ...). name is the mode used
+    in messages ("hand", "fall", "face").
+    """
+    # Stages run by the capture and inference threads in pipelined mode; the rest
+    # run on the output thread
+    THREAD_STAGES = {
+        "source": "capture",
+        "preprocess": "inference",
+        "infer": "inference",
+        "postprocess": "inference"
+    }
+
+    def __init__(self, detector, name, window_title, preprocess, infer, postprocess, annotate,
+                 alert, status, record_seconds=10, record_color=(0, 255, 0), metrics=None,
+                 frames_in_flight=1):
+        self.detector = detector
+        self.name = name
+        self.window_title = window_title
+        self.frames_in_flight = frames_in_flight  # 1 runs the stages in sequence
+        self.status = status                  # ctx -> (status text, colour)
+        self.record_seconds = record_seconds  # Length of an event recording
+        self.record_color = record_color      # Border drawn while recording
+        self.metrics = metrics or {}          # Extra metrics printed at the end: label -> callable
+
+        self.stages = [
+            ("source", self.read_source),
+            ("preprocess", preprocess),
+            ("infer", infer),
+            ("postprocess", postprocess),
+            ("annotate", annotate),
+            ("idle", self.update_idle),
+            ("alert", alert),
+            ("record", self.record),
+            ("hud", self.draw_hud),
+            ("evidence", self.close_idle_evidence),
+            ("display", self.show)
+        ]
+
+        self.frames = 0
+        self.inferred_frames = 0
+        self.stage_calls = {name: 0 for name, _ in self.stages}
+        self.stage_seconds = {name: 0.0 for name, _ in self.stages}
+        self.latency_seconds = 0.0  # Summed time from source to the end of the sinks
+        self.run_start = None
+        self.run_seconds = 0.0
+
+        # Pipelined mode
+        self.stopping = threading.Event()
+        self.workers = []
+        self.worker_errors = []
+        self.inference_started = None  # perf_counter() when the inference thread took its current frame
+        self.inference_frames = 0
+        self.inference_seconds = 0.0
+
+        # For the FPS display
+        self.fps = 0
+        self.fps_frames = 0
+        self.fps_start = time.time()
+
+    def replace(self, name, stage):
+        """Swap the stage called name for another callable taking the FrameContext"""
+        for i, (stage_name, _) in enumerate(self.stages):
+            if stage_name == name:
+                self.stages[i] = (name, stage)
+                return
+        raise KeyError(f"No stage named {name!r}")
+
+    # Stages shared by all modes
+
+    def read_source(self, ctx):
+        detector = self.detector
+        ret, frame = detector.stream.read()
+        if not ret:
+            if detector.replay_source:
+                print("Replay finished.")
+            else:
+                print("Camera stream lost and reconnection gave up. Exiting.")
+            return False
+
+        # The FFmpeg and shared-memory captures hand out a buffer that is only valid
+        # until the next read, which happens before this frame is done when pipelined
+        if self.frames_in_flight > 1:
+            frame = frame.copy()
+
+        # The FFmpeg backend delivers RGB frames at the processing resolution
+        if detector.frames_are_rgb():
+            ctx.rgb_frame = frame
+            ctx.frame = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
+            ctx.display_frame = ctx.frame
+        else:
+            ctx.frame = frame
+            ctx.display_frame = frame.copy()
+
+        # Capture time from the source, falling back to the arrival time
+        timestamp = getattr(detector.cap, "timestamp", None)
+        ctx.timestamp = timestamp if timestamp is not None else time.time()
+
+    def schedule(self, ctx):
+        """Frame skipping: infer every process_every_n_frames-th frame, and every frame while idle"""
+        detector = self.detector
+        detector.frame_count += 1
+        ctx.infer = detector.frame_count % detector.process_every_n_frames == 0 or detector.is_idle()
+
+        self.fps_frames += 1
+        if time.time() - self.fps_start > 1:
+            self.fps = self.fps_frames
+            self.fps_frames = 0
+            self.fps_start = time.time()
+        ctx.fps = self.fps
+
+    def update_idle(self, ctx):
+        detector = self.detector
+        detector.update_idle(ctx.rgb_frame if ctx.rgb_frame is not None else ctx.frame,
+                             ctx.activity or detector.recording)
+
+    def record(self, ctx):
+        detector = self.detector
+        if not detector.recording:
+            return
+
+        frame = ctx.display_frame
+        detector.write_recording_frame(detector.evidence_frame(frame, ctx.results))
+
+        # Add a border to indicate recording
+        cv2.rectangle(frame, (0, 0), (frame.shape[1], frame.shape[0]), self.record_color, 5)
+
+        if ctx.timestamp - detector.record_start_time > self.record_seconds:
+            detector.stop_recording()
+
+    def draw_hud(self, ctx):
+        frame = ctx.display_frame
+        status_text, status_color = self.status(ctx)
+        cv2.putText(frame, f"Status: {status_text}", (10, 60),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, status_color, 2)
+        cv2.putText(frame, f"FPS: {ctx.fps}", (frame.shape[1] - 120, 30),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+
+    def close_idle_evidence(self, ctx):
+        # Close the main stream once no evidence has been needed for a while
+        if self.detector.evidence is not None:
+            self.detector.evidence.close_if_idle()
+
+    def show(self, ctx):
+        if not self.detector.display:
+            return
+        cv2.imshow(self.window_title, ctx.display_frame)
+
+        # Press 'q' to exit (read() blocks until the next frame, so there is no busy loop to pace)
+        if cv2.waitKey(1) & 0xFF == ord('q'):
+            return False
+
+    # Engine
+
+    def thread_of(self, name):
+        return self.THREAD_STAGES.get(name, "output")
+
+    def run_stages(self, ctx, thread=None):
+        """Run the stages (of one thread, or all of them) on a frame; returns False when the run should end"""
+        for name, stage in self.stages:
+            if thread is not None and self.thread_of(name) != thread:
+                continue
+            if name == "infer" and not ctx.infer:
+                continue
+
+            start = time.perf_counter()
+            if name == "source":
+                ctx.started = start
+            result = stage(ctx)
+            elapsed = time.perf_counter() - start
+
+            ctx.timings[name] = elapsed
+            self.stage_calls[name] = self.stage_calls.get(name, 0) + 1
+            self.stage_seconds[name] = self.stage_seconds.get(name, 0.0) + elapsed
+
+            if result is False:
+                return False
+            if name == "source":
+                self.schedule(ctx)
+            elif name == "infer":
+                ctx.inferred = True
+        return True
+
+    def finish_frame(self, ctx):
+        self.frames += 1
+        if ctx.inferred:
+            self.inferred_frames += 1
+        self.latency_seconds += time.perf_counter() - ctx.started
+
+    def process_frame(self, ctx):
+        """Run every stage on one frame; returns False when the run should end"""
+        if not self.run_stages(ctx):
+            return False
+        self.finish_frame(ctx)
+        return True
+
+    def run(self):
+        detector = self.detector
+        if detector.cap is None or not detector.cap.isOpened():
+            print("Camera is not connected. Please try connecting to the camera first.")
+            return
+
+        mode = f", {self.frames_in_flight} frames in flight" if self.frames_in_flight > 1 else ""
+        print(f"Starting {self.name} detection{mode}. Press 'q' to quit.")
+
+        # Reconnect with backoff when the stream drops or freezes; a replay just ends
+        detector.stream = detector.cap if detector.replay_source else ReconnectSupervisor(detector.open_camera, cap=detector.cap)
+
+        self.run_start = time.perf_counter()
+        try:
+            if self.frames_in_flight > 1:
+                self.run_pipelined()
+            else:
+                index = 0
+                while detector.running:
+                    if not self.process_frame(FrameContext(index)):
+                        break
+                    index += 1
+        except KeyboardInterrupt:
+            print("Interrupted by user")
+        finally:
+            self.stop_workers()
+            self.run_seconds = time.perf_counter() - self.run_start
+            self.close()
+
+    # Pipelined mode
+
+    def capture_worker(self, slots, inference_queue):
+        """Read frames whenever a slot is free and hand them to the inference thread"""
+        index = 0
+        try:
+            while self.detector.running and not self.stopping.is_set():
+                if not slots.acquire(timeout=0.1):
+                    continue
+                delay = self.prefetch_delay(inference_queue.qsize())
+                if delay > 0 and self.stopping.wait(delay):
+                    break
+                ctx = FrameContext(index)
+                if not self.run_stages(ctx, "capture"):
+                    break
+                inference_queue.put(ctx)
+                index += 1
+        except Exception as e:
+            self.worker_errors.append(e)
+        finally:
+            inference_queue.put(None)
+
+    def inference_worker(self, inference_queue, output_queue):
+        """Preprocess, infer and postprocess frames in order (model input buffers are reused)"""
+        try:
+            while not self.stopping.is_set():
+                try:
+                    ctx = inference_queue.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                if ctx is None:
+                    break
+                self.inference_started = start = time.perf_counter()
+                self.run_stages(ctx, "inference")
+                self.inference_started = None
+                self.inference_frames += 1
+                self.inference_seconds += time.perf_counter() - start
+                output_queue.put(ctx)
+        except Exception as e:
+            self.worker_errors.append(e)
+        finally:
+            output_queue.put(None)
+
+    def prefetch_delay(self, queued=0):
+        """
+        Seconds to wait before reading the next frame so that it is ready just as the
+        inference thread finishes its current frame and the queued ones (0 if it is
+        idle or nothing is known yet)
+        """
+        started = self.inference_started
+        if started is None or not self.inference_frames or not self.stage_calls.get("source"):
+            return 0.0
+        inference_time = self.inference_seconds / self.inference_frames
+        capture_time = self.stage_seconds["source"] / self.stage_calls["source"]
+        return started + (1 + queued) * inference_time - capture_time - time.perf_counter()
+
+    def run_pipelined(self):
+        """Overlap capture, inference and output with at most frames_in_flight frames in the pipeline"""
+        # A slot is taken before a frame is read and given back after its sinks ran, so the
+        # queues between the threads never hold more than frames_in_flight frames
+        slots = threading.Semaphore(self.frames_in_flight)
+        inference_queue = queue.Queue()
+        output_queue = queue.Queue()
+
+        self.stopping.clear()
+        self.workers = [
+            threading.Thread(target=self.capture_worker, args=(slots, inference_queue),
+                             name=f"{self.name}-capture", daemon=True),
+            threading.Thread(target=self.inference_worker, args=(inference_queue, output_queue),
+                             name=f"{self.name}-inference", daemon=True)
+        ]
+        for worker in self.workers:
+            worker.start()
+
+        while True:
+            ctx = output_queue.get()
+            if ctx is None:
+                break
+            ended = not self.run_stages(ctx, "output")
+            self.finish_frame(ctx)
+            slots.release()
+            if ended:
+                break
+
+        if self.worker_errors:
+            raise self.worker_errors[0]
+
+    def stop_workers(self, timeout=10):
+        """Stop the capture and inference threads of a pipelined run (after their current frame)"""
+        self.stopping.set()
+        for worker in self.workers:
+            worker.join(timeout=timeout)
+        self.workers = []
+
+    def close(self):
+        detector = self.detector
+        if detector.recording:
+            detector.stop_recording()
+
+        detector.stream.release()
+        print(f"Stream metrics: {detector.stream.get_metrics()}")
+        if detector.idle_controller is not None:
+            print(f"Idle metrics: {detector.idle_controller.get_metrics()}")
+        for label, get_metrics in self.metrics.items():
+            print(f"{label} metrics: {get_metrics()}")
+        print(f"Pipeline metrics: {self.get_metrics()}")
+        if detector.evidence is not None:
+            detector.evidence.release()
+
+        # Free up MediaPipe resources
+        detector.close_model()
+
+        if detector.display:
+            cv2.destroyAllWindows()
+        print(f"{self.name.capitalize()} detection stopped")
+
+    def get_metrics(self):
+        """
+        Frames seen and inferred, throughput and latency, calls and average time of
+        every stage, and utilization (busy fraction of the run) of each thread.
+        Sequential runs report the same thread split, all on one thread.
+        """
+        elapsed = self.run_seconds
+        if not elapsed and self.run_start is not None:
+            elapsed = time.perf_counter() - self.run_start
+
+        busy = {}
+        for name, _ in self.stages:
+            thread = self.thread_of(name)
+            busy[thread] = busy.get(thread, 0.0) + self.stage_seconds.get(name, 0.0)
+
+        return {
+            "frames": self.frames,
+            "inferred_frames": self.inferred_frames,
+            "frames_in_flight": self.frames_in_flight,
+            "fps": round(self.frames / elapsed, 1) if elapsed else 0.0,
+            "avg_latency_ms": round(self.latency_seconds * 1000 / self.frames, 2) if self.frames else 0.0,
+            "utilization": {thread: round(seconds / elapsed, 2) if elapsed else 0.0
+                            for thread, seconds in busy.items()},
+            "stages": {
+                name: {
+                    "calls": self.stage_calls.get(name, 0),
+                    "avg_ms": round(self.stage_seconds.get(name, 0.0) * 1000 / self.stage_calls[name], 2)
+                              if self.stage_calls.get(name) else 0.0
+                }
+                for name, _ in self.stages
+            }
+        }
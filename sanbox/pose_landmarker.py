@@ -0,0 +1,164 @@
+"""
+MediaPipe Tasks PoseLandmarker backend for pose inference.
+
+The legacy mp.solutions.pose.Pose.process() runs the graph synchronously, so
+the detection loop waits for every inference. PoseLandmarkerModel runs the
+Tasks PoseLandmarker in LIVE_STREAM mode instead: process() submits the frame
+with a monotonic timestamp and returns at once with the newest result the
+landmarker has delivered through its callback. While the landmarker is busy
+it drops the frames it cannot keep up with, so capture never blocks on
+inference and results are at most one inference old.
+
+Results look like the legacy solution's: pose_landmarks is the first pose as a
+NormalizedLandmarkList protobuf, so drawing, ROI mapping and the fall logic are
+unchanged. multi_pose_landmarks has every pose (num_poses > 1). A result belongs
+to an earlier frame than the one just submitted, so it carries that frame's
+capture time as timestamp, for the landmark filter and fall features.
+
+The landmarker needs a .task model bundle; model complexity 0/1/2 maps to the
+lite / full / heavy bundles, downloadable from MODEL_URL.
+"""
+import os
+import time
+import types
+import threading
+import numpy as np
+
+# Model bundle per legacy model_complexity
+MODEL_FILES = {
+    0: "pose_landmarker_lite.task",
+    1: "pose_landmarker_full.task",
+    2: "pose_landmarker_heavy.task"
+}
+MODEL_URL = "https://storage.googleapis.com/mediapipe-models/pose_landmarker/pose_landmarker_{variant}/float16/latest/pose_landmarker_{variant}.task"
+
+def bundle_path(model_dir, model_complexity):
+    """Path of the bundle for a model complexity; raises FileNotFoundError with the download URL"""
+    filename = MODEL_FILES[model_complexity]
+    path = os.path.join(model_dir, filename)
+    if not os.path.exists(path):
+        variant = filename[len("pose_landmarker_"):-len(".task")]
+        raise FileNotFoundError(f"PoseLandmarker model {path} not found; download it from "
+                                f"{MODEL_URL.format(variant=variant)}")
+    return path
+
+def to_landmark_list(landmarks):
+    """Convert a Tasks pose (list of NormalizedLandmark) to the legacy protobuf"""
+    from mediapipe.framework.formats import landmark_pb2
+
+    landmark_list = landmark_pb2.NormalizedLandmarkList()
+    for landmark in landmarks:
+        landmark_list.landmark.add(
+            x=landmark.x, y=landmark.y, z=landmark.z,
+            visibility=landmark.visibility or 0.0, presence=landmark.presence or 0.0
+        )
+    return landmark_list
+
+def empty_result():
+    return types.SimpleNamespace(pose_landmarks=None, multi_pose_landmarks=[], timestamp_ms=None, timestamp=None,
+                                 latency=None)
+
+class PoseLandmarkerModel:
+    """
+    process()/close() like mp.solutions.pose.Pose, backed by PoseLandmarker in LIVE_STREAM mode.
+
+    process() never waits for inference: it submits the frame and returns the
+    newest result delivered so far (an empty one before the first); the same
+    result object is returned until a newer one arrives. Frames are submitted
+    at their capture time (the monotonic clock without one) in milliseconds,
+    kept strictly increasing as detect_async requires.
+    """
+    def __init__(self, model_path, num_poses=1, min_detection_confidence=0.7,
+                 min_tracking_confidence=0.5, min_presence_confidence=0.5):
+        import mediapipe as mp
+        from mediapipe.tasks import python as mp_tasks
+        from mediapipe.tasks.python import vision
+
+        self.mp = mp
+        self.num_poses = num_poses
+
+        self.lock = threading.Lock()
+        self.latest = empty_result()
+        self.last_timestamp_ms = 0
+        self.submit_times = {}  # Timestamp -> perf_counter() at submission, until its result arrives
+        self.frame_times = {}   # Timestamp -> capture time of the submitted frame, until its result arrives
+        self.metrics = {
+            "submitted": 0,
+            "completed": 0,
+            "dropped": 0,       # Frames the landmarker skipped while busy
+            "latency": 0.0      # Summed submission-to-callback time of completed frames
+        }
+
+        options = vision.PoseLandmarkerOptions(
+            base_options=mp_tasks.BaseOptions(model_asset_path=model_path),
+            running_mode=vision.RunningMode.LIVE_STREAM,
+            num_poses=num_poses,
+            min_pose_detection_confidence=min_detection_confidence,
+            min_pose_presence_confidence=min_presence_confidence,
+            min_tracking_confidence=min_tracking_confidence,
+            output_segmentation_masks=False,
+            result_callback=self._on_result
+        )
+        self.landmarker = vision.PoseLandmarker.create_from_options(options)
+
+    def _on_result(self, result, output_image, timestamp_ms):
+        """Landmarker callback (on a MediaPipe thread): keep the newest result"""
+        now = time.perf_counter()
+        poses = [to_landmark_list(pose) for pose in result.pose_landmarks]
+
+        with self.lock:
+            # Frames submitted before this one without a result were dropped
+            for submitted in [t for t in self.submit_times if t < timestamp_ms]:
+                del self.submit_times[submitted]
+                self.frame_times.pop(submitted, None)
+                self.metrics["dropped"] += 1
+            submit_time = self.submit_times.pop(timestamp_ms, None)
+            frame_time = self.frame_times.pop(timestamp_ms, None)
+            latency = now - submit_time if submit_time is not None else None
+            if latency is not None:
+                self.metrics["latency"] += latency
+            self.metrics["completed"] += 1
+
+            # latency: seconds from submission to this result (what a latency budget should see)
+            # timestamp: capture time of the frame the poses were seen on
+            self.latest = types.SimpleNamespace(
+                pose_landmarks=poses[0] if poses else None,
+                multi_pose_landmarks=poses,
+                timestamp_ms=timestamp_ms,
+                timestamp=frame_time,
+                latency=latency
+            )
+
+    def process(self, image, timestamp=None):
+        """
+        Submit an RGB frame and return the newest available result.
+
+        timestamp is the frame's capture time in seconds; the result for this
+        frame carries it back.
+        """
+        clock = time.monotonic() if timestamp is None else timestamp
+        timestamp_ms = max(int(clock * 1000), self.last_timestamp_ms + 1)
+        self.last_timestamp_ms = timestamp_ms
+
+        # The caller reuses its input buffer (and marks it read-only, which mp.Image
+        # would wrap instead of copy), while the landmarker reads it asynchronously
+        mp_image = self.mp.Image(image_format=self.mp.ImageFormat.SRGB, data=np.array(image, copy=True))
+
+        with self.lock:
+            self.submit_times[timestamp_ms] = time.perf_counter()
+            self.frame_times[timestamp_ms] = timestamp
+            self.metrics["submitted"] += 1
+        self.landmarker.detect_async(mp_image, timestamp_ms)
+
+        with self.lock:
+            return self.latest
+
+    def get_metrics(self):
+        with self.lock:
+            metrics = dict(self.metrics)
+        latency = metrics.pop("latency")
+        metrics["avg_latency_ms"] = round(latency * 1000 / metrics["completed"], 2) if metrics["completed"] else 0.0
+        return metrics
+
+    def close(self):
+        self.landmarker.close()
@@ -0,0 +1,139 @@
+"""
+Region-of-interest cropping in front of pose inference.
+
+Resizing the whole frame to the processing height leaves a person who fills a
+small part of a wide-angle view with only a few pixels. PoseROI instead picks a
+padded region around the person - the previous frame's landmark bounding box,
+or the motion gate's moving regions when nobody is tracked yet - crops it from
+the full-resolution frame and resizes only the crop to the (smaller) model
+input size. Landmarks found in the crop are mapped back to full-frame
+normalized coordinates, so everything downstream is unchanged.
+"""
+
+INPUT_HEIGHT = 256  # Crops taller than this are downscaled to it for inference
+
+def pad_box(box, padding, min_size):
+    """Grow a normalized box by padding (a fraction of its size) on each side, at least min_size, clipped to the frame"""
+    x1, y1, x2, y2 = box
+    w = max(x2 - x1, min_size)
+    h = max(y2 - y1, min_size)
+    cx, cy = (x1 + x2) / 2, (y1 + y2) / 2
+    half_w = w * (0.5 + padding)
+    half_h = h * (0.5 + padding)
+    return (max(0.0, cx - half_w), max(0.0, cy - half_h),
+            min(1.0, cx + half_w), min(1.0, cy + half_h))
+
+def map_landmarks(pose_landmarks, region):
+    """Convert a pose found in a crop of region to full-frame normalized coordinates (in place)"""
+    x1, y1, x2, y2 = region
+    width, height = x2 - x1, y2 - y1
+    for landmark in pose_landmarks.landmark:
+        landmark.x = x1 + landmark.x * width
+        landmark.y = y1 + landmark.y * height
+        landmark.z = landmark.z * width  # z uses the same scale as x
+    return pose_landmarks
+
+class PoseROI:
+    """
+    Choose, crop and un-map the pose region of each frame.
+
+    Regions are normalized (x1, y1, x2, y2). The region is kept while the
+    person stays inside it (away from its edges), so MediaPipe's own tracking
+    sees a stable crop, and dropped after max_misses crops without a pose so the
+    next inference runs on the full frame again.
+    """
+    def __init__(self, padding=0.25, min_size=0.2, input_height=INPUT_HEIGHT, max_misses=3):
+        self.padding = padding            # Added on each side, as a fraction of the box size
+        self.min_size = min_size          # Smallest region, as a fraction of the frame size
+        self.input_height = input_height  # Crops taller than this are downscaled to it for inference
+        self.max_misses = max_misses
+
+        self.region = None
+        self.misses = 0
+        self.metrics = {
+            "roi_frames": 0,
+            "full_frames": 0,
+            "roi_misses": 0,
+            "roi_area": 0.0
+        }
+
+    @staticmethod
+    def landmark_box(pose_landmarks):
+        """Normalized bounding box of a pose's landmarks"""
+        xs = [landmark.x for landmark in pose_landmarks.landmark]
+        ys = [landmark.y for landmark in pose_landmarks.landmark]
+        return min(xs), min(ys), max(xs), max(ys)
+
+    @staticmethod
+    def union_box(boxes):
+        return (min(box[0] for box in boxes), min(box[1] for box in boxes),
+                max(box[2] for box in boxes), max(box[3] for box in boxes))
+
+    def _pad(self, box):
+        return pad_box(box, self.padding, self.min_size)
+
+    def _contains(self, box):
+        """True if box lies inside the current region with some margin left"""
+        x1, y1, x2, y2 = self.region
+        margin_x = (x2 - x1) * self.padding / (1 + 2 * self.padding)
+        margin_y = (y2 - y1) * self.padding / (1 + 2 * self.padding)
+        return (box[0] >= x1 + margin_x / 2 and box[1] >= y1 + margin_y / 2 and
+                box[2] <= x2 - margin_x / 2 and box[3] <= y2 - margin_y / 2)
+
+    def select(self, last_results=None, motion_boxes=None):
+        """
+        Pick the region for the next inference from the previous pose result and
+        the current motion boxes; returns None to run on the full frame.
+        """
+        target = None
+        if last_results is not None and last_results.pose_landmarks:
+            target = self.landmark_box(last_results.pose_landmarks)
+        elif motion_boxes:
+            target = self.union_box(motion_boxes)
+
+        if target is None:
+            if self.misses >= self.max_misses:
+                self.region = None
+        elif self.region is None or not self._contains(target):
+            self.region = self._pad(target)
+
+        return self.region
+
+    @staticmethod
+    def crop(image, region):
+        """
+        Cut a normalized region out of an image (a view, not a copy).
+
+        Returns the crop and the region actually cut out after rounding to
+        pixels, which is what landmarks have to be mapped back with.
+        """
+        h, w = image.shape[:2]
+        x1, y1 = int(region[0] * w), int(region[1] * h)
+        x2, y2 = max(x1 + 1, int(region[2] * w)), max(y1 + 1, int(region[3] * h))
+        return image[y1:y2, x1:x2], (x1 / w, y1 / h, x2 / w, y2 / h)
+
+    def map_results(self, results, region):
+        """Convert landmarks found in a crop to full-frame normalized coordinates (in place)"""
+        self.metrics["roi_frames"] += 1
+        x1, y1, x2, y2 = region
+        self.metrics["roi_area"] += (x2 - x1) * (y2 - y1)
+
+        if not results.pose_landmarks:
+            self.misses += 1
+            self.metrics["roi_misses"] += 1
+            if self.misses >= self.max_misses:
+                self.region = None
+            return results
+
+        self.misses = 0
+        map_landmarks(results.pose_landmarks, region)
+        return results
+
+    def record_full_frame(self):
+        self.metrics["full_frames"] += 1
+
+    def get_metrics(self):
+        metrics = dict(self.metrics)
+        roi_area = metrics.pop("roi_area")
+        metrics["avg_roi_area"] = roi_area / metrics["roi_frames"] if metrics["roi_frames"] else 0.0
+        return metrics
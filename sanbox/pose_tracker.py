@@ -0,0 +1,195 @@
+"""
+Per-person tracks for multi-person fall detection.
+
+With a single set of fall state (landmark filter, fall features)
+a second person in the room hides a fall: their pose takes the first one's
+place from frame to frame. PoseTracker keeps a PersonTrack per person instead,
+each with its own landmark filter and fall features, and matches every
+inference's poses to the tracks by the distance between their landmark boxes.
+
+The work per frame is bounded by max_people: at most that many tracks exist,
+so at most that many people are filtered and analysed (and, with per-person
+crops, inferred) however many are in view. People are ranked by:
+
+    1. tracked people at risk - lying down, or fallen within risk_hold seconds
+    2. people tracked on the previous inference, longest tracked first
+    3. new people, largest first (nearest to the camera, most reliable landmarks)
+    4. tracked people missing from the last inferences
+
+When the cap is hit, new people wait for a track to free up; a track missing
+from the last inferences is given up for a new person unless it is at risk, so
+a fallen person the model loses sight of keeps their track and crop.
+
+Poses come from multi-pose inference (the tasks backend with num_poses > 1) or
+from running a single-pose model on one crop per person: crop_regions() lists
+the tracks' regions and the motion gate's blobs nobody covers, ranked the same
+way and capped the same way.
+"""
+from pose_roi import PoseROI, pad_box
+
+def box_center(box):
+    return (box[0] + box[2]) / 2, (box[1] + box[3]) / 2
+
+def box_area(box):
+    return (box[2] - box[0]) * (box[3] - box[1])
+
+def center_distance(box, other):
+    (x1, y1), (x2, y2) = box_center(box), box_center(other)
+    return ((x1 - x2) ** 2 + (y1 - y2) ** 2) ** 0.5
+
+def contains_point(box, point):
+    return box[0] <= point[0] <= box[2] and box[1] <= point[1] <= box[3]
+
+class PersonTrack:
+    """One person's landmark filter and fall state"""
+    def __init__(self, track_id, landmark_filter, features, box, timestamp):
+        self.track_id = track_id
+        self.landmark_filter = landmark_filter
+        self.features = features     # FallFeatures over this person's filtered poses
+        self.box = box               # Normalized landmark box of the last matched pose
+        self.pose = None             # Last matched pose (NormalizedLandmarkList)
+        self.first_seen = timestamp
+        self.missed = 0              # Inferences since the last matched pose
+
+        # Fall state, updated by PoseDetector.detect_person_fall()
+        self.status = None           # Pose status text and colour
+        self.lying = False
+        self.last_fall_time = None
+
+    def at_risk(self, timestamp, hold):
+        return self.lying or (self.last_fall_time is not None and timestamp - self.last_fall_time < hold)
+
+class PoseTracker:
+    """
+    Match poses to person tracks, at most max_people of them.
+
+    filter_factory and features_factory create the landmark filter and the
+    fall features of a new track. A track is
+    dropped after max_missed inferences without a pose, and a pose only
+    continues a track whose box centre is within match_distance (normalized).
+    """
+    def __init__(self, filter_factory, features_factory, max_people=1, max_missed=10, match_distance=0.5, risk_hold=10.0,
+                 padding=0.25, min_size=0.2):
+        self.filter_factory = filter_factory
+        self.features_factory = features_factory
+        self.max_people = max_people
+        self.max_missed = max_missed
+        self.match_distance = match_distance
+        self.risk_hold = risk_hold
+        self.padding = padding    # Crop padding on each side, as a fraction of the box size
+        self.min_size = min_size  # Smallest crop, as a fraction of the frame size
+
+        self.tracks = []
+        self.next_id = 1
+        self.metrics = {
+            "frames": 0,
+            "people": 0,          # Summed people analysed per frame
+            "tracks": 0,          # Tracks started
+            "capped_frames": 0,   # Frames with more people than max_people
+            "dropped_poses": 0    # Poses not analysed because of the cap
+        }
+
+    def priority(self, track, timestamp):
+        """Sort key of a track, lowest first (see the module docstring)"""
+        if track.at_risk(timestamp, self.risk_hold):
+            tier = 0
+        elif track.missed == 0:
+            tier = 1
+        else:
+            tier = 3
+        return tier, track.first_seen
+
+    def ranked(self, timestamp):
+        return sorted(self.tracks, key=lambda track: self.priority(track, timestamp))
+
+    def update(self, poses, timestamp):
+        """
+        Match one inference's poses (NormalizedLandmarkLists) to the tracks.
+
+        Returns (track, pose_landmarks) pairs for the people to analyse, in
+        priority order. Tracks without a pose count a miss.
+        """
+        boxes = [PoseROI.landmark_box(pose) for pose in poses]
+
+        # Greedy nearest-first matching; at most len(poses) x max_people pairs
+        pairs = sorted(
+            (center_distance(box, track.box), p, t)
+            for p, box in enumerate(boxes) for t, track in enumerate(self.tracks)
+        )
+        matches = {}  # Pose index -> track
+        matched_tracks = set()
+        for distance, p, t in pairs:
+            if distance > self.match_distance:
+                break
+            if p in matches or t in matched_tracks:
+                continue
+            matches[p] = self.tracks[t]
+            matched_tracks.add(t)
+
+        for t, track in enumerate(self.tracks):
+            track.missed = 0 if t in matched_tracks else track.missed + 1
+        self.tracks = [track for track in self.tracks if track.missed <= self.max_missed]
+
+        people = []
+        for p, track in matches.items():
+            track.box = boxes[p]
+            track.pose = poses[p]
+            people.append((track, poses[p]))
+        people.sort(key=lambda person: self.priority(person[0], timestamp))
+
+        # New people, largest first, while there is room or a track to give up
+        new_poses = sorted((p for p in range(len(poses)) if p not in matches), key=lambda p: -box_area(boxes[p]))
+        dropped = 0
+        for p in new_poses:
+            if len(self.tracks) >= self.max_people and not self.give_up_track(timestamp):
+                dropped += 1
+                continue
+            track = PersonTrack(self.next_id, self.filter_factory(), self.features_factory(), boxes[p], timestamp)
+            track.pose = poses[p]
+            self.next_id += 1
+            self.tracks.append(track)
+            self.metrics["tracks"] += 1
+            people.append((track, poses[p]))
+
+        self.metrics["frames"] += 1
+        self.metrics["people"] += len(people)
+        if dropped:
+            self.metrics["capped_frames"] += 1
+            self.metrics["dropped_poses"] += dropped
+        return people
+
+    def give_up_track(self, timestamp):
+        """Drop the lowest-ranked missing track that is not at risk; False if there is none"""
+        candidates = [track for track in self.tracks
+                      if track.missed and not track.at_risk(timestamp, self.risk_hold)]
+        if not candidates:
+            return False
+        self.tracks.remove(max(candidates, key=lambda track: self.priority(track, timestamp)))
+        return True
+
+    def crop_regions(self, motion_boxes, timestamp):
+        """
+        Padded regions to run a single-pose model on, at most max_people, in priority order.
+
+        Returns (track or None, region) pairs: the tracks' last boxes, and the
+        motion boxes whose centre no track region covers (largest first, ranked
+        as new people).
+        """
+        tracks = self.ranked(timestamp)
+        regions = [(track, pad_box(track.box, self.padding, self.min_size)) for track in tracks]
+
+        blobs = [box for box in motion_boxes or []
+                 if not any(contains_point(region, box_center(box)) for _, region in regions)]
+        blobs.sort(key=box_area, reverse=True)
+        blob_regions = [(None, pad_box(box, self.padding, self.min_size)) for box in blobs]
+
+        # Missing tracks that are not at risk rank after new people
+        present = [(track, region) for track, region in regions if self.priority(track, timestamp)[0] < 3]
+        missing = [(track, region) for track, region in regions if self.priority(track, timestamp)[0] == 3]
+        return (present + blob_regions + missing)[:self.max_people]
+
+    def get_metrics(self):
+        metrics = dict(self.metrics)
+        metrics["max_people"] = self.max_people
+        metrics["avg_people"] = round(metrics["people"] / metrics["frames"], 2) if metrics["frames"] else 0.0
+        return metrics
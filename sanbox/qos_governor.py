@@ -0,0 +1,149 @@
+"""
+Latency-budget governor for pose inference.
+
+Measures how long each pose inference takes and trades quality for speed when
+the camera's budget is exceeded, so an overloaded host degrades gracefully
+instead of falling further and further behind the live stream.
+
+The knobs form a ladder of levels from best to cheapest quality. Each step down
+lowers one knob, in turn: model complexity, then frame skip, then processing
+resolution, e.g. with the default steps
+
+    480p skip 1 complexity 2 -> 480p skip 1 complexity 1 -> 480p skip 2 complexity 1
+    -> 360p skip 2 complexity 1 -> 360p skip 2 complexity 0 -> ...
+
+The cost compared with the budget is the inference latency amortized over the
+frames that are skipped (latency / skip factor), averaged over a window of
+inferences. Hysteresis: one window over budget steps down right away, stepping
+up needs several consecutive windows well under budget, and a level that was
+left for being too slow is not retried for a while.
+"""
+import time
+
+class QoSGovernor:
+    """
+    Pick resolution, frame skip and model complexity for a latency budget.
+
+    Call record() with the duration of every inference; it returns the new
+    settings (a dict with resolution, skip and complexity) when the level
+    changes and None otherwise. Every change is kept in the metrics.
+    """
+    def __init__(self, budget_ms=50.0, resolution=480, skip=2, complexity=1,
+                 resolutions=None, skips=(1, 2, 3, 4), complexities=(2, 1, 0),
+                 window=30, headroom=0.6, upgrade_windows=3, retry_after=60.0, warmup=2):
+        self.budget = budget_ms / 1000.0
+        self.window = window
+        self.headroom = headroom                # Step up only below this fraction of the budget
+        self.upgrade_windows = upgrade_windows  # Consecutive good windows needed to step up
+        self.retry_after = retry_after          # Seconds before a level that was too slow is retried
+        self.warmup = warmup                    # Inferences ignored after a change (model reloads)
+
+        if resolutions is None:
+            resolutions = (resolution, resolution * 3 // 4, resolution // 2)
+        self.levels = self.build_ladder(resolutions, skips, complexities)
+
+        # Start at the first level at least as cheap as the configured settings
+        self.level = next(
+            (i for i, level in enumerate(self.levels)
+             if level["resolution"] <= resolution and level["skip"] >= skip and level["complexity"] <= complexity),
+            len(self.levels) - 1
+        )
+
+        self.samples = []
+        self.ignore = 0
+        self.good_windows = 0
+        self.blocked_until = {}  # Level -> time before which it is not retried
+        self.last_cost = None
+
+        self.changes = []
+        self.metrics = {
+            "inferences": 0,
+            "degradations": 0,
+            "upgrades": 0
+        }
+
+    @staticmethod
+    def build_ladder(resolutions, skips, complexities):
+        """Levels from best to cheapest, lowering complexity, skip and resolution in turn"""
+        steps = [sorted(complexities, reverse=True), sorted(skips), sorted(resolutions, reverse=True)]
+        names = ["complexity", "skip", "resolution"]
+        position = [0, 0, 0]
+
+        def level():
+            return {name: step[i] for name, step, i in zip(names, steps, position)}
+
+        levels = [level()]
+        while any(position[k] < len(steps[k]) - 1 for k in range(3)):
+            for k in range(3):
+                if position[k] < len(steps[k]) - 1:
+                    position[k] += 1
+                    levels.append(level())
+        return levels
+
+    @property
+    def settings(self):
+        return dict(self.levels[self.level])
+
+    def record(self, seconds, now=None):
+        """Add the duration of one inference; returns the new settings if the level changed"""
+        self.metrics["inferences"] += 1
+        if self.ignore:
+            self.ignore -= 1
+            return None
+
+        self.samples.append(seconds)
+        if len(self.samples) < self.window:
+            return None
+
+        now = time.time() if now is None else now
+        latency = sum(self.samples) / len(self.samples)
+        self.samples = []
+        cost = latency / self.levels[self.level]["skip"]
+        self.last_cost = cost
+
+        if cost > self.budget:
+            self.good_windows = 0
+            if self.level < len(self.levels) - 1:
+                self.blocked_until[self.level] = now + self.retry_after
+                return self._change(self.level + 1, cost, now)
+            return None
+
+        if cost < self.budget * self.headroom and self.level > 0:
+            self.good_windows += 1
+            if (self.good_windows >= self.upgrade_windows and
+                    self.blocked_until.get(self.level - 1, 0) <= now):
+                return self._change(self.level - 1, cost, now)
+        else:
+            self.good_windows = 0
+        return None
+
+    def _change(self, level, cost, now):
+        old, old_level = self.settings, self.level
+        self.level = level
+        new = self.settings
+        self.good_windows = 0
+        self.ignore = self.warmup
+
+        direction = "degradations" if level > old_level else "upgrades"
+        self.metrics[direction] += 1
+        self.changes.append({
+            "time": now,
+            "from": old,
+            "to": new,
+            "cost_ms": round(cost * 1000, 1)
+        })
+        print(f"QoS: {self.describe(old)} -> {self.describe(new)} "
+              f"({cost * 1000:.1f} ms/frame, budget {self.budget * 1000:.0f} ms)")
+        return new
+
+    @staticmethod
+    def describe(settings):
+        return f"{settings['resolution']}p skip {settings['skip']} complexity {settings['complexity']}"
+
+    def get_metrics(self):
+        metrics = dict(self.metrics)
+        metrics["level"] = self.level
+        metrics["settings"] = self.settings
+        metrics["last_cost_ms"] = round(self.last_cost * 1000, 1) if self.last_cost is not None else None
+        metrics["changes"] = list(self.changes)
+        return metrics
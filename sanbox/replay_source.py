@@ -0,0 +1,211 @@
+"""
+Offline replay source for the detectors.
+
+ReplaySource plays recorded clips (e.g. the mp4s in fall_events/) or image
+sequences through the same read() interface as a camera capture, so
+HandDetector, PoseDetector and FaceDetector can run on footage without a live
+camera. Frame timestamps come from the container (or the frame index for image
+sequences) instead of the wall clock, so fall logic behaves the same whether
+the clip is replayed as fast as possible or paced in real time.
+"""
+import cv2
+import time
+import os
+import glob
+
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mov", ".mkv", ".m4v")
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+def expand_replay_source(source):
+    """
+    Turn a file, directory or glob pattern into an ordered list of files.
+
+    A directory containing videos plays all of them in name order; otherwise its
+    images are played as one image sequence.
+    """
+    if os.path.isdir(source):
+        names = sorted(os.listdir(source))
+        videos = [os.path.join(source, n) for n in names if n.lower().endswith(VIDEO_EXTENSIONS)]
+        if videos:
+            return videos
+        return [os.path.join(source, n) for n in names if n.lower().endswith(IMAGE_EXTENSIONS)]
+
+    if os.path.isfile(source):
+        return [source]
+
+    return sorted(f for f in glob.glob(source) if f.lower().endswith(VIDEO_EXTENSIONS + IMAGE_EXTENSIONS))
+
+class ReplaySource:
+    """
+    Replay video files or an image sequence like a cv2.VideoCapture.
+
+    realtime=False reads frames as fast as the consumer asks for them (throughput
+    benchmarks, regression runs); realtime=True sleeps so frames are delivered at
+    their media timestamps, like a live camera.
+
+    timestamp is the media time in seconds of the last frame returned. Clips are
+    played back to back with continuous timestamps. Image sequences are timed at
+    image_fps.
+    """
+    pixel_format = "bgr24"
+
+    def __init__(self, source, realtime=False, image_fps=30.0, loop=False):
+        self.source = source
+        self.realtime = realtime
+        self.image_fps = image_fps
+        self.loop = loop
+
+        self.files = expand_replay_source(source)
+        self.is_image_sequence = bool(self.files) and self.files[0].lower().endswith(IMAGE_EXTENSIONS)
+
+        self.file_index = -1
+        self.video = None
+        self.fps = image_fps
+        self.frame_size = (0, 0)
+        self.clip_offset = 0.0       # Media time at which the current clip starts
+        self.clip_end = 0.0          # Latest timestamp seen in the current clip
+        self.clip_frames = 0
+
+        self.timestamp = None        # Media time of the last frame returned
+        self.frames = 0
+        self.wall_start = None
+        self.media_start = None
+        self.ended = not self.files
+
+        if self.ended:
+            print(f"No videos or images found for replay source {source}")
+        elif not self.is_image_sequence:
+            self._open_next_video()
+
+    def _open_next_video(self):
+        """Open the next clip that can be read; returns False when none are left"""
+        if self.video is not None:
+            self.video.release()
+            self.video = None
+
+        while True:
+            self.file_index += 1
+            if self.file_index >= len(self.files):
+                if not self.loop or self.frames == 0:
+                    return False
+                self.file_index = 0
+
+            video = cv2.VideoCapture(self.files[self.file_index])
+            if video.isOpened():
+                break
+            print(f"Could not open {self.files[self.file_index]}, skipping")
+            video.release()
+
+        self.video = video
+        self.fps = video.get(cv2.CAP_PROP_FPS) or self.image_fps
+        self.frame_size = (int(video.get(cv2.CAP_PROP_FRAME_WIDTH)), int(video.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+
+        # Continue after the previous clip's last frame
+        if self.timestamp is not None:
+            self.clip_offset = self.timestamp + 1.0 / self.fps
+        self.clip_end = self.clip_offset
+        self.clip_frames = 0
+        return True
+
+    def _read_video_frame(self):
+        while self.video is not None:
+            ret, frame = self.video.read()
+            if ret and frame is not None:
+                # Presentation time of the decoded frame; fall back to the frame index
+                # for containers that do not report it
+                position = self.video.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+                if position <= 0 and self.clip_frames > 0:
+                    position = self.clip_frames / self.fps
+                self.clip_frames += 1
+                timestamp = self.clip_offset + position
+
+                # Keep timestamps strictly increasing for the filters
+                if self.timestamp is not None and timestamp <= self.timestamp:
+                    timestamp = self.timestamp + 1.0 / self.fps
+                self.clip_end = timestamp
+                return frame, timestamp
+
+            if not self._open_next_video():
+                return None, None
+        return None, None
+
+    def _read_image_frame(self):
+        while True:
+            index = self.frames
+            if index >= len(self.files):
+                if not self.loop:
+                    return None, None
+                index %= len(self.files)
+
+            frame = cv2.imread(self.files[index])
+            if frame is not None:
+                self.frame_size = (frame.shape[1], frame.shape[0])
+                return frame, self.frames / self.image_fps
+
+            print(f"Could not read {self.files[index]}, skipping")
+            self.files.pop(index)
+            if not self.files:
+                return None, None
+
+    def read(self):
+        """Return (ret, frame) for the next frame, pacing it in realtime mode"""
+        if self.ended:
+            return False, None
+
+        if self.is_image_sequence:
+            frame, timestamp = self._read_image_frame()
+        else:
+            frame, timestamp = self._read_video_frame()
+
+        if frame is None:
+            self.ended = True
+            return False, None
+
+        if self.wall_start is None:
+            self.wall_start = time.time()
+            self.media_start = timestamp
+        elif self.realtime:
+            delay = self.wall_start + (timestamp - self.media_start) - time.time()
+            if delay > 0:
+                time.sleep(delay)
+
+        self.timestamp = timestamp
+        self.frames += 1
+        return True, frame
+
+    def isOpened(self):
+        return not self.ended
+
+    def get(self, prop_id):
+        if prop_id == cv2.CAP_PROP_POS_MSEC:
+            return (self.timestamp or 0.0) * 1000.0
+        if prop_id == cv2.CAP_PROP_FPS:
+            return float(self.fps)
+        if prop_id == cv2.CAP_PROP_FRAME_WIDTH:
+            return float(self.frame_size[0])
+        if prop_id == cv2.CAP_PROP_FRAME_HEIGHT:
+            return float(self.frame_size[1])
+        if self.video is not None:
+            return self.video.get(prop_id)
+        return 0.0
+
+    def set(self, prop_id, value):
+        return False
+
+    def get_metrics(self):
+        """Frames replayed, media and wall-clock duration and throughput"""
+        wall_seconds = time.time() - self.wall_start if self.wall_start is not None else 0.0
+        media_seconds = self.timestamp - self.media_start if self.timestamp is not None else 0.0
+        return {
+            "frames": self.frames,
+            "media_seconds": media_seconds,
+            "wall_seconds": wall_seconds,
+            "fps": self.frames / wall_seconds if wall_seconds > 0 else 0.0,
+            "realtime_factor": media_seconds / wall_seconds if wall_seconds > 0 else 0.0
+        }
+
+    def release(self):
+        if self.video is not None:
+            self.video.release()
+            self.video = None
+        self.ended = True
@@ -0,0 +1,51 @@
+"""
+Reusable model-input buffers.
+
+MediaPipe needs an RGB image at the processing resolution. Resizing and
+converting into fresh arrays costs two full-frame allocations per processed
+frame; RGBInput keeps one resize buffer and one RGB buffer per detector and
+only reallocates them when the input size changes. The original BGR frame is
+never converted back: results are normalized, so overlays are drawn straight
+onto it.
+"""
+import cv2
+import numpy as np
+
+class RGBInput:
+    """Resize and colour-convert frames into buffers that are reused across frames"""
+    def __init__(self):
+        self.resized = None
+        self.rgb = None
+        self.allocations = 0  # Buffer (re)allocations so far, for benchmarks
+
+    def _buffer(self, name, shape):
+        buffer = getattr(self, name)
+        if buffer is None or buffer.shape != shape:
+            buffer = np.empty(shape, dtype=np.uint8)
+            setattr(self, name, buffer)
+            self.allocations += 1
+        return buffer
+
+    def prepare(self, image, height, convert=True, interpolation=cv2.INTER_LINEAR):
+        """
+        Return image scaled to height lines (as RGB if convert, else as is).
+
+        The result is one of the reused buffers and is only valid until the next
+        call. image may be a non-contiguous view such as a crop.
+        """
+        h, w = image.shape[:2]
+        if h != height:
+            resized = self._buffer("resized", (height, max(1, int(w * height / h)), image.shape[2]))
+            cv2.resize(image, (resized.shape[1], height), dst=resized, interpolation=interpolation)
+            image = resized
+
+        if convert:
+            rgb = self._buffer("rgb", image.shape)
+            cv2.cvtColor(image, cv2.COLOR_BGR2RGB, dst=rgb)
+            return rgb
+
+        if image is not self.resized and not image.flags.c_contiguous:
+            rgb = self._buffer("rgb", image.shape)
+            np.copyto(rgb, image)
+            return rgb
+        return image
@@ -0,0 +1,373 @@
+"""
+Shared-memory frame ring between a capture process and inference processes.
+
+Capture (decoding, reconnecting) runs in its own process and writes every frame
+into a multiprocessing.shared_memory ring of preallocated slots. Readers in
+other processes attach to the ring by name, so frames never go through
+pickling or a pipe and decoding does not compete with inference for the GIL.
+
+Each slot carries the sequence number of the frame in it. A writer invalidates
+the slot before overwriting it and publishes the new number afterwards; a
+reader checks the number again after copying and retries if the slot was
+overwritten meanwhile (a seqlock), so readers never see a torn frame.
+
+One reader per ring may instead pin the newest frame and use it in place: the
+writer skips the pinned slot until the reader moves on, so the only copy per
+frame is the one into the ring.
+
+ProcessCapture starts the capture process and behaves like a cv2.VideoCapture,
+so it can be used wherever the detectors call cap.read().
+"""
+import cv2
+import numpy as np
+import time
+import multiprocessing
+from multiprocessing import shared_memory
+from camera_connect import ReconnectSupervisor
+
+PIXEL_FORMATS = ["bgr24", "rgb24"]
+
+# Header fields (int64) at the start of the shared memory block
+WRITE_SEQ, CLOSED, HEIGHT, WIDTH, CHANNELS, PIXEL_FORMAT, SLOTS, FPS_MILLI, IDLE, IDLE_FPS_MILLI, PINNED_SEQ = range(11)
+HEADER_FIELDS = 16
+
+def attach_shared_memory(name):
+    """Attach to an existing block without making this process responsible for unlinking it"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13 always registers the block with the resource tracker. Processes
+        # started through multiprocessing share the creator's tracker, so this only
+        # re-adds the same entry, which the creator's unlink() removes again.
+        return shared_memory.SharedMemory(name=name)
+
+class SharedFrameRing:
+    """
+    Fixed-size ring of frame slots in one shared memory block.
+
+    Create it with create() in the writing process and open it with attach(name)
+    in readers; the frame shape and pixel format are stored in the block, so
+    readers only need the name. There is one writer and any number of readers.
+    """
+    def __init__(self, shm, owner):
+        self.shm = shm
+        self.name = shm.name
+        self.owner = owner
+
+        self.header = np.ndarray((HEADER_FIELDS,), dtype=np.int64, buffer=shm.buf)
+        slots = int(self.header[SLOTS])
+        self.shape = (int(self.header[HEIGHT]), int(self.header[WIDTH]), int(self.header[CHANNELS]))
+        self.pixel_format = PIXEL_FORMATS[int(self.header[PIXEL_FORMAT])]
+        self.slots = slots
+
+        offset = self.header.nbytes
+        self.slot_seq = np.ndarray((slots,), dtype=np.int64, buffer=shm.buf, offset=offset)
+        offset += self.slot_seq.nbytes
+        self.slot_time = np.ndarray((slots,), dtype=np.float64, buffer=shm.buf, offset=offset)
+        offset += self.slot_time.nbytes
+        self.frames = np.ndarray((slots, *self.shape), dtype=np.uint8, buffer=shm.buf, offset=offset)
+
+        self.write_slot = -1  # Slot of the last frame written (writer only)
+        self.copies = 0       # Frame copies into or out of the ring made by this process
+
+    @classmethod
+    def create(cls, shape, slots=4, pixel_format="bgr24", fps=0.0):
+        if slots < 3:
+            raise ValueError("A frame ring needs at least 3 slots: the newest, a pinned and a free one")
+        height, width, channels = shape
+        size = (HEADER_FIELDS + 2 * slots) * 8 + slots * height * width * channels
+        shm = shared_memory.SharedMemory(create=True, size=size)
+
+        header = np.ndarray((HEADER_FIELDS,), dtype=np.int64, buffer=shm.buf)
+        header[:] = 0
+        header[HEIGHT], header[WIDTH], header[CHANNELS] = height, width, channels
+        header[PIXEL_FORMAT] = PIXEL_FORMATS.index(pixel_format)
+        header[SLOTS] = slots
+        header[FPS_MILLI] = int(fps * 1000)
+
+        ring = cls(shm, owner=True)
+        ring.slot_seq[:] = 0
+        return ring
+
+    @classmethod
+    def attach(cls, name):
+        return cls(attach_shared_memory(name), owner=False)
+
+    @property
+    def latest_seq(self):
+        return int(self.header[WRITE_SEQ])
+
+    @property
+    def closed(self):
+        return bool(self.header[CLOSED])
+
+    @property
+    def fps(self):
+        return self.header[FPS_MILLI] / 1000.0
+
+    def write(self, frame, timestamp=None):
+        """Copy a frame into the next slot and publish it; returns its sequence number"""
+        seq = int(self.header[WRITE_SEQ]) + 1
+        slot = (self.write_slot + 1) % self.slots
+
+        previous = int(self.slot_seq[slot])
+        self.slot_seq[slot] = 0  # Invalidate while writing
+        if previous and previous == self.header[PINNED_SEQ]:
+            # A reader is using this frame in place; the slot after it is neither pinned nor the newest
+            self.slot_seq[slot] = previous
+            slot = (slot + 1) % self.slots
+            self.slot_seq[slot] = 0
+        self.write_slot = slot
+
+        if frame.shape == self.shape:
+            np.copyto(self.frames[slot], frame)
+        else:
+            # The stream came back at another size after a reconnect
+            cv2.resize(frame, (self.shape[1], self.shape[0]), dst=self.frames[slot])
+        self.slot_time[slot] = time.time() if timestamp is None else timestamp
+        self.slot_seq[slot] = seq
+        self.header[WRITE_SEQ] = seq
+        self.copies += 1
+        return seq
+
+    def slot_of(self, seq):
+        """Slot holding frame seq, or None if it is being overwritten"""
+        slots = np.flatnonzero(self.slot_seq == seq)
+        return int(slots[0]) if len(slots) else None
+
+    def read_into(self, out, last_seq=0):
+        """
+        Copy the newest frame newer than last_seq into out.
+
+        Returns (seq, timestamp), or (None, None) if there is no newer frame.
+        """
+        while True:
+            seq = int(self.header[WRITE_SEQ])
+            if seq <= last_seq:
+                return None, None
+
+            slot = self.slot_of(seq)
+            if slot is None:
+                continue  # Writer already moved on to this slot, take the newer frame
+
+            np.copyto(out, self.frames[slot])
+            timestamp = float(self.slot_time[slot])
+
+            # The slot may have been overwritten while we copied it
+            if self.slot_seq[slot] == seq:
+                self.copies += 1
+                return seq, timestamp
+
+    def pin_latest(self, last_seq=0):
+        """
+        Pin the newest frame newer than last_seq and return a view of its slot.
+
+        The view stays valid until the next pin_latest() or unpin(); only one
+        reader per ring may pin. Returns (seq, timestamp, frame), or
+        (None, None, None) if there is no newer frame.
+        """
+        while True:
+            seq = int(self.header[WRITE_SEQ])
+            if seq <= last_seq:
+                return None, None, None
+
+            slot = self.slot_of(seq)
+            if slot is None:
+                continue
+            self.header[PINNED_SEQ] = seq
+
+            # The writer checks the pin after invalidating a slot: if it has not
+            # invalidated this one by now, it will see the pin and skip it
+            if self.slot_seq[slot] == seq:
+                return seq, float(self.slot_time[slot]), self.frames[slot]
+
+    def unpin(self):
+        self.header[PINNED_SEQ] = 0
+
+    def mark_closed(self):
+        self.header[CLOSED] = 1
+
+    def close(self):
+        # Drop the numpy views before closing, they hold references to the buffer
+        self.header = self.slot_seq = self.slot_time = self.frames = None
+        try:
+            self.shm.close()
+        except BufferError:
+            # A caller still holds a pinned frame; the mapping goes away with the last view
+            pass
+
+    def unlink(self):
+        if self.owner:
+            self.shm.unlink()
+
+class RingCapture:
+    """
+    Read frames from a SharedFrameRing like a cv2.VideoCapture.
+
+    read() waits for a frame newer than the last one and returns it in place,
+    as a view of its pinned ring slot that is only valid until the next read(),
+    like FFmpegPipeCapture's buffer. Callers that keep frames longer copy them
+    (DetectionPipeline does when frames are in flight). timestamp is the
+    capture time of the last frame.
+    """
+    def __init__(self, ring_name, read_timeout=5.0, poll_interval=0.001):
+        self.ring = SharedFrameRing.attach(ring_name)
+        self.pixel_format = self.ring.pixel_format
+        self.read_timeout = read_timeout
+        self.poll_interval = poll_interval
+
+        self.last_read_seq = 0
+        self.frames_read = 0
+        self.dropped_frames = 0   # Frames written to the ring that this reader never saw
+        self.timestamp = None
+        self.released = False
+
+    def read_latest(self, timeout=None):
+        """Returns (ret, frame, frame_seq, dropped_frames) like LatestFrameCapture"""
+        if timeout is None:
+            timeout = self.read_timeout
+        deadline = time.time() + timeout
+
+        while not self.released:
+            seq, timestamp, frame = self.ring.pin_latest(self.last_read_seq)
+            if seq is not None:
+                if self.last_read_seq:
+                    self.dropped_frames += seq - self.last_read_seq - 1
+                self.last_read_seq = seq
+                self.frames_read += 1
+                self.timestamp = timestamp
+                return True, frame, seq, self.dropped_frames
+
+            if self.ring.closed or time.time() > deadline:
+                break
+            time.sleep(self.poll_interval)
+
+        return False, None, self.last_read_seq, self.dropped_frames
+
+    def read(self):
+        ret, frame, _, _ = self.read_latest()
+        return ret, frame
+
+    def set_idle(self, idle, idle_fps=1.0):
+        """Ask the capture process to switch its capture to or from idle decoding"""
+        self.ring.header[IDLE_FPS_MILLI] = int(idle_fps * 1000)
+        self.ring.header[IDLE] = 1 if idle else 0
+
+    def isOpened(self):
+        return not self.released and not self.ring.closed
+
+    def get(self, prop_id):
+        if prop_id == cv2.CAP_PROP_FRAME_WIDTH:
+            return float(self.ring.shape[1])
+        if prop_id == cv2.CAP_PROP_FRAME_HEIGHT:
+            return float(self.ring.shape[0])
+        if prop_id == cv2.CAP_PROP_FPS:
+            return self.ring.fps
+        return 0.0
+
+    def set(self, prop_id, value):
+        return False
+
+    def get_stats(self):
+        return {
+            "frame_seq": self.ring.latest_seq,
+            "frames_read": self.frames_read,
+            "dropped_frames": self.dropped_frames,
+            "stream_ended": self.ring.closed,
+            "reader_copies": self.ring.copies
+        }
+
+    def release(self):
+        if not self.released:
+            self.released = True
+            self.ring.unpin()
+            self.ring.close()
+
+def _capture_process_main(open_source, slots, reconnect, info_queue, stop_event):
+    """Capture process: read frames from open_source() and write them into a new ring"""
+    cap = open_source()
+    ret, frame = (False, None) if cap is None else cap.read()
+    if not ret or frame is None:
+        info_queue.put(None)
+        if cap is not None:
+            cap.release()
+        return
+
+    ring = SharedFrameRing.create(frame.shape, slots, getattr(cap, "pixel_format", "bgr24"),
+                                  cap.get(cv2.CAP_PROP_FPS))
+    info_queue.put(ring.name)
+
+    # Reconnect inside the capture process so readers see one continuous ring
+    stream = ReconnectSupervisor(open_source, cap=cap) if reconnect else cap
+    idle = False
+
+    try:
+        while not stop_event.is_set():
+            ring.write(frame, getattr(stream.cap if reconnect else cap, "timestamp", None))
+
+            requested_idle = bool(ring.header[IDLE])
+            if requested_idle != idle and hasattr(stream, "set_idle"):
+                idle = requested_idle
+                stream.set_idle(idle, ring.header[IDLE_FPS_MILLI] / 1000.0 or 1.0)
+
+            ret, frame = stream.read()
+            if not ret:
+                break
+    except KeyboardInterrupt:
+        pass
+    finally:
+        ring.mark_closed()
+        stream.release()
+        ring.close()
+        ring.unlink()
+
+class ProcessCapture(RingCapture):
+    """
+    Run a capture in its own process and read it through a shared-memory ring.
+
+    open_source is a picklable callable returning an opened capture, e.g.
+    functools.partial(connect_to_ip_camera, ip=..., threaded=True). It is called
+    again inside the capture process to reconnect when reconnect is True.
+    """
+    def __init__(self, open_source, slots=4, reconnect=True, ready_timeout=60, read_timeout=5.0):
+        self.read_timeout = read_timeout
+        
+        # spawn: forking a process that already runs capture threads is not safe
+        context = multiprocessing.get_context("spawn")
+        info_queue = context.Queue()
+        self.stop_event = context.Event()
+        self.process = context.Process(
+            target=_capture_process_main,
+            args=(open_source, slots, reconnect, info_queue, self.stop_event),
+            daemon=True
+        )
+        self.process.start()
+
+        try:
+            ring_name = info_queue.get(timeout=ready_timeout)
+        except Exception:
+            ring_name = None
+
+        if ring_name is None:
+            self.ring = None
+            self.released = True
+            self._stop_process()
+            return
+
+        super().__init__(ring_name, read_timeout=read_timeout)
+
+    def _stop_process(self):
+        self.stop_event.set()
+        self.process.join(timeout=self.read_timeout)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join()
+
+    def isOpened(self):
+        return self.ring is not None and super().isOpened() and self.process.is_alive()
+
+    def release(self):
+        if self.ring is None:
+            return
+        super().release()
+        self._stop_process()
@@ -5,6 +5,7 @@ import sys
 import os
 import subprocess
 import platform
+from camera_connect import FFMPEG_CAPTURE_OPTIONS, open_capture, wait_for_first_frame
 
 def open_in_vlc(url):
     """
@@ -81,37 +82,21 @@ def test_camera_connection():
     
     # Try to connect to the camera with improved parameters for VStar cameras
     # Set environment variables to mimic VLC's behavior
-    os.environ["OPENCV_FFMPEG_CAPTURE_OPTIONS"] = "rtsp_transport;tcp|analyzeduration;10000000|reorder_queue_size;10000|buffer_size;10485760|stimeout;1000000"
-    cap = cv2.VideoCapture(url, cv2.CAP_FFMPEG)
-    
-    # Configure streaming parameters that may help with VStar C24S
-    cap.set(cv2.CAP_PROP_BUFFERSIZE, 10)
-    
-    # Give it a moment to connect
-    print("Waiting for connection...")
-    time.sleep(5)  # Extended wait time for VStar cameras
-    
-    # Try several frames to handle potential initial empty frames
-    connected = False
+    os.environ["OPENCV_FFMPEG_CAPTURE_OPTIONS"] = FFMPEG_CAPTURE_OPTIONS
+    start_time = time.time()
+    cap = open_capture(url, timeout=30)
+    connect_seconds = time.time() - start_time
+    connected = cap.isOpened()
+    
+    # Wait for the first valid frame instead of a fixed delay
+    # (the first frames from VStar cameras may be empty)
     valid_frame = False
     frame = None
-    
-    for i in range(10):  # Try up to 10 frames
-        if not cap.isOpened():
-            break
-            
-        connected = True
-        print(f"Connection established, trying to read frame {i+1}/10...")
-        ret, test_frame = cap.read()
-        
-        if ret and test_frame is not None and test_frame.size > 0:
-            print(f"Successfully captured frame {i+1}")
-            frame = test_frame
-            valid_frame = True
-            break
-        else:
-            print(f"Frame {i+1} invalid or empty, trying again...")
-            time.sleep(0.5)
+    if connected:
+        print(f"Connection established after {connect_seconds:.2f}s, waiting for first frame...")
+        valid_frame, frame, _ = wait_for_first_frame(cap, timeout=30)
+        if valid_frame:
+            print(f"First frame captured after {time.time() - start_time:.2f}s")
     
     # Check if connected
     if connected:
@@ -209,18 +194,16 @@ def test_alternative_paths():
         url = f"rtsp://{user}:{password}@{ip}:{port}{path}"
         print(f"\nTrying URL: {url}")
         
-        cap = cv2.VideoCapture(url, cv2.CAP_FFMPEG)
-        cap.set(cv2.CAP_PROP_BUFFERSIZE, 3)
-        
-        time.sleep(3)
+        start_time = time.time()
+        cap = open_capture(url, timeout=10)
         
         if cap.isOpened():
-            print(f"SUCCESS: Connected with path: {path}")
+            print(f"SUCCESS: Connected with path: {path} ({time.time() - start_time:.2f}s)")
             
-            # Try to read a frame
-            ret, frame = cap.read()
-            if ret and frame is not None and frame.size > 0:
-                print("SUCCESS: Captured a frame with this URL!")
+            # Wait for the first frame instead of a fixed delay
+            ret, frame, _ = wait_for_first_frame(cap, timeout=10)
+            if ret:
+                print(f"SUCCESS: Captured a frame with this URL! (first frame after {time.time() - start_time:.2f}s)")
                 timestamp = time.strftime("%Y%m%d_%H%M%S")
                 test_image = f"vstar_c24s_test_{timestamp}_{path.replace('/', '_')}.jpg"
                 cv2.imwrite(test_image, frame)